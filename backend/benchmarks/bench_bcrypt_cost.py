@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark do custo do bcrypt: latência e hashes/segundo por custo nesta máquina
+
+Para cada custo mede a latência de um hash isolado (uma CPU) e a vazão do
+pool de processos com ``--workers`` processos, que é o teto de logins e
+cadastros por segundo da instância. Rode na máquina de deploy para escolher
+``BCRYPT_ROUNDS`` (ou conferir o valor calibrado por ``BCRYPT_ROUNDS=auto``).
+
+Uso:
+    python benchmarks/bench_bcrypt_cost.py --costs 10 11 12 13 --target-ms 250
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.password_hasher import _hash_password, calibrate_rounds, DEFAULT_ROUNDS
+
+
+def measure_latency(rounds, hashes):
+    """Mediana (ms) de ``hashes`` hashes sequenciais no processo atual"""
+    samples = [_hash_password('benchmark-password', rounds)[1] * 1000 for _ in range(hashes)]
+    return statistics.median(samples)
+
+
+def measure_throughput(executor, rounds, hashes):
+    """Hashes/segundo com o pool de processos saturado"""
+    started = time.perf_counter()
+    futures = [executor.submit(_hash_password, 'benchmark-password', rounds) for _ in range(hashes)]
+    for future in futures:
+        future.result()
+    return hashes / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--costs', type=int, nargs='+', default=[10, 11, 12, 13])
+    parser.add_argument('--hashes', type=int, default=5, help='hashes por custo na medição de latência')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--target-ms', type=float, default=250.0, help='tempo alvo por hash para a recomendação')
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('fork')
+    print(f'CPUs: {os.cpu_count()}  workers: {args.workers}  alvo: {args.target_ms:g} ms/hash')
+    print()
+    print('| custo | hash p50 (ms) | hashes/s (1 CPU) | hashes/s (pool) |')
+    print('|------:|--------------:|-----------------:|----------------:|')
+
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=context) as executor:
+        # Aquece o pool para não medir a criação dos processos
+        list(executor.map(_hash_password, ['warmup'] * args.workers, [4] * args.workers))
+
+        for rounds in sorted(args.costs):
+            latency_ms = measure_latency(rounds, args.hashes)
+            throughput = measure_throughput(executor, rounds, max(args.hashes, args.workers * 2))
+            cost = f'{rounds}*' if rounds == DEFAULT_ROUNDS else str(rounds)
+            print(f'| {cost:>5} | {latency_ms:>13.1f} | {1000 / latency_ms:>16.2f} | {throughput:>15.2f} |')
+
+    print()
+    print(f'* padrão do bcrypt.gensalt() ({DEFAULT_ROUNDS})')
+    print(f'BCRYPT_ROUNDS=auto calibraria para: {calibrate_rounds(args.target_ms)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Teste de carga da API de autenticação: latência p50/p95/p99 e RPS por endpoint
+
+Sobe o servidor de produção (python -m src.serve, gunicorn) com um banco
+SQLite temporário, ou usa um servidor já rodando (--url), e dispara uma
+mistura ponderada de operações em N usuários virtuais concorrentes. Cada
+usuário virtual se cadastra, faz login e então sorteia operações da mistura
+até o fim do tempo. As conexões HTTP são keep-alive, uma por usuário virtual.
+
+Os resultados podem ser gravados como baseline (JSON versionado em
+benchmarks/baselines/) e comparados em execuções seguintes: a comparação
+falha (código de saída 1) se o p95 de algum endpoint ou o RPS total piorar
+mais que --tolerance.
+
+Uso:
+    python benchmarks/bench_load.py --concurrency 8 --duration 30
+    python benchmarks/bench_load.py --mix login=1,profile=6,verify=6,refresh=2,register=1
+    python benchmarks/bench_load.py --save-baseline benchmarks/baselines/load.json
+    python benchmarks/bench_load.py --compare benchmarks/baselines/load.json
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from urllib.parse import urlparse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MIX = 'register=1,login=2,refresh=2,profile=6,verify=6'
+PASSWORD = 'Load-test-123'
+
+
+class Client:
+    """Conexão HTTP keep-alive de um usuário virtual"""
+
+    def __init__(self, base_url):
+        parsed = urlparse(base_url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.connection = None
+
+    def request(self, method, path, body=None, token=None):
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        payload = json.dumps(body) if body is not None else None
+
+        for attempt in (1, 2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            try:
+                self.connection.request(method, path, body=payload, headers=headers)
+                response = self.connection.getresponse()
+                data = response.read()
+                return response.status, json.loads(data) if data else None
+            except (http.client.HTTPException, ConnectionError, socket.timeout):
+                # O servidor fechou a conexão keep-alive (ex.: worker reciclado)
+                self.connection.close()
+                self.connection = None
+                if attempt == 2:
+                    raise
+
+
+class VirtualUser:
+    """Usuário com conta própria e tokens obtidos no login"""
+
+    def __init__(self, client, run_id, index):
+        self.client = client
+        self.username = f'load{run_id}u{index}'
+        self.access_token = None
+        self.refresh_token = None
+        self.extra_accounts = 0
+
+    def create_account(self):
+        return self._register(self.username)
+
+    def register(self):
+        # Cada cadastro da mistura cria uma conta nova
+        self.extra_accounts += 1
+        return self._register(f'{self.username}r{self.extra_accounts}')
+
+    def _register(self, username):
+        return self.client.request('POST', '/api/auth/register', {
+            'username': username,
+            'email': f'{username}@example.com',
+            'password': PASSWORD,
+            'confirm_password': PASSWORD
+        })
+
+    def login(self):
+        status, body = self.client.request('POST', '/api/auth/login', {
+            'username': self.username,
+            'password': PASSWORD
+        })
+        if status == 200:
+            self.access_token = body['access_token']
+            self.refresh_token = body['refresh_token']
+        return status, body
+
+    def refresh(self):
+        status, body = self.client.request('POST', '/api/auth/refresh', token=self.refresh_token)
+        if status == 200:
+            self.access_token = body['access_token']
+        return status, body
+
+    def profile(self):
+        return self.client.request('GET', '/api/user/profile', token=self.access_token)
+
+    def verify(self):
+        return self.client.request('GET', '/api/auth/verify', token=self.access_token)
+
+    def preferences(self):
+        return self.client.request('GET', '/api/user/preferences', token=self.access_token)
+
+    def me(self):
+        return self.client.request('GET', '/api/auth/me', token=self.access_token)
+
+
+OPERATIONS = ('register', 'login', 'refresh', 'profile', 'verify', 'preferences', 'me')
+EXPECTED_STATUS = {'register': 201}
+
+
+def parse_mix(text):
+    mix = {}
+    for item in text.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise SystemExit(f'operação desconhecida na mistura: {name} (opções: {", ".join(OPERATIONS)})')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values, fraction):
+    """Percentil por posição (nearest-rank) de uma lista ordenada"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(fraction * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, name, elapsed, ok):
+        with self.lock:
+            self.latencies.setdefault(name, []).append(elapsed)
+            if not ok:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+    def summary(self, duration):
+        endpoints = {}
+        with self.lock:
+            for name, values in sorted(self.latencies.items()):
+                values = sorted(values)
+                endpoints[name] = {
+                    'requests': len(values),
+                    'errors': self.errors.get(name, 0),
+                    'rps': round(len(values) / duration, 2),
+                    'p50_ms': round(percentile(values, 0.50) * 1000, 2),
+                    'p95_ms': round(percentile(values, 0.95) * 1000, 2),
+                    'p99_ms': round(percentile(values, 0.99) * 1000, 2),
+                    'max_ms': round(values[-1] * 1000, 2)
+                }
+        total = sum(item['requests'] for item in endpoints.values())
+        return {
+            'total_requests': total,
+            'total_errors': sum(item['errors'] for item in endpoints.values()),
+            'rps': round(total / duration, 2),
+            'endpoints': endpoints
+        }
+
+
+def run_load(base_url, concurrency, duration, warmup, mix, seed):
+    run_id = uuid.uuid4().hex[:6]
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    recorder = Recorder()
+    measuring = threading.Event()
+    stop = threading.Event()
+    setup_failures = []
+
+    def worker(index):
+        rng = random.Random(seed + index)
+        user = VirtualUser(Client(base_url), run_id, index)
+        if user.create_account()[0] != 201 or user.login()[0] != 200:
+            setup_failures.append(index)
+            return
+
+        while not stop.is_set():
+            name = rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                status, _ = getattr(user, name)()
+                ok = status == EXPECTED_STATUS.get(name, 200)
+            except Exception:
+                ok = False
+            elapsed = time.perf_counter() - started
+            if measuring.is_set() and not stop.is_set():
+                recorder.record(name, elapsed, ok)
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+
+    time.sleep(warmup)
+    measuring.set()
+    started = time.perf_counter()
+    time.sleep(duration)
+    stop.set()
+    measured = time.perf_counter() - started
+    for thread in threads:
+        thread.join(timeout=60)
+
+    if setup_failures:
+        print(f'⚠️  {len(setup_failures)} usuário(s) virtual(is) não conseguiram se cadastrar/logar')
+    return recorder.summary(measured)
+
+
+def start_server(workers, threads):
+    """Sobe python -m src.serve com banco temporário e espera o health check"""
+    tmp = tempfile.mkdtemp(prefix='capivara-load-')
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+
+    env = dict(os.environ)
+    env.update({
+        'PORT': str(port),
+        'DATABASE_URL': f"sqlite:///{os.path.join(tmp, 'load.db')}",
+        'WEB_CONCURRENCY': str(workers),
+        'GUNICORN_THREADS': str(threads),
+        'GUNICORN_ACCESS_LOG': os.devnull,
+        # Todos os usuários virtuais vêm do mesmo IP
+        'RATE_LIMIT_ENABLED': 'false',
+        'METRICS_DIR': os.path.join(tmp, 'metrics')
+    })
+    log = open(os.path.join(tmp, 'server.log'), 'w')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'src.serve'], cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+
+    base_url = f'http://127.0.0.1:{port}'
+    client = Client(base_url)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f'o servidor encerrou na inicialização; veja {log.name}')
+        try:
+            if client.request('GET', '/api/utils/health')[0] == 200:
+                return process, base_url
+        except OSError:
+            client.connection = None
+        time.sleep(0.2)
+
+    process.terminate()
+    raise SystemExit(f'o servidor não respondeu em 60s; veja {log.name}')
+
+
+def compare(result, baseline, tolerance):
+    """Compara o p95 por endpoint e o RPS total com a baseline; retorna as regressões
+
+    Em carga fechada (cada usuário espera a resposta antes de seguir) o RPS de
+    um endpoint é só a fração da mistura aplicada ao total, por isso apenas o
+    RPS total é comparado.
+    """
+    if baseline.get('config', {}).get('mix') != result['config']['mix']:
+        print('⚠️  A mistura de operações difere da baseline; a comparação pode não ser significativa')
+
+    regressions = []
+    print(f"\n{'endpoint':<14}{'p95 base':>10}{'p95 agora':>11}{'Δ p95':>9}")
+    for name, current in result['endpoints'].items():
+        previous = baseline['endpoints'].get(name)
+        if previous is None or not previous['p95_ms']:
+            continue
+        delta = (current['p95_ms'] - previous['p95_ms']) / previous['p95_ms']
+        print(f"{name:<14}{previous['p95_ms']:>10.2f}{current['p95_ms']:>11.2f}{delta:>+9.1%}")
+        if delta > tolerance:
+            regressions.append(f'{name}: p95 {delta:+.1%}')
+
+    delta = (result['rps'] - baseline['rps']) / baseline['rps'] if baseline['rps'] else 0.0
+    print(f"{'rps total':<14}{baseline['rps']:>10.2f}{result['rps']:>11.2f}{delta:>+9.1%}")
+    if delta < -tolerance:
+        regressions.append(f'rps total {delta:+.1%}')
+    return regressions
+
+
+def print_report(result):
+    print(f"\n{'endpoint':<14}{'reqs':>8}{'erros':>7}{'rps':>9}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}{'max (ms)':>10}")
+    for name, item in result['endpoints'].items():
+        print(f"{name:<14}{item['requests']:>8}{item['errors']:>7}{item['rps']:>9.2f}"
+              f"{item['p50_ms']:>10.2f}{item['p95_ms']:>10.2f}{item['p99_ms']:>10.2f}{item['max_ms']:>10.2f}")
+    print(f"{'total':<14}{result['total_requests']:>8}{result['total_errors']:>7}{result['rps']:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='servidor já rodando (por padrão sobe um local)')
+    parser.add_argument('--concurrency', type=int, default=8, help='usuários virtuais simultâneos')
+    parser.add_argument('--duration', type=float, default=30, help='segundos de medição')
+    parser.add_argument('--warmup', type=float, default=5, help='segundos antes de começar a medir')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'pesos das operações (padrão: {DEFAULT_MIX})')
+    parser.add_argument('--workers', type=int, default=2, help='workers do gunicorn (servidor local)')
+    parser.add_argument('--threads', type=int, default=4, help='threads por worker (servidor local)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--save-baseline', metavar='ARQUIVO', help='grava o resultado como baseline (JSON)')
+    parser.add_argument('--compare', metavar='ARQUIVO', help='compara com uma baseline gravada')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='piora aceita na comparação (padrão 20%%)')
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    process = None
+    base_url = args.url
+    if base_url is None:
+        process, base_url = start_server(args.workers, args.threads)
+
+    try:
+        print(f'🚀 {args.concurrency} usuários virtuais por {args.duration:.0f}s contra {base_url}')
+        result = run_load(base_url, args.concurrency, args.duration, args.warmup, mix, args.seed)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    result['config'] = {
+        'concurrency': args.concurrency,
+        'duration': args.duration,
+        'warmup': args.warmup,
+        'mix': mix,
+        'server': 'external' if args.url else f'gunicorn {args.workers}x{args.threads}',
+        'seed': args.seed
+    }
+    result['environment'] = {
+        'date': datetime.utcnow().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count()
+    }
+    print_report(result)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, 'w') as f:
+            json.dump(result, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'\n💾 Baseline gravada em {args.save_baseline}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance)
+        if regressions:
+            print('\n❌ Regressões acima da tolerância: ' + '; '.join(regressions))
+            return 1
+        print('\n✅ Sem regressões acima da tolerância')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Benchmark do caminho de escrita do login: vários commits, uma transação ou fila write-behind
+
+Compara, em várias threads e nos dois perfis do SQLite (padrão e tuned):
+
+- ``legado``: a sessão é confirmada em um commit e as preferências em outro,
+  sempre com UPDATE de ``remember_me`` (mesmo sem mudança);
+- ``transação única``: sessão, contador e preferências em um commit, com o
+  UPDATE de preferências apenas quando ``remember_me`` muda;
+- ``write-behind``: como ``SESSION_WRITE_BEHIND=true``. A sessão vai para
+  uma fila gravada em lotes a cada ``--flush-interval-ms``, e o login só faz
+  commit quando as preferências mudam.
+
+Conta commits por login (eventos do engine) e estima fsyncs: no perfil
+padrão (journal DELETE, synchronous=FULL) cada commit sincroniza o journal e
+o banco; no tuned (WAL, synchronous=NORMAL) o fsync fica para os
+checkpoints, e o ganho vem de adquirir o lock de escrita uma vez só. O
+bcrypt fica de fora para isolar o custo do banco.
+
+Uso:
+    python benchmarks/bench_login_transaction.py --threads 8 --logins 200
+"""
+import argparse
+import functools
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, select, insert, update
+from sqlalchemy.exc import OperationalError
+from src.models.user import User, UserSession, UserPreferences
+from src.models.stats import ApiCounter
+from src.utils.counters import SESSIONS_ACTIVE
+
+from bench_sqlite_concurrency import build_engine, seed
+
+
+# fsyncs por commit: journal + banco no modo DELETE/FULL; WAL/NORMAL só no checkpoint
+FSYNCS_PER_COMMIT = {'padrão': 2, 'tuned': 0}
+
+
+def _insert_session(conn, user_id):
+    conn.execute(insert(UserSession).values(
+        user_id=user_id,
+        token_hash=uuid.uuid4().hex,
+        expires_at=datetime.utcnow() + timedelta(hours=1),
+        created_at=datetime.utcnow(),
+        is_active=True
+    ))
+    conn.execute(update(ApiCounter).where(ApiCounter.name == SESSIONS_ACTIVE).values(
+        value=ApiCounter.value + 1
+    ))
+
+
+def legacy_login(engine, username, remember_me):
+    with engine.connect() as conn:
+        user_id = conn.execute(select(User.id).where(User.username == username)).scalar_one()
+        _insert_session(conn, user_id)
+        conn.commit()
+
+        conn.execute(update(UserPreferences).where(UserPreferences.user_id == user_id).values(
+            remember_me=remember_me, updated_at=datetime.utcnow()
+        ))
+        conn.commit()
+
+
+def single_transaction_login(engine, username, remember_me):
+    with engine.begin() as conn:
+        user_id, current = conn.execute(
+            select(User.id, UserPreferences.remember_me)
+            .join(UserPreferences, UserPreferences.user_id == User.id)
+            .where(User.username == username)
+        ).one()
+        _insert_session(conn, user_id)
+        if current != remember_me:
+            conn.execute(update(UserPreferences).where(UserPreferences.user_id == user_id).values(
+                remember_me=remember_me, updated_at=datetime.utcnow()
+            ))
+
+
+class BatchWriter:
+    """Fila write-behind simplificada (mesma estratégia do SessionWriter)"""
+
+    def __init__(self, engine, interval, batch_size=100):
+        self.engine = engine
+        self.interval = interval
+        self.batch_size = batch_size
+        self._pending = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def add(self, record):
+        with self._lock:
+            self._pending.append(record)
+
+    def drain(self):
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+
+    def flush(self):
+        while True:
+            with self._lock:
+                batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+            if not batch:
+                return
+            with self.engine.begin() as conn:
+                conn.execute(insert(UserSession).values(batch))
+                conn.execute(update(ApiCounter).where(ApiCounter.name == SESSIONS_ACTIVE).values(
+                    value=ApiCounter.value + len(batch)
+                ))
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+
+def write_behind_login(engine, username, remember_me, writer):
+    with engine.connect() as conn:
+        user_id, current = conn.execute(
+            select(User.id, UserPreferences.remember_me)
+            .join(UserPreferences, UserPreferences.user_id == User.id)
+            .where(User.username == username)
+        ).one()
+        if current != remember_me:
+            conn.execute(update(UserPreferences).where(UserPreferences.user_id == user_id).values(
+                remember_me=remember_me, updated_at=datetime.utcnow()
+            ))
+            conn.commit()
+        else:
+            conn.rollback()  # só leitura: encerra sem commit
+
+    writer.add({
+        'user_id': user_id,
+        'token_hash': uuid.uuid4().hex,
+        'expires_at': datetime.utcnow() + timedelta(hours=1),
+        'created_at': datetime.utcnow(),
+        'is_active': True
+    })
+
+
+def run(tuned, login, threads, logins, users, flush_interval):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(os.path.join(tmp, 'bench.db'), tuned)
+        seed(engine, users)
+        with engine.begin() as conn:
+            conn.execute(insert(ApiCounter).values(name=SESSIONS_ACTIVE, value=0))
+
+        commits = [0]
+        ok = [0]
+        errors = [0]
+        lock = threading.Lock()
+
+        def count_commit(conn):
+            with lock:
+                commits[0] += 1
+        event.listen(engine, 'commit', count_commit)
+
+        writer = None
+        if login is write_behind_login:
+            writer = BatchWriter(engine, flush_interval)
+            login = functools.partial(write_behind_login, writer=writer)
+
+        def worker(index):
+            for i in range(logins):
+                user = (index * logins + i) % users
+                try:
+                    # Cada usuário mantém a mesma escolha de "lembrar de mim"
+                    login(engine, f'user{user}', user % 4 == 0)
+                    with lock:
+                        ok[0] += 1
+                except OperationalError:
+                    with lock:
+                        errors[0] += 1
+
+        pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        started = time.perf_counter()
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        if writer is not None:
+            # O tempo inclui gravar o que ficou na fila
+            writer.drain()
+        elapsed = time.perf_counter() - started
+        engine.dispose()
+
+    return {
+        'logins_per_sec': ok[0] / elapsed,
+        'commits_per_login': commits[0] / ok[0] if ok[0] else 0.0,
+        'locked_errors': errors[0]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--logins', type=int, default=200, help='logins por thread')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--flush-interval-ms', type=float, default=50, help='intervalo da fila write-behind')
+    args = parser.parse_args()
+
+    print('| perfil | caminho          | logins/s | commits/login | fsyncs/login (est.) | locked |')
+    print('|--------|------------------|---------:|--------------:|--------------------:|-------:|')
+    for profile, tuned in (('padrão', False), ('tuned', True)):
+        paths = (('legado', legacy_login), ('transação única', single_transaction_login),
+                 ('write-behind', write_behind_login))
+        for name, login in paths:
+            result = run(tuned, login, args.threads, args.logins, args.users, args.flush_interval_ms / 1000)
+            fsyncs = result['commits_per_login'] * FSYNCS_PER_COMMIT[profile]
+            print(f"| {profile:<6} | {name:<16} | {result['logins_per_sec']:>8.1f} "
+                  f"| {result['commits_per_login']:>13.2f} | {fsyncs:>19.2f} | {result['locked_errors']:>6} |")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark das consultas quentes de user_sessions com e sem índices
+
+Cria um banco SQLite temporário com N sessões, mede as consultas usadas por
+cleanup_expired_sessions, revoke_user_session, get_user_stats e
+GET /api/user/sessions, aplica os índices via ensure_indexes e mede de novo.
+
+Uso:
+    python benchmarks/bench_session_indexes.py --rows 1000000 --users 10000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, select, func, inspect, text
+from src.models.user import db, UserSession
+from src.models.migrations import ensure_indexes
+
+
+def populate(path, rows, users):
+    """Insere usuários e sessões diretamente via sqlite3 (rápido)"""
+    now = datetime.utcnow()
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO users (id, username, email, password_hash, created_at, updated_at, is_active) "
+        "VALUES (?, ?, ?, 'x', ?, ?, 1)",
+        ((i, f'user{i}', f'user{i}@example.com', now, now) for i in range(1, users + 1))
+    )
+
+    def sessions():
+        for i in range(1, rows + 1):
+            created_at = now - timedelta(seconds=random.randint(0, 30 * 24 * 3600))
+            expires_at = created_at + timedelta(hours=random.choice((1, 1, 1, 168)))
+            yield (
+                random.randint(1, users), f'{i:064x}', expires_at, created_at,
+                1 if random.random() < 0.9 else 0
+            )
+
+    conn.executemany(
+        "INSERT INTO user_sessions (user_id, token_hash, expires_at, created_at, is_active) "
+        "VALUES (?, ?, ?, ?, ?)",
+        sessions()
+    )
+    conn.commit()
+    conn.close()
+
+
+def queries(users, rows):
+    now = datetime.utcnow()
+    user_id = random.randint(1, users)
+    token_hash = f'{random.randint(1, rows):064x}'
+    return {
+        'cleanup (user)': select(UserSession.id).where(
+            UserSession.expires_at < now, UserSession.user_id == user_id
+        ),
+        'cleanup (all, count)': select(func.count()).select_from(UserSession).where(
+            UserSession.expires_at < now - timedelta(days=29)
+        ),
+        'revoke_user_session': select(UserSession.id).where(
+            UserSession.user_id == user_id, UserSession.token_hash == token_hash
+        ),
+        'stats: total_logins': select(func.count()).select_from(UserSession).where(
+            UserSession.user_id == user_id
+        ),
+        'stats: last_session': select(UserSession.created_at).where(
+            UserSession.user_id == user_id
+        ).order_by(UserSession.created_at.desc()).limit(1),
+        'stats/sessions: active': select(UserSession.id).where(
+            UserSession.user_id == user_id,
+            UserSession.is_active == True,  # noqa: E712
+            UserSession.expires_at > now
+        ),
+    }
+
+
+def measure(engine, users, rows, repeat):
+    results = {}
+    with engine.connect() as conn:
+        for _ in range(repeat):
+            for name, query in queries(users, rows).items():
+                started = time.perf_counter()
+                conn.execute(query).all()
+                results.setdefault(name, []).append((time.perf_counter() - started) * 1000)
+    return {name: statistics.median(samples) for name, samples in results.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    random.seed(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        engine = create_engine(f'sqlite:///{path}')
+
+        db.metadata.create_all(engine)
+        with engine.begin() as conn:
+            for table in db.metadata.sorted_tables:
+                for index in table.indexes:
+                    conn.execute(text(f'DROP INDEX IF EXISTS {index.name}'))
+
+        started = time.perf_counter()
+        populate(path, args.rows, args.users)
+        print(f"📦 {args.rows:,} sessões / {args.users:,} usuários inseridos em {time.perf_counter() - started:.1f}s")
+
+        before = measure(engine, args.users, args.rows, args.repeat)
+
+        started = time.perf_counter()
+        created = ensure_indexes(engine)
+        with engine.begin() as conn:
+            conn.execute(text('ANALYZE'))
+        print(f"🔧 {len(created)} índices criados em {time.perf_counter() - started:.1f}s")
+        assert len(inspect(engine).get_indexes('user_sessions')) >= 4
+
+        after = measure(engine, args.users, args.rows, args.repeat)
+
+    print(f"\n{'consulta':<26}{'sem índices (ms)':>18}{'com índices (ms)':>18}{'ganho':>10}")
+    for name in before:
+        speedup = before[name] / after[name] if after[name] else float('inf')
+        print(f"{name:<26}{before[name]:>18.3f}{after[name]:>18.3f}{speedup:>9.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark de concorrência do SQLite: perfil padrão vs. perfil de performance
+
+Simula o caminho de escrita do login (busca o usuário, insere a sessão,
+atualiza preferências, commit) em várias threads, primeiro com o engine
+padrão do SQLAlchemy e depois com o perfil de src/models/database.py
+(WAL, synchronous=NORMAL, busy_timeout, cache/mmap, pool configurado).
+O bcrypt fica de fora para isolar o custo do banco.
+
+Uso:
+    python benchmarks/bench_sqlite_concurrency.py --threads 8 --logins 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, select, insert, update
+from sqlalchemy.exc import OperationalError
+from src.models.user import db, User, UserSession, UserPreferences
+from src.models.database import engine_options, sqlite_pragmas, apply_sqlite_pragmas
+
+
+def build_engine(path, tuned):
+    uri = f'sqlite:///{path}'
+    if not tuned:
+        return create_engine(uri)
+
+    config = {'SQLALCHEMY_DATABASE_URI': uri}
+    engine = create_engine(uri, **engine_options(config))
+    apply_sqlite_pragmas(engine, sqlite_pragmas(config))
+    return engine
+
+
+def seed(engine, users):
+    db.metadata.create_all(engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {'username': f'user{i}', 'email': f'user{i}@example.com', 'password_hash': 'x',
+             'created_at': now, 'updated_at': now, 'is_active': True}
+            for i in range(users)
+        ])
+        conn.execute(insert(UserPreferences), [
+            {'user_id': i + 1, 'updated_at': now} for i in range(users)
+        ])
+
+
+def login(engine, username):
+    with engine.begin() as conn:
+        user_id = conn.execute(select(User.id).where(User.username == username)).scalar_one()
+        conn.execute(insert(UserSession).values(
+            user_id=user_id,
+            token_hash=uuid.uuid4().hex,
+            expires_at=datetime.utcnow() + timedelta(hours=1),
+            created_at=datetime.utcnow(),
+            is_active=True
+        ))
+        conn.execute(update(UserPreferences).where(UserPreferences.user_id == user_id).values(
+            remember_me=True, updated_at=datetime.utcnow()
+        ))
+
+
+def run(tuned, threads, logins, users):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        engine = build_engine(path, tuned)
+        seed(engine, users)
+
+        ok = [0]
+        errors = [0]
+        lock = threading.Lock()
+
+        def worker(index):
+            for i in range(logins):
+                try:
+                    login(engine, f'user{(index * logins + i) % users}')
+                    with lock:
+                        ok[0] += 1
+                except OperationalError:
+                    with lock:
+                        errors[0] += 1
+
+        pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        started = time.perf_counter()
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        engine.dispose()
+
+    return {'logins_per_sec': ok[0] / elapsed, 'ok': ok[0], 'locked_errors': errors[0], 'elapsed': elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--logins', type=int, default=200, help='logins por thread')
+    parser.add_argument('--users', type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'perfil':<10}{'logins/s':>12}{'ok':>8}{'locked':>8}{'tempo (s)':>12}")
+    for name, tuned in (('padrão', False), ('tuned', True)):
+        result = run(tuned, args.threads, args.logins, args.users)
+        print(f"{name:<10}{result['logins_per_sec']:>12.1f}{result['ok']:>8}"
+              f"{result['locked_errors']:>8}{result['elapsed']:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
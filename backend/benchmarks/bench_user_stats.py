@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark de get_user_stats: 3 consultas (versão antiga) vs. consulta agregada vs. cache
+
+Popula um banco SQLite temporário (com os índices dos modelos) com usuários
+que têm quantidades realistas de sessões e mede a latência por chamada.
+
+Uso:
+    python benchmarks/bench_user_stats.py --sessions 10 100 1000 --calls 500
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp = tempfile.mkdtemp(prefix='capivara-bench-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_tmp, 'bench.db')}"
+os.environ.setdefault('SESSION_REAPER_ENABLED', 'false')
+# Sem pool de hashing e com custo mínimo: o benchmark não mede o bcrypt
+os.environ.setdefault('PASSWORD_HASH_EXECUTOR', 'inline')
+os.environ.setdefault('BCRYPT_ROUNDS', '4')
+
+from sqlalchemy import insert
+from src.main import create_app
+from src.models.user import db, User, UserSession
+from src.utils.auth_utils import get_user_stats
+from src.utils.cache import stats_cache
+
+
+def legacy_user_stats(user):
+    """Implementação anterior: três consultas por chamada"""
+    total_logins = UserSession.query.filter_by(user_id=user.id).count()
+    last_session = UserSession.query.filter_by(
+        user_id=user.id
+    ).order_by(UserSession.created_at.desc()).first()
+    active_sessions = UserSession.query.filter_by(
+        user_id=user.id,
+        is_active=True
+    ).filter(UserSession.expires_at > datetime.utcnow()).count()
+    return {
+        'total_logins': total_logins,
+        'last_login': last_session.created_at if last_session else None,
+        'account_age_days': (datetime.utcnow() - user.created_at).days,
+        'sessions_count': active_sessions
+    }
+
+
+def populate(sessions_per_user, users=200):
+    now = datetime.utcnow()
+    created = []
+    for i in range(users):
+        user = User(username=f'u{sessions_per_user}_{i}', email=f'u{sessions_per_user}_{i}@example.com', password_hash='x')
+        db.session.add(user)
+        created.append(user)
+    db.session.flush()
+
+    rows = []
+    for user in created:
+        for n in range(sessions_per_user):
+            created_at = now - timedelta(minutes=random.randint(0, 60 * 24 * 30))
+            rows.append({
+                'user_id': user.id,
+                'token_hash': f'{user.id}-{n}-{random.random()}',
+                'created_at': created_at,
+                'expires_at': created_at + timedelta(hours=random.choice((1, 168))),
+                'is_active': random.random() < 0.9
+            })
+    db.session.execute(insert(UserSession), rows)
+    db.session.commit()
+    return created
+
+
+def measure(func, users, calls):
+    samples = []
+    for _ in range(calls):
+        user = random.choice(users)
+        started = time.perf_counter()
+        func(user)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--calls', type=int, default=500)
+    args = parser.parse_args()
+
+    app = create_app()
+    random.seed(42)
+    print(f"{'sessões/usuário':<17}{'variante':<12}{'p50 (ms)':>10}{'p95 (ms)':>10}")
+    with app.app_context():
+        for sessions_per_user in args.sessions:
+            users = populate(sessions_per_user)
+
+            stats_cache.configure(ttl=0)
+            variants = [
+                ('3 consultas', legacy_user_stats),
+                ('agregada', get_user_stats),
+            ]
+            for name, func in variants:
+                p50, p95 = measure(func, users, args.calls)
+                print(f"{sessions_per_user:<17}{name:<12}{p50:>10.3f}{p95:>10.3f}")
+
+            stats_cache.configure(ttl=60)
+            for user in users:
+                get_user_stats(user)
+            p50, p95 = measure(get_user_stats, users, args.calls)
+            print(f"{sessions_per_user:<17}{'cache':<12}{p50:>10.3f}{p95:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
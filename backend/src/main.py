@@ -3,7 +3,7 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory, jsonify
+from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from dotenv import load_dotenv
@@ -13,9 +13,25 @@ load_dotenv()
 
 # Importar modelos e rotas
 from src.models.user import db
+from src.models.migrations import run_migrations
+from src.models.database import engine_options, configure_engine, normalize_database_url, read_bind, READ_BIND
+from src.utils.password_hasher import password_hasher
+from src.utils.cache import user_cache, stats_cache
+from src.utils.revocation import revocation_index
+from src.utils.availability import availability_index
+from src.utils.auth_utils import is_token_revoked
+from src.utils.maintenance import session_reaper
+from src.utils.session_writer import session_writer
+from src.utils.http_cache import conditional_responses
+from src.utils.static_assets import static_assets
+from src.utils.profiling import request_profiler
+from src.utils.metrics import metrics
+from src.utils.rate_limit import login_rate_limiter, availability_rate_limiter
+from src.utils.counters import seed_counters, record_signup
 from src.routes.user import user_bp
 from src.routes.auth import auth_bp
 from src.routes.utils import utils_bp
+from src.routes.metrics import metrics_bp
 
 def create_app():
     """Factory function para criar a aplicação Flask"""
@@ -25,14 +41,144 @@ def create_app():
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'capivara-ai-super-secret-key-2024')
     app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key-capivara-ai-2024')
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = int(os.getenv('JWT_ACCESS_TOKEN_EXPIRES', 3600))
+    app.config['ADMIN_USERNAMES'] = tuple(
+        name.strip() for name in os.getenv('ADMIN_USERNAMES', 'admin').split(',') if name.strip()
+    )
+    
+    # Servidor HTTP em uso (sobrescrito por src/serve.py em produção)
+    app.config['SERVER'] = {
+        'mode': 'development',
+        'software': 'werkzeug'
+    }
     
-    # Configuração do banco de dados
-    database_path = os.path.join(os.path.dirname(__file__), 'database', 'app.db')
-    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{database_path}"
+    # Configuração do banco de dados (DATABASE_URL ou SQLite local)
+    database_url = os.getenv('DATABASE_URL')
+    if database_url:
+        app.config['SQLALCHEMY_DATABASE_URI'] = normalize_database_url(database_url)
+    else:
+        database_path = os.path.join(os.path.dirname(__file__), 'database', 'app.db')
+        os.makedirs(os.path.dirname(database_path), exist_ok=True)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{database_path}"
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     
+    # Perfil de performance do SQLite (PRAGMAs aplicados a cada conexão)
+    app.config['SQLITE_JOURNAL_MODE'] = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    app.config['SQLITE_SYNCHRONOUS'] = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    app.config['SQLITE_BUSY_TIMEOUT'] = int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000))
+    app.config['SQLITE_CACHE_SIZE'] = int(os.getenv('SQLITE_CACHE_SIZE', -20000))
+    app.config['SQLITE_MMAP_SIZE'] = int(os.getenv('SQLITE_MMAP_SIZE', 268435456))
+    app.config['SQLITE_TEMP_STORE'] = os.getenv('SQLITE_TEMP_STORE', 'MEMORY')
+    app.config['SQLITE_FOREIGN_KEYS'] = os.getenv('SQLITE_FOREIGN_KEYS', 'ON')
+    
+    # Pool de conexões (por processo/worker; pre-ping/recycle só para servidores remotos)
+    app.config['DB_POOL_SIZE'] = int(os.getenv('DB_POOL_SIZE', 5))
+    app.config['DB_MAX_OVERFLOW'] = int(os.getenv('DB_MAX_OVERFLOW', 10))
+    app.config['DB_POOL_TIMEOUT'] = float(os.getenv('DB_POOL_TIMEOUT', 30))
+    app.config['DB_POOL_PRE_PING'] = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    app.config['DB_POOL_RECYCLE'] = int(os.getenv('DB_POOL_RECYCLE', 1800))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+    
+    # Roteamento de leitura: GET em engine somente leitura (réplica ou SQLite mode=ro)
+    app.config['DB_READ_ROUTING'] = os.getenv('DB_READ_ROUTING', 'auto').lower()
+    replica_url = os.getenv('DATABASE_REPLICA_URL')
+    app.config['DATABASE_REPLICA_URL'] = normalize_database_url(replica_url) if replica_url else None
+    read = read_bind(app.config)
+    app.config['SQLALCHEMY_BINDS'] = {READ_BIND: read} if read else {}
+    
+    # Pool de hashing de senhas (bcrypt fora da thread da requisição)
+    app.config['PASSWORD_HASH_EXECUTOR'] = os.getenv('PASSWORD_HASH_EXECUTOR', 'process')
+    app.config['PASSWORD_HASH_WORKERS'] = int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+    app.config['PASSWORD_HASH_MAX_PENDING'] = int(os.getenv(
+        'PASSWORD_HASH_MAX_PENDING', app.config['PASSWORD_HASH_WORKERS'] * 8
+    ))
+    app.config['PASSWORD_HASH_TIMEOUT'] = float(os.getenv('PASSWORD_HASH_TIMEOUT', 30))
+    app.config['PASSWORD_HASH_RETRY_AFTER'] = int(os.getenv('PASSWORD_HASH_RETRY_AFTER', 1))
+    
+    # Custo do bcrypt: número fixo (padrão 12) ou 'auto' para calibrar na
+    # inicialização até BCRYPT_TARGET_MS por hash; hashes com outro custo são
+    # regravados no próximo login bem-sucedido
+    app.config['BCRYPT_ROUNDS'] = os.getenv('BCRYPT_ROUNDS', '12')
+    app.config['BCRYPT_TARGET_MS'] = float(os.getenv('BCRYPT_TARGET_MS', 250))
+    
+    # Cache de usuários autenticados (snapshot por id, TTL + LRU)
+    app.config['USER_CACHE_TTL'] = float(os.getenv('USER_CACHE_TTL', 30))
+    app.config['USER_CACHE_MAX_SIZE'] = int(os.getenv('USER_CACHE_MAX_SIZE', 10000))
+    
+    # Cache dos contadores de sessão por usuário (/api/user/profile e /stats)
+    app.config['STATS_CACHE_TTL'] = float(os.getenv('STATS_CACHE_TTL', 60))
+    app.config['STATS_CACHE_MAX_SIZE'] = int(os.getenv('STATS_CACHE_MAX_SIZE', 10000))
+    
+    # Respostas condicionais (ETag / 304) nos GETs somente leitura
+    app.config['HTTP_CACHE_ENABLED'] = os.getenv('HTTP_CACHE_ENABLED', 'true').lower() == 'true'
+    app.config['API_INFO_MAX_AGE'] = int(os.getenv('API_INFO_MAX_AGE', 300))
+    
+    # Arquivos estáticos (manifest em memória, variantes gzip/brotli)
+    app.config['STATIC_MEMORY_MAX_SIZE'] = int(os.getenv('STATIC_MEMORY_MAX_SIZE', 256 * 1024))
+    app.config['STATIC_COMPRESS_MIN_SIZE'] = int(os.getenv('STATIC_COMPRESS_MIN_SIZE', 512))
+    app.config['STATIC_IMMUTABLE_MAX_AGE'] = int(os.getenv('STATIC_IMMUTABLE_MAX_AGE', 31536000))
+    app.config['STATIC_AUTO_RELOAD'] = os.getenv('STATIC_AUTO_RELOAD', 'false').lower() == 'true'
+    
+    # Instrumentação de requisições (opcional; relatório em /api/utils/metrics)
+    app.config['PROFILING_ENABLED'] = os.getenv('PROFILING_ENABLED', 'false').lower() == 'true'
+    app.config['PROFILING_SLOW_MS'] = float(os.getenv('PROFILING_SLOW_MS', 500))
+    app.config['PROFILING_SAMPLE_RATE'] = float(os.getenv('PROFILING_SAMPLE_RATE', 0.01))
+    app.config['PROFILING_MAX_SAMPLES'] = int(os.getenv('PROFILING_MAX_SAMPLES', 20))
+    
+    # Métricas Prometheus em /metrics (METRICS_DIR agrega vários workers)
+    app.config['METRICS_DIR'] = os.getenv('METRICS_DIR')
+    app.config['METRICS_FLUSH_INTERVAL'] = float(os.getenv('METRICS_FLUSH_INTERVAL', 5))
+    app.config['METRICS_TOKEN'] = os.getenv('METRICS_TOKEN')
+    
+    # Limite de tentativas de login (token bucket local; compartilhado opcional)
+    app.config['RATE_LIMIT_ENABLED'] = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    app.config['RATE_LIMIT_LOGIN_IP'] = os.getenv('RATE_LIMIT_LOGIN_IP', '20/60')
+    app.config['RATE_LIMIT_LOGIN_IDENTIFIER'] = os.getenv('RATE_LIMIT_LOGIN_IDENTIFIER', '5/60')
+    app.config['RATE_LIMIT_AVAILABILITY_IP'] = os.getenv('RATE_LIMIT_AVAILABILITY_IP', '60/60')
+    app.config['RATE_LIMIT_MAX_KEYS'] = int(os.getenv('RATE_LIMIT_MAX_KEYS', 100000))
+    app.config['RATE_LIMIT_STORAGE_URL'] = os.getenv('RATE_LIMIT_STORAGE_URL')
+    app.config['TRUSTED_PROXY_COUNT'] = int(os.getenv('TRUSTED_PROXY_COUNT', 1))
+    
+    # Usernames/emails em uso para GET /api/auth/availability (recarga periódica)
+    app.config['AVAILABILITY_SYNC_INTERVAL'] = float(os.getenv('AVAILABILITY_SYNC_INTERVAL', 300))
+    
+    # Índice de revogação de tokens (sincronizado com user_sessions)
+    app.config['REVOCATION_SYNC_INTERVAL'] = float(os.getenv('REVOCATION_SYNC_INTERVAL', 60))
+    app.config['REVOCATION_PRUNE_INTERVAL'] = float(os.getenv('REVOCATION_PRUNE_INTERVAL', 60))
+    
+    # Operações em lote sobre user_sessions (limpeza / revogação em massa)
+    app.config['SESSION_BATCH_SIZE'] = int(os.getenv('SESSION_BATCH_SIZE', 1000))
+    app.config['SESSION_BATCH_PAUSE'] = float(os.getenv('SESSION_BATCH_PAUSE', 0.005))
+    
+    # Agendador de limpeza de sessões expiradas (background, um líder por host)
+    app.config['SESSION_REAPER_ENABLED'] = os.getenv('SESSION_REAPER_ENABLED', 'true').lower() == 'true'
+    app.config['SESSION_REAPER_INTERVAL'] = float(os.getenv('SESSION_REAPER_INTERVAL', 300))
+    app.config['SESSION_REAPER_JITTER'] = float(os.getenv('SESSION_REAPER_JITTER', 30))
+    app.config['SESSION_REAPER_LEASE_TTL'] = os.getenv('SESSION_REAPER_LEASE_TTL')
+    
+    # Gravação write-behind das sessões (INSERTs em lote por uma thread por processo)
+    app.config['SESSION_WRITE_BEHIND'] = os.getenv('SESSION_WRITE_BEHIND', 'false').lower() == 'true'
+    app.config['SESSION_FLUSH_INTERVAL_MS'] = float(os.getenv('SESSION_FLUSH_INTERVAL_MS', 50))
+    app.config['SESSION_FLUSH_BATCH_SIZE'] = int(os.getenv('SESSION_FLUSH_BATCH_SIZE', 100))
+    app.config['SESSION_QUEUE_MAX'] = int(os.getenv('SESSION_QUEUE_MAX', 10000))
+    
     # Inicializar extensões
     db.init_app(app)
+    password_hasher.init_app(app)
+    user_cache.configure(
+        max_size=app.config['USER_CACHE_MAX_SIZE'],
+        ttl=app.config['USER_CACHE_TTL']
+    )
+    stats_cache.configure(
+        max_size=app.config['STATS_CACHE_MAX_SIZE'],
+        ttl=app.config['STATS_CACHE_TTL']
+    )
+    conditional_responses.init_app(app)
+    static_assets.init_app(app)
+    login_rate_limiter.init_app(app, {
+        'ip': app.config['RATE_LIMIT_LOGIN_IP'],
+        'identifier': app.config['RATE_LIMIT_LOGIN_IDENTIFIER']
+    })
+    availability_rate_limiter.init_app(app, {'ip': app.config['RATE_LIMIT_AVAILABILITY_IP']})
     jwt = JWTManager(app)
     
     # Configurar CORS
@@ -43,10 +189,14 @@ def create_app():
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(user_bp, url_prefix='/api/user')
     app.register_blueprint(utils_bp, url_prefix='/api/utils')
+    app.register_blueprint(metrics_bp)
     
     # Criar tabelas do banco
     with app.app_context():
+        configure_engine(app, db)
         db.create_all()
+        run_migrations()
+        seed_counters()
         
         # Criar usuário admin padrão se não existir
         from src.models.user import User, UserPreferences
@@ -63,11 +213,44 @@ def create_app():
             # Criar preferências para o admin
             admin_preferences = UserPreferences(user_id=admin_user.id)
             db.session.add(admin_preferences)
+            record_signup()
             
             db.session.commit()
             print("✅ Usuário admin criado: admin / admin123")
     
+    # Instrumentação (hooks de requisição, banco e hashing)
+    request_profiler.init_app(app, db)
+    metrics.init_app(app)
+    
+    # Carregar sessões revogadas para o índice em memória
+    revocation_index.init_app(app)
+    
+    # Usernames/emails em uso (respostas negativas de disponibilidade sem banco)
+    availability_index.init_app(app)
+    
+    # Limpeza periódica de sessões (inicia na primeira requisição de cada worker)
+    session_reaper.init_app(app)
+    
+    # Fila write-behind de sessões (opcional)
+    session_writer.init_app(app)
+    
     # Handlers JWT
+    @jwt.user_identity_loader
+    def user_identity_lookup(identity):
+        # PyJWT exige que o claim "sub" seja string
+        return str(identity)
+    
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(jwt_header, jwt_payload):
+        return is_token_revoked(jwt_payload)
+    
+    @jwt.revoked_token_loader
+    def revoked_token_callback(jwt_header, jwt_payload):
+        return jsonify({
+            'error': 'Token Revoked',
+            'message': 'Token revogado'
+        }), 401
+    
     @jwt.expired_token_loader
     def expired_token_callback(jwt_header, jwt_payload):
         return jsonify({
@@ -106,23 +289,22 @@ def create_app():
                 }
             }), 200
 
-        if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-            return send_from_directory(static_folder_path, path)
-        else:
-            index_path = os.path.join(static_folder_path, 'index.html')
-            if os.path.exists(index_path):
-                return send_from_directory(static_folder_path, 'index.html')
-            else:
-                return jsonify({
-                    'message': 'Capivara AI Backend API',
-                    'version': '1.0.0',
-                    'status': 'running',
-                    'endpoints': {
-                        'auth': '/api/auth/*',
-                        'user': '/api/user/*',
-                        'utils': '/api/utils/*'
-                    }
-                }), 200
+        # Manifest montado na inicialização: sem acesso ao disco por requisição
+        asset = static_assets.get(path) if path != "" else None
+        if asset is None:
+            asset = static_assets.get('index.html')
+        if asset is not None:
+            return static_assets.send(asset)
+        return jsonify({
+            'message': 'Capivara AI Backend API',
+            'version': '1.0.0',
+            'status': 'running',
+            'endpoints': {
+                'auth': '/api/auth/*',
+                'user': '/api/user/*',
+                'utils': '/api/utils/*'
+            }
+        }), 200
     
     # Handler global de erro
     @app.errorhandler(404)
@@ -147,10 +329,25 @@ def create_app():
     
     return app
 
-# Criar aplicação
-app = create_app()
+
+def __getattr__(name):
+    """``from src.main import app`` cria o app no primeiro acesso
+
+    Importar o módulo não cria o app: os processos do pool de hashing
+    (spawn) reimportam o script de entrada como __mp_main__, e um script
+    que importa src.main não pode criar um app (nem o admin, cujo hash iria
+    para o próprio pool) em cada um deles.
+    """
+    if name == 'app':
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
 
 if __name__ == '__main__':
+    app = create_app()
+    
     print("🚀 Iniciando Capivara AI Backend...")
     print("📍 Endpoints disponíveis:")
     print("   • POST /api/auth/register - Cadastro")
@@ -160,6 +357,7 @@ if __name__ == '__main__':
     print("   • GET /api/utils/info - Informações da API")
     print("🌐 CORS habilitado para:", os.getenv('CORS_ORIGINS', 'http://localhost:3000'))
     print("👤 Usuário padrão: admin / admin123")
+    print("⚠️  Servidor de desenvolvimento; em produção use: python -m src.serve")
     
     app.run(
         host='0.0.0.0', 
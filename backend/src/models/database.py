@@ -0,0 +1,180 @@
+from functools import wraps
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+# Perfil de performance aplicado a cada conexão SQLite
+SQLITE_PRAGMA_DEFAULTS = {
+    'journal_mode': 'WAL',        # leitores não bloqueiam o escritor (e vice-versa)
+    'synchronous': 'NORMAL',      # seguro com WAL; fsync apenas nos checkpoints
+    'busy_timeout': 5000,         # ms aguardando o lock de escrita antes de falhar
+    'cache_size': -20000,         # negativo = KiB (~20MB de cache de páginas)
+    'mmap_size': 268435456,       # 256MB de leitura via mmap
+    'temp_store': 'MEMORY',
+    'foreign_keys': 'ON'          # SQLite não valida chaves estrangeiras por padrão
+}
+
+# Bind (SQLALCHEMY_BINDS) do engine somente leitura usado pelas rotas GET
+READ_BIND = 'read'
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def is_sqlite(database_uri):
+    return database_uri.startswith('sqlite')
+
+
+def is_memory_sqlite(database_uri):
+    return ':memory:' in database_uri or database_uri in ('sqlite://', 'sqlite:///')
+
+
+def normalize_database_url(database_url):
+    """Ajusta URLs no formato antigo do Heroku/Railway (postgres://)"""
+    if database_url.startswith('postgres://'):
+        return 'postgresql://' + database_url[len('postgres://'):]
+    return database_url
+
+
+def sqlite_pragmas(config):
+    """Monta os PRAGMAs a partir da configuração (SQLITE_<NOME>)"""
+    pragmas = {}
+    for name, default in SQLITE_PRAGMA_DEFAULTS.items():
+        value = config.get(f'SQLITE_{name.upper()}', default)
+        if value is not None and value != '':
+            pragmas[name] = value
+    return pragmas
+
+
+def engine_options(config):
+    """Opções do engine SQLAlchemy (pool e conexão) para o banco configurado"""
+    database_uri = config['SQLALCHEMY_DATABASE_URI']
+    options = {
+        'pool_size': int(config.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(config.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': float(config.get('DB_POOL_TIMEOUT', 30))
+    }
+
+    if is_sqlite(database_uri):
+        if is_memory_sqlite(database_uri):
+            # Banco em memória: um único banco por conexão, o pool padrão basta
+            return {}
+        busy_timeout = int(sqlite_pragmas(config).get('busy_timeout', 0))
+        options['connect_args'] = {
+            # Timeout do driver (s) alinhado ao busy_timeout (ms)
+            'timeout': busy_timeout / 1000,
+            'check_same_thread': False
+        }
+    else:
+        # Servidor remoto: descarta conexões mortas e recicla as antigas
+        # antes que o servidor/proxy as encerre
+        options['pool_pre_ping'] = bool(config.get('DB_POOL_PRE_PING', True))
+        options['pool_recycle'] = int(config.get('DB_POOL_RECYCLE', 1800))
+
+    return options
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """Executa os PRAGMAs em toda nova conexão do engine"""
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+    return set_sqlite_pragmas
+
+
+def read_bind(config):
+    """Engine somente leitura para SQLALCHEMY_BINDS, ou None sem roteamento
+
+    DB_READ_ROUTING=auto usa a réplica de DATABASE_REPLICA_URL quando
+    definida; sem réplica, um banco SQLite em arquivo no modo WAL ganha um
+    segundo pool com conexões ``mode=ro`` no mesmo arquivo (no WAL leitores
+    não disputam o lock com o escritor). ``true`` força o pool ``mode=ro``
+    mesmo fora do WAL e ``false`` desliga o roteamento.
+    """
+    routing = str(config.get('DB_READ_ROUTING', 'auto')).lower()
+    database_uri = config['SQLALCHEMY_DATABASE_URI']
+    replica_url = config.get('DATABASE_REPLICA_URL')
+
+    if routing == 'false':
+        return None
+    if replica_url:
+        url = normalize_database_url(replica_url)
+    elif is_sqlite(database_uri) and not is_memory_sqlite(database_uri):
+        journal_mode = str(sqlite_pragmas(config).get('journal_mode', '')).upper()
+        if routing == 'auto' and journal_mode != 'WAL':
+            return None
+        url = f"sqlite:///file:{make_url(database_uri).database}?mode=ro&uri=true"
+    else:
+        return None
+
+    return {'url': url, **engine_options({**config, 'SQLALCHEMY_DATABASE_URI': url})}
+
+
+def use_primary():
+    """Faz as leituras do restante da requisição irem ao primário
+
+    Para handlers GET que precisam ler o que acabaram de gravar (ou que a
+    requisição anterior do mesmo cliente gravou, quando a réplica tem atraso).
+    """
+    if has_request_context():
+        g.db_use_primary = True
+
+
+def primary_reads(view):
+    """Decorator: o handler inteiro lê do primário (ver ``use_primary``)"""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        use_primary()
+        return view(*args, **kwargs)
+    return wrapper
+
+
+class RoutingSession(Session):
+    """Sessão que envia as leituras das requisições GET ao engine ``read``
+
+    Escritas (flush do ORM e INSERT/UPDATE/DELETE explícitos) vão sempre ao
+    primário e fixam nele o restante da requisição, que assim lê as próprias
+    escritas. Fora de uma requisição (inicialização, threads de manutenção,
+    CLI) tudo usa o primário.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._reads_from_replica(clause):
+            engine = self._db.engines.get(READ_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _reads_from_replica(self, clause):
+        if not has_request_context() or request.method not in READ_METHODS or g.get('db_use_primary'):
+            return False
+        if self._flushing or getattr(clause, 'is_dml', False):
+            use_primary()
+            return False
+        return True
+
+
+def configure_engine(app, db):
+    """Aplica o perfil de performance aos engines do app (dentro do app context)"""
+    if is_sqlite(app.config['SQLALCHEMY_DATABASE_URI']):
+        pragmas = sqlite_pragmas(app.config)
+        apply_sqlite_pragmas(db.engine, pragmas)
+        app.extensions['sqlite_pragmas'] = pragmas
+
+    read_engine = db.engines.get(READ_BIND)
+    if read_engine is not None and read_engine.dialect.name == 'sqlite':
+        # journal_mode é do arquivo (definido pelo primário); conexões mode=ro não o alteram
+        read_pragmas = {name: value for name, value in sqlite_pragmas(app.config).items() if name != 'journal_mode'}
+        apply_sqlite_pragmas(read_engine, read_pragmas)
+    app.extensions['read_routing'] = {
+        'enabled': read_engine is not None,
+        'read_engine': read_engine.url.render_as_string(hide_password=True) if read_engine is not None else None
+    }
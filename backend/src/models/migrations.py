@@ -0,0 +1,69 @@
+from datetime import datetime
+from sqlalchemy import inspect, insert, select, literal
+from sqlalchemy.exc import SQLAlchemyError
+from src.models.user import User, UserPreferences, db
+
+
+def ensure_indexes(engine=None):
+    """Cria os índices declarados nos modelos que ainda não existem no banco
+
+    ``db.create_all()`` só cria índices junto com tabelas novas; bancos
+    existentes (ex.: um ``app.db`` antigo) ficariam sem eles. A operação é
+    idempotente e pode rodar a cada inicialização.
+    """
+    engine = engine or db.engine
+    inspector = inspect(engine)
+    created = []
+
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda ix: ix.name):
+            if index.name in existing:
+                continue
+            try:
+                index.create(bind=engine)
+                created.append(index.name)
+            except SQLAlchemyError as e:
+                # Ex.: índice único sobre dados duplicados; não impede o boot
+                print(f"⚠️  Não foi possível criar o índice {index.name}: {e}")
+
+    return created
+
+
+def backfill_user_preferences(engine=None):
+    """Cria a linha de preferências (com os padrões) para usuários que não a têm
+
+    As preferências passaram a ser criadas no cadastro, e as rotas GET não
+    as criam mais sob demanda; usuários antigos recebem a linha aqui, em um
+    único INSERT ... SELECT. Sem usuários pendentes, custa uma consulta.
+    """
+    engine = engine or db.engine
+    columns = UserPreferences.__table__.c
+    missing = select(
+        User.id,
+        literal(columns.theme.default.arg),
+        literal(columns.notifications_enabled.default.arg),
+        literal(columns.remember_me.default.arg),
+        literal(datetime.utcnow())
+    ).where(~select(UserPreferences.id).where(UserPreferences.user_id == User.id).exists())
+
+    with engine.begin() as conn:
+        result = conn.execute(insert(UserPreferences).from_select(
+            ['user_id', 'theme', 'notifications_enabled', 'remember_me', 'updated_at'], missing
+        ))
+    return result.rowcount
+
+
+def run_migrations(engine=None):
+    """Executa os passos de migração idempotentes na inicialização do app"""
+    created = ensure_indexes(engine)
+    if created:
+        print(f"✅ Índices criados: {', '.join(created)}")
+    
+    backfilled = backfill_user_preferences(engine)
+    if backfilled:
+        print(f"✅ Preferências padrão criadas para {backfilled} usuário(s)")
+    return created
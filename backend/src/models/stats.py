@@ -0,0 +1,23 @@
+from src.models.user import db
+
+
+class ApiCounter(db.Model):
+    """Contador materializado, atualizado na mesma transação do evento que o altera"""
+    __tablename__ = 'api_counters'
+
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ApiCounter {self.name}={self.value}>'
+
+
+class SignupBucket(db.Model):
+    """Quantidade de cadastros por dia (UTC), para 'hoje' e 'esta semana'"""
+    __tablename__ = 'user_signup_buckets'
+
+    day = db.Column(db.Date, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<SignupBucket {self.day}={self.count}>'
@@ -1,11 +1,20 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import joinedload
 from datetime import datetime
-import bcrypt
+from src.models.database import RoutingSession
+from src.utils.password_hasher import password_hasher
 
-db = SQLAlchemy()
+# Leituras de rotas GET vão ao engine ``read`` quando configurado (ver RoutingSession).
+# expire_on_commit=False: a sessão vive uma requisição (ou um ciclo de manutenção),
+# então serializar objetos depois do commit não precisa recarregá-los com um SELECT.
+# DML em massa (synchronize_session=False) expira a sessão explicitamente.
+db = SQLAlchemy(session_options={'class_': RoutingSession, 'expire_on_commit': False})
 
 class User(db.Model):
     __tablename__ = 'users'
+    __table_args__ = (
+        db.Index('ix_users_created_at', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(50), unique=True, nullable=False)
@@ -23,13 +32,24 @@ class User(db.Model):
         return f'<User {self.username}>'
 
     def set_password(self, password):
-        """Hash e define a senha do usuário"""
-        salt = bcrypt.gensalt()
-        self.password_hash = bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+        """Hash e define a senha do usuário (executado no pool de hashing)"""
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        """Verifica se a senha está correta"""
-        return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+        """Verifica se a senha está correta (executado no pool de hashing)"""
+        return password_hasher.verify(password, self.password_hash)
+
+    def rehash_password_if_needed(self, password):
+        """Regrava o hash com o custo atual se ele foi gerado com outro custo
+
+        Chamado após um login bem-sucedido, quando a senha em texto está
+        disponível; retorna True se o hash foi atualizado (gravado no commit
+        do chamador).
+        """
+        if not password_hasher.needs_rehash(self.password_hash):
+            return False
+        self.set_password(password)
+        return True
 
     def to_dict(self, include_sensitive=False):
         """Converte o usuário para dicionário"""
@@ -60,23 +80,65 @@ class User(db.Model):
     @staticmethod
     def find_by_username(username):
         """Encontra usuário pelo username"""
-        return User.query.filter_by(username=username).first()
+        with db.session.no_autoflush:
+            return User.query.filter_by(username=username).first()
 
     @staticmethod
     def find_by_email(email):
         """Encontra usuário pelo email"""
-        return User.query.filter_by(email=email).first()
+        with db.session.no_autoflush:
+            return User.query.filter_by(email=email).first()
+
+    @staticmethod
+    def find_taken(username=None, email=None):
+        """Campos ('username', 'email') já usados por algum usuário, em uma única consulta"""
+        conditions = []
+        if username is not None:
+            conditions.append(User.username == username)
+        if email is not None:
+            conditions.append(User.email == email)
+        if not conditions:
+            return set()
+
+        # No máximo duas linhas: uma com o username e outra com o email. Sem
+        # autoflush: a consulta olha o banco, não alterações pendentes da sessão
+        with db.session.no_autoflush:
+            rows = db.session.query(User.username, User.email).filter(db.or_(*conditions)).limit(2).all()
+        taken = set()
+        for row_username, row_email in rows:
+            if username is not None and row_username == username:
+                taken.add('username')
+            if email is not None and row_email == email:
+                taken.add('email')
+        return taken
 
     @staticmethod
-    def find_by_username_or_email(identifier):
-        """Encontra usuário pelo username ou email"""
-        return User.query.filter(
+    def find_by_username_or_email(identifier, load_preferences=False):
+        """Encontra usuário pelo username ou email
+
+        ``load_preferences`` carrega as preferências na mesma consulta (joinedload).
+        """
+        query = User.query.filter(
             (User.username == identifier) | (User.email == identifier)
-        ).first()
+        )
+        if load_preferences:
+            query = query.options(joinedload(User.preferences))
+        with db.session.no_autoflush:
+            return query.first()
 
 
 class UserSession(db.Model):
     __tablename__ = 'user_sessions'
+    __table_args__ = (
+        # Sessões ativas do usuário (listagem, estatísticas, revogação em massa)
+        db.Index('ix_user_sessions_user_active_expires', 'user_id', 'is_active', 'expires_at'),
+        # Última sessão do usuário
+        db.Index('ix_user_sessions_user_created', 'user_id', 'created_at'),
+        # Revogação de um token específico
+        db.Index('ix_user_sessions_token_hash', 'token_hash', unique=True),
+        # Limpeza de sessões expiradas
+        db.Index('ix_user_sessions_expires_at', 'expires_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -102,8 +164,43 @@ class UserSession(db.Model):
         }
 
 
+class RevocationWatermark(db.Model):
+    """Watermark de "revogar todas as sessões": tokens do usuário emitidos antes dele são recusados
+
+    Persistido para que todos os workers (e o app após reiniciar) carreguem
+    o watermark no índice de revogação (src/utils/revocation.py).
+    """
+    __tablename__ = 'revocation_watermarks'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    revoked_before = db.Column(db.BigInteger, nullable=False)  # epoch (s), comparado ao claim iat
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<RevocationWatermark for User {self.user_id}>'
+
+
+class MaintenanceLease(db.Model):
+    """Lease de uma tarefa de manutenção: apenas o detentor vigente a executa
+
+    Guardado no banco (e não em um lock local) para que a exclusão valha
+    entre todos os workers de todos os hosts que usam o mesmo banco.
+    """
+    __tablename__ = 'maintenance_leases'
+
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(120), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<MaintenanceLease {self.name} held by {self.holder}>'
+
+
 class UserPreferences(db.Model):
     __tablename__ = 'user_preferences'
+    __table_args__ = (
+        db.Index('ix_user_preferences_user_id', 'user_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -115,6 +212,23 @@ class UserPreferences(db.Model):
     def __repr__(self):
         return f'<UserPreferences for User {self.user_id}>'
 
+    @staticmethod
+    def default_dict(user_id):
+        """Preferências padrão (defaults das colunas) para um usuário sem linha gravada
+
+        Usado pelas rotas de leitura, que nunca escrevem no banco; a linha é
+        criada no cadastro e pelo backfill de src/models/migrations.py.
+        """
+        columns = UserPreferences.__table__.c
+        return {
+            'id': None,
+            'user_id': user_id,
+            'theme': columns.theme.default.arg,
+            'notifications_enabled': columns.notifications_enabled.default.arg,
+            'remember_me': columns.remember_me.default.arg,
+            'updated_at': None
+        }
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -1,13 +1,24 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity, get_jwt
 from marshmallow import ValidationError
 from src.models.user import User, UserPreferences, db
 from src.schemas.auth_schemas import (
-    RegisterSchema, LoginSchema, RefreshTokenSchema,
+    RegisterSchema, LoginSchema, RefreshTokenSchema, AvailabilitySchema,
     LoginResponseSchema, MessageResponseSchema, ErrorResponseSchema
 )
-from src.utils.auth_utils import create_user_session, revoke_user_session, get_client_ip
-from datetime import timedelta
+from src.utils.auth_utils import (
+    create_user_session, session_committed, revoke_user_session, get_client_ip, get_request_token,
+    password_hasher_busy_response, rate_limited_response, rate_limit_key, hash_token
+)
+from src.utils.password_hasher import PasswordHasherBusy
+from src.utils.cache import get_cached_user, invalidate_cached_user
+from src.utils.http_cache import conditional_responses
+from src.utils.counters import record_signup
+from src.utils.metrics import AUTH_ATTEMPTS
+from src.utils.rate_limit import login_rate_limiter, availability_rate_limiter, RateLimitExceeded
+from src.utils.availability import availability_index
+from src.utils.revocation import revocation_index
+from datetime import datetime, timedelta
 import os
 
 auth_bp = Blueprint('auth', __name__)
@@ -15,6 +26,7 @@ auth_bp = Blueprint('auth', __name__)
 # Schemas
 register_schema = RegisterSchema()
 login_schema = LoginSchema()
+availability_schema = AvailabilitySchema()
 refresh_schema = RefreshTokenSchema()
 login_response_schema = LoginResponseSchema()
 message_response_schema = MessageResponseSchema()
@@ -30,22 +42,25 @@ def register():
         
         # Verificar se as senhas coincidem
         if data['password'] != data['confirm_password']:
+            AUTH_ATTEMPTS.inc(action='register', outcome='invalid')
             return jsonify({
                 'error': 'Validation Error',
                 'message': 'Senhas não coincidem',
                 'details': {'confirm_password': ['Senhas não coincidem']}
             }), 400
         
-        # Verificar se username já existe
-        if User.find_by_username(data['username']):
+        # Verificar username e email em uma única consulta
+        taken = User.find_taken(username=data['username'], email=data['email'])
+        if 'username' in taken:
+            AUTH_ATTEMPTS.inc(action='register', outcome='conflict')
             return jsonify({
                 'error': 'Conflict',
                 'message': 'Nome de usuário já existe',
                 'details': {'username': ['Este nome de usuário já está em uso']}
             }), 409
         
-        # Verificar se email já existe
-        if User.find_by_email(data['email']):
+        if 'email' in taken:
+            AUTH_ATTEMPTS.inc(action='register', outcome='conflict')
             return jsonify({
                 'error': 'Conflict',
                 'message': 'Email já está cadastrado',
@@ -66,7 +81,12 @@ def register():
         preferences = UserPreferences(user_id=user.id)
         db.session.add(preferences)
         
+        # Contadores de /api/utils/stats, na mesma transação do cadastro
+        record_signup()
+        
         db.session.commit()
+        availability_index.add(username=user.username, email=user.email)
+        AUTH_ATTEMPTS.inc(action='register', outcome='success')
         
         return jsonify({
             'success': True,
@@ -74,12 +94,46 @@ def register():
             'user': user.to_public_dict()
         }), 201
         
+    except ValidationError as e:
+        AUTH_ATTEMPTS.inc(action='register', outcome='invalid')
+        return jsonify({
+            'error': 'Validation Error',
+            'message': 'Dados inválidos',
+            'details': e.messages
+        }), 400
+    except PasswordHasherBusy as e:
+        db.session.rollback()
+        AUTH_ATTEMPTS.inc(action='register', outcome='busy')
+        return password_hasher_busy_response(e)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'error': 'Internal Server Error',
+            'message': 'Erro interno do servidor'
+        }), 500
+
+
+@auth_bp.route('/availability', methods=['GET'])
+def check_availability():
+    """Verifica se username e/ou email estão livres (usado pelo formulário de cadastro)"""
+    try:
+        data = availability_schema.load(request.args)
+        
+        availability_rate_limiter.check(ip=rate_limit_key(get_client_ip(), 'availability'))
+        
+        return jsonify({
+            'success': True,
+            'available': availability_index.check(**data)
+        }), 200
+        
     except ValidationError as e:
         return jsonify({
             'error': 'Validation Error',
             'message': 'Dados inválidos',
             'details': e.messages
         }), 400
+    except RateLimitExceeded as e:
+        return rate_limited_response(e)
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -95,21 +149,36 @@ def login():
         # Validar dados de entrada
         data = login_schema.load(request.json)
         
-        # Buscar usuário por username ou email
-        user = User.find_by_username_or_email(data['username'])
+        # Limite de tentativas por IP e por usuário, antes de gastar CPU com bcrypt
+        login_rate_limiter.check(
+            ip=rate_limit_key(get_client_ip(), 'login'),
+            identifier=rate_limit_key(data['username'].strip().lower(), 'login')
+        )
+        
+        # Buscar usuário por username ou email (com as preferências, atualizadas abaixo)
+        user = User.find_by_username_or_email(data['username'], load_preferences=True)
         
         if not user or not user.check_password(data['password']):
+            AUTH_ATTEMPTS.inc(action='login', outcome='invalid_credentials')
             return jsonify({
                 'error': 'Unauthorized',
                 'message': 'Credenciais inválidas'
             }), 401
         
         if not user.is_active:
+            AUTH_ATTEMPTS.inc(action='login', outcome='inactive')
             return jsonify({
                 'error': 'Forbidden',
                 'message': 'Conta desativada'
             }), 403
         
+        # Atualizar o custo do bcrypt de hashes antigos (mesmo commit da sessão)
+        password_rehashed = False
+        try:
+            password_rehashed = user.rehash_password_if_needed(data['password'])
+        except PasswordHasherBusy:
+            pass  # fila saturada: o rehash fica para o próximo login
+        
         # Configurar tempo de expiração baseado em "remember_me"
         remember_me = data.get('remember_me', False)
         if remember_me:
@@ -124,19 +193,29 @@ def login():
             identity=user.id,
             expires_delta=expires_delta
         )
-        refresh_token = create_refresh_token(identity=user.id)
+        # O refresh token fica vinculado à sessão do login (claim sid):
+        # o logout a revoga e o refresh passa a ser recusado
+        refresh_token = create_refresh_token(
+            identity=user.id,
+            additional_claims={'sid': hash_token(access_token)}
+        )
         
-        # Criar sessão no banco
-        create_user_session(user.id, access_token, expires_in_seconds)
+        # Sessão, preferências e rehash da senha em uma única transação
+        # (no SQLite, cada commit é um lock de escrita e um fsync)
+        session = create_user_session(user.id, access_token, expires_in_seconds, commit=False)
         
-        # Atualizar preferências de remember_me
-        if user.preferences:
+        # Gravar remember_me só quando mudou
+        if user.preferences is None:
+            db.session.add(UserPreferences(user_id=user.id, remember_me=remember_me))
+        elif user.preferences.remember_me != remember_me:
             user.preferences.remember_me = remember_me
-        else:
-            preferences = UserPreferences(user_id=user.id, remember_me=remember_me)
-            db.session.add(preferences)
         
         db.session.commit()
+        session_committed(user.id, session)
+        if password_rehashed:
+            # Senha regravada (updated_at mudou): o snapshot em cache ficou antigo
+            invalidate_cached_user(user.id)
+        AUTH_ATTEMPTS.inc(action='login', outcome='success')
         
         return jsonify({
             'success': True,
@@ -149,12 +228,20 @@ def login():
         }), 200
         
     except ValidationError as e:
+        AUTH_ATTEMPTS.inc(action='login', outcome='invalid')
         return jsonify({
             'error': 'Validation Error',
             'message': 'Dados inválidos',
             'details': e.messages
         }), 400
+    except RateLimitExceeded as e:
+        AUTH_ATTEMPTS.inc(action='login', outcome='rate_limited')
+        return rate_limited_response(e)
+    except PasswordHasherBusy as e:
+        AUTH_ATTEMPTS.inc(action='login', outcome='busy')
+        return password_hasher_busy_response(e)
     except Exception as e:
+        db.session.rollback()
         return jsonify({
             'error': 'Internal Server Error',
             'message': 'Erro interno do servidor'
@@ -169,12 +256,13 @@ def logout():
         current_user_id = get_jwt_identity()
         
         # Obter token do header
-        auth_header = request.headers.get('Authorization')
-        if auth_header and auth_header.startswith('Bearer '):
-            token = auth_header.split(' ')[1]
-            
-            # Revogar sessão
-            revoke_user_session(current_user_id, token)
+        token = get_request_token()
+        if token:
+            # Revogar sessão (e a sessão de login do refresh token, se vinculada)
+            claims = get_jwt()
+            revoke_user_session(
+                current_user_id, token, datetime.utcfromtimestamp(claims['exp']), session_hash=claims.get('sid')
+            )
         
         return jsonify({
             'success': True,
@@ -194,7 +282,7 @@ def refresh():
     """Endpoint para renovar token de acesso"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = get_cached_user(current_user_id)
         
         if not user or not user.is_active:
             return jsonify({
@@ -202,8 +290,18 @@ def refresh():
                 'message': 'Usuário inválido ou inativo'
             }), 401
         
-        # Criar novo token de acesso
-        new_access_token = create_access_token(identity=current_user_id)
+        # O índice em memória sincroniza a cada REVOCATION_SYNC_INTERVAL; o
+        # refresh emite tokens novos, então confere a revogação no banco
+        claims = get_jwt()
+        if revocation_index.is_revoked_in_database(claims.get('sid'), current_user_id, claims.get('iat')):
+            return jsonify({
+                'error': 'Token Revoked',
+                'message': 'Token revogado'
+            }), 401
+        
+        # Criar novo token de acesso, vinculado à mesma sessão de login
+        session_claims = {'sid': claims['sid']} if claims.get('sid') else None
+        new_access_token = create_access_token(identity=current_user_id, additional_claims=session_claims)
         
         # Criar nova sessão
         create_user_session(current_user_id, new_access_token)
@@ -228,7 +326,7 @@ def verify_token():
     """Endpoint para verificar se o token é válido"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = get_cached_user(current_user_id)
         
         if not user or not user.is_active:
             return jsonify({
@@ -249,13 +347,21 @@ def verify_token():
         }), 401
 
 
+def _current_user_version():
+    user = get_cached_user(get_jwt_identity())
+    if not user or not user.is_active:
+        return None
+    return (user.id, user.updated_at)
+
+
 @auth_bp.route('/me', methods=['GET'])
 @jwt_required()
+@conditional_responses.conditional(_current_user_version)
 def get_current_user():
     """Endpoint para obter dados do usuário atual"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = get_cached_user(current_user_id)
         
         if not user or not user.is_active:
             return jsonify({
@@ -0,0 +1,22 @@
+import hmac
+from flask import Blueprint, request, jsonify, current_app
+from src.utils.metrics import metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Métricas no formato texto do Prometheus (agregadas entre workers)"""
+    if metrics.token:
+        expected = f'Bearer {metrics.token}'
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), expected):
+            return jsonify({
+                'error': 'Unauthorized',
+                'message': 'Token de métricas inválido'
+            }), 401
+
+    return current_app.response_class(
+        metrics.render(),
+        mimetype='text/plain; version=0.0.4; charset=utf-8'
+    )
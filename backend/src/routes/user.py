@@ -1,12 +1,21 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import ValidationError
+from sqlalchemy.orm import joinedload
 from src.models.user import User, UserPreferences, db
 from src.schemas.user_schemas import (
     UpdateProfileSchema, UpdatePreferencesSchema, DeleteAccountSchema,
     UserProfileResponseSchema, UserPreferencesResponseSchema
 )
-from src.utils.auth_utils import token_required, get_user_stats, revoke_all_user_sessions
+from src.utils.auth_utils import (
+    token_required, get_user_stats as calculate_user_stats, revoke_all_user_sessions, password_hasher_busy_response
+)
+from src.utils.password_hasher import PasswordHasherBusy
+from src.utils.cache import get_cached_user, invalidate_cached_user
+from src.utils.http_cache import conditional_responses
+from src.utils.availability import availability_index
+from src.utils.session_writer import session_writer
+from src.utils.counters import increment_counter, USERS_ACTIVE
 
 user_bp = Blueprint('user', __name__)
 
@@ -18,13 +27,52 @@ user_profile_response_schema = UserProfileResponseSchema()
 user_preferences_response_schema = UserPreferencesResponseSchema()
 
 
+def _current_user():
+    """Usuário autenticado com as preferências (joinedload), carregado uma vez por requisição
+
+    Guardado em ``g`` porque o identity map da sessão mantém referências
+    fracas: sem isso, o validador de ETag e a rota consultariam o banco duas vezes.
+    """
+    if 'current_user' not in g:
+        g.current_user = db.session.get(
+            User, int(get_jwt_identity()), options=[joinedload(User.preferences)]
+        )
+    return g.current_user
+
+
+def _current_user_with_preferences():
+    """Usuário ativo e suas preferências (None se ainda não gravadas: valem os padrões)"""
+    user = _current_user()
+    if not user or not user.is_active:
+        return None, None
+    return user, user.preferences
+
+
+def _profile_version():
+    user, preferences = _current_user_with_preferences()
+    if user is None:
+        return None
+    stats = calculate_user_stats(user)
+    preferences_version = preferences.updated_at if preferences else None
+    return (user.id, user.updated_at, preferences_version, tuple(sorted(stats.items())))
+
+
+def _preferences_version():
+    user, preferences = _current_user_with_preferences()
+    if user is None:
+        return None
+    if preferences is None:
+        return (user.id, None, None)
+    return (user.id, preferences.id, preferences.updated_at)
+
+
 @user_bp.route('/profile', methods=['GET'])
 @jwt_required()
+@conditional_responses.conditional(_profile_version)
 def get_profile():
     """Obter perfil completo do usuário"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = _current_user()
         
         if not user or not user.is_active:
             return jsonify({
@@ -32,15 +80,8 @@ def get_profile():
                 'message': 'Usuário inválido ou inativo'
             }), 401
         
-        # Obter ou criar preferências
-        if not user.preferences:
-            preferences = UserPreferences(user_id=user.id)
-            db.session.add(preferences)
-            db.session.commit()
-            user.preferences = preferences
-        
         # Obter estatísticas
-        stats = get_user_stats(user)
+        stats = calculate_user_stats(user)
         
         profile_data = {
             'id': user.id,
@@ -49,7 +90,10 @@ def get_profile():
             'created_at': user.created_at,
             'updated_at': user.updated_at,
             'is_active': user.is_active,
-            'preferences': user.preferences.to_dict() if user.preferences else None,
+            # Rota de leitura: sem linha de preferências, responde os padrões sem gravar
+            'preferences': (
+                user.preferences.to_dict() if user.preferences else UserPreferences.default_dict(user.id)
+            ),
             'stats': stats
         }
         
@@ -70,8 +114,7 @@ def get_profile():
 def update_profile():
     """Atualizar perfil do usuário"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = _current_user()
         
         if not user or not user.is_active:
             return jsonify({
@@ -82,29 +125,34 @@ def update_profile():
         # Validar dados de entrada
         data = update_profile_schema.load(request.json)
         
-        # Verificar se username já existe (se foi fornecido e é diferente do atual)
-        if 'username' in data and data['username'] != user.username:
-            existing_user = User.find_by_username(data['username'])
-            if existing_user:
-                return jsonify({
-                    'error': 'Conflict',
-                    'message': 'Nome de usuário já existe',
-                    'details': {'username': ['Este nome de usuário já está em uso']}
-                }), 409
-            user.username = data['username']
-        
-        # Verificar se email já existe (se foi fornecido e é diferente do atual)
-        if 'email' in data and data['email'] != user.email:
-            existing_user = User.find_by_email(data['email'])
-            if existing_user:
-                return jsonify({
-                    'error': 'Conflict',
-                    'message': 'Email já está cadastrado',
-                    'details': {'email': ['Este email já está em uso']}
-                }), 409
-            user.email = data['email']
+        # Verificar em uma única consulta o username/email que estão sendo alterados
+        changes = {
+            field: data[field] for field in ('username', 'email')
+            if field in data and data[field] != getattr(user, field)
+        }
+        taken = User.find_taken(**changes) if changes else set()
+        if 'username' in taken:
+            return jsonify({
+                'error': 'Conflict',
+                'message': 'Nome de usuário já existe',
+                'details': {'username': ['Este nome de usuário já está em uso']}
+            }), 409
+        
+        if 'email' in taken:
+            return jsonify({
+                'error': 'Conflict',
+                'message': 'Email já está cadastrado',
+                'details': {'email': ['Este email já está em uso']}
+            }), 409
+        
+        previous = {field: getattr(user, field) for field in changes}
+        for field, value in changes.items():
+            setattr(user, field, value)
         
         db.session.commit()
+        invalidate_cached_user(user.id)
+        availability_index.discard(**previous)
+        availability_index.add(**changes)
         
         return jsonify({
             'success': True,
@@ -128,11 +176,11 @@ def update_profile():
 
 @user_bp.route('/preferences', methods=['GET'])
 @jwt_required()
+@conditional_responses.conditional(_preferences_version)
 def get_preferences():
     """Obter preferências do usuário"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = _current_user()
         
         if not user or not user.is_active:
             return jsonify({
@@ -140,17 +188,15 @@ def get_preferences():
                 'message': 'Usuário inválido ou inativo'
             }), 401
         
-        # Obter ou criar preferências
-        if not user.preferences:
-            preferences = UserPreferences(user_id=user.id)
-            db.session.add(preferences)
-            db.session.commit()
+        # Rota de leitura: sem linha de preferências, responde os padrões sem gravar
+        if user.preferences:
+            preferences = user.preferences.to_dict()
         else:
-            preferences = user.preferences
+            preferences = UserPreferences.default_dict(user.id)
         
         return jsonify({
             'success': True,
-            'preferences': preferences.to_dict()
+            'preferences': preferences
         }), 200
         
     except Exception as e:
@@ -165,8 +211,7 @@ def get_preferences():
 def update_preferences():
     """Atualizar preferências do usuário"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = _current_user()
         
         if not user or not user.is_active:
             return jsonify({
@@ -220,7 +265,7 @@ def get_user_stats():
     """Obter estatísticas do usuário"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = get_cached_user(current_user_id)
         
         if not user or not user.is_active:
             return jsonify({
@@ -228,7 +273,7 @@ def get_user_stats():
                 'message': 'Usuário inválido ou inativo'
             }), 401
         
-        stats = get_user_stats(user)
+        stats = calculate_user_stats(user)
         
         return jsonify({
             'success': True,
@@ -247,8 +292,7 @@ def get_user_stats():
 def delete_account():
     """Deletar conta do usuário"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = _current_user()
         
         if not user or not user.is_active:
             return jsonify({
@@ -266,12 +310,13 @@ def delete_account():
                 'message': 'Senha incorreta'
             }), 401
         
-        # Revogar todas as sessões
-        revoke_all_user_sessions(user.id)
-        
-        # Marcar usuário como inativo (soft delete)
+        # Marcar usuário como inativo (soft delete) e revogar todas as sessões:
+        # a desativação é confirmada no mesmo commit do watermark de revogação,
+        # antes dos lotes que desativam as sessões
         user.is_active = False
-        db.session.commit()
+        increment_counter(USERS_ACTIVE, -1)
+        revoke_all_user_sessions(user.id)
+        invalidate_cached_user(user.id)
         
         return jsonify({
             'success': True,
@@ -284,6 +329,9 @@ def delete_account():
             'message': 'Dados inválidos',
             'details': e.messages
         }), 400
+    except PasswordHasherBusy as e:
+        db.session.rollback()
+        return password_hasher_busy_response(e)
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -298,7 +346,7 @@ def get_user_sessions():
     """Obter sessões ativas do usuário"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = get_cached_user(current_user_id)
         
         if not user or not user.is_active:
             return jsonify({
@@ -306,14 +354,24 @@ def get_user_sessions():
                 'message': 'Usuário inválido ou inativo'
             }), 401
         
-        # Obter sessões ativas
+        # Obter sessões ativas (incluindo as que ainda estão na fila de
+        # gravação deste processo, sem gravá-la em uma leitura)
         from src.models.user import UserSession
         from datetime import datetime
         
+        now = datetime.utcnow()
+        pending = session_writer.pending_for(user.id)
         active_sessions = UserSession.query.filter_by(
             user_id=user.id,
             is_active=True
-        ).filter(UserSession.expires_at > datetime.utcnow()).all()
+        ).filter(UserSession.expires_at > now).all()
+        
+        # A fila pode ter sido gravada depois da cópia: descarta repetidas
+        stored = {session.token_hash for session in active_sessions}
+        active_sessions.extend(
+            UserSession(**record) for record in pending
+            if record['token_hash'] not in stored and record['is_active'] and record['expires_at'] > now
+        )
         
         sessions_data = [session.to_dict() for session in active_sessions]
         
@@ -333,10 +391,10 @@ def get_user_sessions():
 @user_bp.route('/sessions/revoke-all', methods=['POST'])
 @jwt_required()
 def revoke_all_sessions():
-    """Revogar todas as sessões do usuário (exceto a atual)"""
+    """Revogar todas as sessões do usuário (inclusive a atual)"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = get_cached_user(current_user_id)
         
         if not user or not user.is_active:
             return jsonify({
@@ -345,11 +403,14 @@ def revoke_all_sessions():
             }), 401
         
         # Revogar todas as sessões
-        revoked_count = revoke_all_user_sessions(user.id)
+        result = revoke_all_user_sessions(user.id)
+        invalidate_cached_user(user.id)
         
         return jsonify({
             'success': True,
-            'message': f'{revoked_count} sessões revogadas com sucesso'
+            'message': f'{result.rows} sessões revogadas com sucesso',
+            'revoked': result.rows,
+            'elapsed_ms': result.elapsed_ms
         }), 200
         
     except Exception as e:
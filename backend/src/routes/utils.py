@@ -1,7 +1,20 @@
-from flask import Blueprint, jsonify
-from src.models.user import User, UserSession, db
-from src.utils.auth_utils import cleanup_expired_sessions
+from flask import Blueprint, jsonify, current_app
+from sqlalchemy import text
+from src.models.user import db
+from src.utils.password_hasher import password_hasher
+from src.utils.cache import user_cache, stats_cache
+from src.utils.revocation import revocation_index
+from src.utils.maintenance import session_reaper
+from src.utils.session_writer import session_writer
+from src.utils.http_cache import conditional_responses, make_etag
+from src.utils.static_assets import static_assets
+from src.utils.profiling import request_profiler
+from src.utils.rate_limit import login_rate_limiter, availability_rate_limiter
+from src.utils.availability import availability_index
+from src.utils.auth_utils import admin_required
+from src.utils.counters import get_counters, USERS_TOTAL, USERS_ACTIVE, SESSIONS_ACTIVE
 from datetime import datetime
+import json
 import os
 
 utils_bp = Blueprint('utils', __name__)
@@ -12,7 +25,7 @@ def health_check():
     """Health check da API"""
     try:
         # Testar conexão com banco
-        db.session.execute('SELECT 1')
+        db.session.execute(text('SELECT 1'))
         db_status = 'healthy'
     except Exception as e:
         db_status = 'unhealthy'
@@ -25,8 +38,20 @@ def health_check():
         'app_name': os.getenv('APP_NAME', 'Capivara AI Backend'),
         'database': {
             'status': db_status,
-            'type': 'SQLite'
+            'type': db.engine.dialect.name,
+            'pragmas': current_app.extensions.get('sqlite_pragmas'),
+            'read_routing': current_app.extensions.get('read_routing')
         },
+        'password_hashing': password_hasher.stats(),
+        'user_cache': user_cache.stats(),
+        'stats_cache': stats_cache.stats(),
+        'revocation_index': revocation_index.stats(),
+        'conditional_responses': conditional_responses.stats(),
+        'static_assets': static_assets.stats(),
+        'login_rate_limit': login_rate_limiter.stats(),
+        'availability_index': availability_index.stats(),
+        'availability_rate_limit': availability_rate_limiter.stats(),
+        'session_writer': session_writer.stats(),
         'environment': os.getenv('FLASK_ENV', 'development')
     }
     
@@ -39,27 +64,15 @@ def health_check():
 def get_api_stats():
     """Estatísticas gerais da API"""
     try:
-        # Contar usuários
-        total_users = User.query.count()
-        active_users = User.query.filter_by(is_active=True).count()
-        
-        # Contar sessões ativas
-        active_sessions = UserSession.query.filter_by(is_active=True).filter(
-            UserSession.expires_at > datetime.utcnow()
-        ).count()
-        
-        # Usuários criados hoje
-        today = datetime.utcnow().date()
-        users_today = User.query.filter(
-            db.func.date(User.created_at) == today
-        ).count()
-        
-        # Usuários criados esta semana
-        from datetime import timedelta
-        week_ago = datetime.utcnow() - timedelta(days=7)
-        users_this_week = User.query.filter(
-            User.created_at >= week_ago
-        ).count()
+        # Contadores materializados (usuários: atualizados em cadastro e
+        # desativação; sessões: recontadas a cada ciclo do SessionReaper):
+        # custo constante por requisição
+        counters = get_counters()
+        total_users = counters[USERS_TOTAL]
+        active_users = counters[USERS_ACTIVE]
+        active_sessions = counters[SESSIONS_ACTIVE]
+        users_today = counters['created_today']
+        users_this_week = counters['created_this_week']
         
         stats = {
             'users': {
@@ -89,17 +102,21 @@ def get_api_stats():
 
 @utils_bp.route('/cleanup', methods=['POST'])
 def cleanup_database():
-    """Limpeza de dados expirados (endpoint administrativo)"""
+    """Dispara a limpeza de dados expirados (endpoint administrativo)"""
     try:
-        # Limpar sessões expiradas
-        cleaned_sessions = cleanup_expired_sessions()
+        # Executa um ciclo do agendador agora, em vez de esperar o intervalo
+        report = session_reaper.run_once(trigger='manual')
         
         return jsonify({
             'success': True,
             'message': 'Limpeza realizada com sucesso',
             'cleaned': {
-                'expired_sessions': cleaned_sessions
-            }
+                'expired_sessions': report['expired_sessions'],
+                'active_sessions': report['active_sessions']
+            },
+            'batches': report['batches'],
+            'elapsed_ms': report['elapsed_ms'],
+            'reaper': session_reaper.status()
         }), 200
         
     except Exception as e:
@@ -109,17 +126,64 @@ def cleanup_database():
         }), 500
 
 
+@utils_bp.route('/cleanup', methods=['GET'])
+def cleanup_status():
+    """Estado do agendador de limpeza de sessões"""
+    return jsonify({
+        'success': True,
+        'reaper': session_reaper.status()
+    }), 200
+
+
+@utils_bp.route('/metrics', methods=['GET'])
+@admin_required
+def get_metrics(current_user):
+    """Relatório de instrumentação por endpoint (apenas administradores)"""
+    report = request_profiler.snapshot()
+    report['password_hashing'] = password_hasher.stats()
+    
+    return jsonify({
+        'success': True,
+        'metrics': report
+    }), 200
+
+
+def _api_info():
+    """Conteúdo estático de /info e sua versão, montados uma vez por processo"""
+    cached = current_app.extensions.get('api_info')
+    if cached is None:
+        info = _build_api_info()
+        cached = (info, make_etag('api_info', json.dumps(info, sort_keys=True, default=str)))
+        current_app.extensions['api_info'] = cached
+    return cached
+
+
+def _api_info_version():
+    return (_api_info()[1],)
+
+
 @utils_bp.route('/info', methods=['GET'])
+@conditional_responses.conditional(
+    _api_info_version,
+    cache_control=lambda: f"public, max-age={current_app.config['API_INFO_MAX_AGE']}",
+    vary=None
+)
 def get_api_info():
     """Informações da API"""
+    return jsonify(_api_info()[0]), 200
+
+
+def _build_api_info():
     info = {
         'name': os.getenv('APP_NAME', 'Capivara AI Backend'),
         'version': os.getenv('APP_VERSION', '1.0.0'),
         'description': 'API REST para sistema de autenticação Capivara AI',
         'environment': os.getenv('FLASK_ENV', 'development'),
+        'server': current_app.config.get('SERVER'),
         'endpoints': {
             'auth': [
                 'POST /api/auth/register',
+                'GET /api/auth/availability',
                 'POST /api/auth/login',
                 'POST /api/auth/logout',
                 'POST /api/auth/refresh',
@@ -140,7 +204,10 @@ def get_api_info():
                 'GET /api/utils/health',
                 'GET /api/utils/stats',
                 'POST /api/utils/cleanup',
-                'GET /api/utils/info'
+                'GET /api/utils/cleanup',
+                'GET /api/utils/info',
+                'GET /api/utils/metrics',
+                'GET /api/utils/test'
             ]
         },
         'features': [
@@ -155,11 +222,10 @@ def get_api_info():
             'Error Handling',
             'Database Models',
             'API Documentation'
-        ],
-        'timestamp': datetime.utcnow().isoformat()
+        ]
     }
     
-    return jsonify(info), 200
+    return info
 
 
 @utils_bp.route('/test', methods=['GET'])
@@ -1,20 +1,27 @@
-from marshmallow import Schema, fields, validate, validates, ValidationError
+from marshmallow import Schema, fields, validate, validates, validates_schema, ValidationError
 import re
 
+# Regras de username/email compartilhadas pelo cadastro e pela verificação de disponibilidade
+USERNAME_VALIDATORS = [
+    validate.Length(min=3, max=50, error="Username deve ter entre 3 e 50 caracteres"),
+    validate.Regexp(
+        r'^[a-zA-Z0-9_]+$',
+        error="Username deve conter apenas letras, números e underscore"
+    )
+]
+EMAIL_VALIDATORS = [
+    validate.Length(max=100, error="Email deve ter no máximo 100 caracteres")
+]
+
+
 class RegisterSchema(Schema):
     username = fields.Str(
         required=True,
-        validate=[
-            validate.Length(min=3, max=50, error="Username deve ter entre 3 e 50 caracteres"),
-            validate.Regexp(
-                r'^[a-zA-Z0-9_]+$',
-                error="Username deve conter apenas letras, números e underscore"
-            )
-        ]
+        validate=USERNAME_VALIDATORS
     )
     email = fields.Email(
         required=True,
-        validate=validate.Length(max=100, error="Email deve ter no máximo 100 caracteres")
+        validate=EMAIL_VALIDATORS
     )
     password = fields.Str(
         required=True,
@@ -25,7 +32,7 @@ class RegisterSchema(Schema):
     confirm_password = fields.Str(required=True)
 
     @validates('password')
-    def validate_password_strength(self, value):
+    def validate_password_strength(self, value, **kwargs):
         """Validação adicional de força da senha"""
         if len(value) < 6:
             raise ValidationError("Senha deve ter pelo menos 6 caracteres")
@@ -56,6 +63,17 @@ class LoginSchema(Schema):
     remember_me = fields.Bool(load_default=False)
 
 
+class AvailabilitySchema(Schema):
+    """Parâmetros de GET /api/auth/availability (mesmas regras do cadastro)"""
+    username = fields.Str(validate=USERNAME_VALIDATORS)
+    email = fields.Email(validate=EMAIL_VALIDATORS)
+
+    @validates_schema
+    def validate_not_empty(self, data, **kwargs):
+        if not data:
+            raise ValidationError('Informe username e/ou email')
+
+
 class RefreshTokenSchema(Schema):
     refresh_token = fields.Str(required=True)
 
@@ -71,7 +89,7 @@ class ChangePasswordSchema(Schema):
     confirm_new_password = fields.Str(required=True)
 
     @validates('new_password')
-    def validate_new_password_strength(self, value):
+    def validate_new_password_strength(self, value, **kwargs):
         """Validação de força da nova senha"""
         if len(value) < 6:
             raise ValidationError("Nova senha deve ter pelo menos 6 caracteres")
@@ -0,0 +1,149 @@
+"""
+Servidor de produção do Capivara AI Backend (gunicorn, pre-fork)
+
+Uso (a partir da pasta backend):
+    python -m src.serve
+
+O app é carregado uma única vez no processo master (preload) e os workers
+são criados por fork. A configuração vem de variáveis de ambiente:
+
+    PORT                 porta HTTP (padrão 5000)
+    WEB_CONCURRENCY      número de workers (padrão: nº de CPUs, mínimo 2)
+    GUNICORN_THREADS     threads por worker (padrão 8)
+    GUNICORN_TIMEOUT     segundos até um worker travado ser reiniciado (padrão 30)
+    GUNICORN_KEEPALIVE   segundos de keep-alive HTTP (padrão 5)
+    GUNICORN_MAX_REQUESTS  requisições até reciclar um worker (padrão 2000, 0 desativa)
+    METRICS_DIR          pasta dos snapshots de métricas dos workers (padrão: temporária)
+
+Recarga graciosa: ``kill -HUP <pid do master>`` recria os workers sem derrubar
+conexões em andamento (o código é recarregado apenas com ``USR2`` + ``QUIT``,
+já que o app é pré-carregado no master).
+"""
+import os
+import sys
+import glob
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gunicorn.app.base import BaseApplication
+
+
+def default_settings():
+    """Configuração padrão voltada para carga de autenticação (bcrypt)
+
+    O bcrypt roda no pool de hashing de cada worker, fora das threads de
+    requisição; por isso os workers usam threads (gthread): enquanto uma
+    thread espera o hash, as outras continuam atendendo rotas baratas.
+    O pool de hashing de cada worker recebe uma fatia das CPUs.
+
+    Um worker nunca tem mais requisições em andamento que threads (as
+    excedentes esperam no backlog do socket, não recebem 503), então o
+    limite de hashing pendente só serve para reservar threads para rotas
+    baratas. Reservar uma basta: as demais podem aguardar o pool, e o 503
+    fica para quando o worker inteiro está ocupado com hashing.
+    """
+    cpus = os.cpu_count() or 1
+    workers = int(os.getenv('WEB_CONCURRENCY', max(2, cpus)))
+    threads = int(os.getenv('GUNICORN_THREADS', 8))
+    max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 2000))
+
+    return {
+        'bind': f"0.0.0.0:{int(os.getenv('PORT', 5000))}",
+        'workers': workers,
+        'threads': threads,
+        'worker_class': 'gthread',
+        'preload_app': True,
+        'timeout': int(os.getenv('GUNICORN_TIMEOUT', 30)),
+        'graceful_timeout': int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30)),
+        'keepalive': int(os.getenv('GUNICORN_KEEPALIVE', 5)),
+        'max_requests': max_requests,
+        'max_requests_jitter': max_requests // 10,
+        'forwarded_allow_ips': os.getenv('FORWARDED_ALLOW_IPS', '127.0.0.1'),
+        'accesslog': os.getenv('GUNICORN_ACCESS_LOG', '-'),
+        'errorlog': '-',
+        'password_hash_workers': int(os.getenv('PASSWORD_HASH_WORKERS', max(1, cpus // workers))),
+        'password_hash_max_pending': int(os.getenv('PASSWORD_HASH_MAX_PENDING', max(1, threads - 1)))
+    }
+
+
+def post_fork(server, worker):
+    """Descarta conexões de banco herdadas do master"""
+    from src.models.user import db
+
+    with server.app.application.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def prepare_metrics_dir():
+    """Pasta onde cada worker grava suas métricas para o /metrics agregar
+
+    Os contadores recomeçam a cada início do master, então snapshots de uma
+    execução anterior são descartados.
+    """
+    directory = os.getenv('METRICS_DIR')
+    if not directory:
+        os.environ['METRICS_DIR'] = tempfile.mkdtemp(prefix='capivara-metrics-')
+        return
+    for path in glob.glob(os.path.join(directory, '*.json')):
+        os.remove(path)
+
+
+def worker_exit(server, worker):
+    """Grava as sessões pendentes da fila write-behind antes do worker sair"""
+    from src.utils.session_writer import session_writer
+
+    session_writer.drain()
+
+
+class ProductionServer(BaseApplication):
+    """Aplicação gunicorn que usa o app Flask criado por src.main"""
+
+    def __init__(self, settings=None):
+        self.settings = settings or default_settings()
+        self.application = None
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.settings.items():
+            if key in self.cfg.settings:
+                self.cfg.set(key, value)
+        self.cfg.set('post_fork', post_fork)
+        self.cfg.set('worker_exit', worker_exit)
+
+    def load(self):
+        if self.application is None:
+            # O pool de hashing é dimensionado antes de criar o app
+            os.environ.setdefault('PASSWORD_HASH_WORKERS', str(self.settings['password_hash_workers']))
+            os.environ.setdefault('PASSWORD_HASH_MAX_PENDING', str(self.settings['password_hash_max_pending']))
+            prepare_metrics_dir()
+
+            from src.main import app
+            from src.utils.password_hasher import password_hasher
+
+            # O pool usado no boot (ex.: criação do admin) pertence ao master
+            password_hasher.shutdown(wait=True)
+
+            app.config['SERVER'] = {
+                'mode': 'production',
+                'software': 'gunicorn',
+                'worker_class': self.settings['worker_class'],
+                'workers': self.settings['workers'],
+                'threads': self.settings['threads'],
+                'preload': self.settings['preload_app'],
+                'keepalive': self.settings['keepalive'],
+                'timeout': self.settings['timeout'],
+                'max_requests': self.settings['max_requests']
+            }
+            self.application = app
+        return self.application
+
+
+def main():
+    print("🚀 Iniciando Capivara AI Backend (produção)...")
+    ProductionServer().run()
+
+
+if __name__ == '__main__':
+    main()
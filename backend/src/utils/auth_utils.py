@@ -1,9 +1,20 @@
 from functools import wraps
 from flask import request, jsonify, current_app
-from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, get_jwt
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from sqlalchemy import select, update, insert, delete, func, case, and_
+from sqlalchemy.exc import IntegrityError
+from collections import namedtuple
 import hashlib
+import time
 from datetime import datetime, timedelta
-from src.models.user import User, UserSession, db
+from src.models.user import RevocationWatermark, UserSession, db
+from src.utils.cache import get_cached_user, stats_cache
+from src.utils.revocation import revocation_index
+from src.utils.session_writer import session_writer
+from src.utils.metrics import SESSIONS_CREATED, SESSIONS_REVOKED
+
+# Resultado de uma operação em lotes: linhas afetadas, nº de lotes e duração
+BatchResult = namedtuple('BatchResult', ['rows', 'batches', 'elapsed_ms'])
 
 def token_required(f):
     """Decorator para rotas que requerem autenticação"""
@@ -11,8 +22,7 @@ def token_required(f):
     def decorated(*args, **kwargs):
         try:
             verify_jwt_in_request()
-            current_user_id = get_jwt_identity()
-            current_user = User.query.get(current_user_id)
+            current_user = get_cached_user(get_jwt_identity())
             
             if not current_user or not current_user.is_active:
                 return jsonify({
@@ -36,8 +46,7 @@ def admin_required(f):
     def decorated(*args, **kwargs):
         try:
             verify_jwt_in_request()
-            current_user_id = get_jwt_identity()
-            current_user = User.query.get(current_user_id)
+            current_user = get_cached_user(get_jwt_identity())
             
             if not current_user or not current_user.is_active:
                 return jsonify({
@@ -45,8 +54,12 @@ def admin_required(f):
                     'message': 'Token inválido ou usuário inativo'
                 }), 401
             
-            # Aqui você pode adicionar lógica para verificar se é admin
-            # Por exemplo, verificar um campo 'is_admin' no modelo User
+            # Administradores são definidos por configuração (ADMIN_USERNAMES)
+            if current_user.username not in current_app.config.get('ADMIN_USERNAMES', ('admin',)):
+                return jsonify({
+                    'error': 'Forbidden',
+                    'message': 'Acesso restrito a administradores'
+                }), 403
             
             return f(current_user, *args, **kwargs)
         except Exception as e:
@@ -63,24 +76,63 @@ def hash_token(token):
     return hashlib.sha256(token.encode()).hexdigest()
 
 
-def create_user_session(user_id, token, expires_in_seconds=3600):
-    """Cria uma nova sessão de usuário"""
+def get_request_token():
+    """Extrai o JWT bruto do header Authorization (Bearer)"""
+    auth_header = request.headers.get('Authorization')
+    if auth_header and auth_header.startswith('Bearer '):
+        return auth_header.split(' ')[1]
+    return None
+
+
+def is_token_revoked(jwt_payload):
+    """Consulta o índice de revogação em memória para o token da requisição
+
+    Além da sessão do próprio token de acesso, confere a sessão de login do
+    claim ``sid`` (refresh tokens e acessos emitidos pelo refresh): revogá-la
+    no logout recusa o refresh token vinculado a ela.
+    """
+    token_hashes = []
+    if jwt_payload.get('type') == 'access':
+        token = get_request_token()
+        if token:
+            token_hashes.append(hash_token(token))
+    if jwt_payload.get('sid'):
+        token_hashes.append(jwt_payload['sid'])
+    
+    return revocation_index.is_revoked(token_hashes, jwt_payload.get('sub'), jwt_payload.get('iat'))
+
+
+def create_user_session(user_id, token, expires_in_seconds=3600, commit=True):
+    """Cria uma nova sessão de usuário
+
+    Sessões expiradas são removidas em background pelo SessionReaper
+    (src/utils/maintenance.py), fora do caminho crítico do login.
+
+    Com ``commit=False`` a sessão entra na transação do chamador (ex.: o
+    login grava sessão e preferências em um único commit), que deve chamar
+    ``session_committed(user_id, session)`` depois de confirmar. No modo write-behind
+    a sessão não passa pela transação: vai para a fila do ``session_writer``
+    em ``session_committed``.
+    """
     try:
-        # Remove sessões expiradas do usuário
-        cleanup_expired_sessions(user_id)
-        
         # Cria nova sessão
         expires_at = datetime.utcnow() + timedelta(seconds=expires_in_seconds)
         token_hash = hash_token(token)
         
         session = UserSession(
-            user_id=user_id,
+            user_id=int(user_id),
             token_hash=token_hash,
-            expires_at=expires_at
+            expires_at=expires_at,
+            created_at=datetime.utcnow(),
+            is_active=True
         )
         
-        db.session.add(session)
-        db.session.commit()
+        if not session_writer.enabled:
+            db.session.add(session)
+            if commit:
+                db.session.commit()
+        if commit:
+            session_committed(user_id, session)
         
         return session
     except Exception as e:
@@ -88,89 +140,274 @@ def create_user_session(user_id, token, expires_in_seconds=3600):
         raise e
 
 
-def cleanup_expired_sessions(user_id=None):
-    """Remove sessões expiradas do banco"""
-    try:
-        query = UserSession.query.filter(UserSession.expires_at < datetime.utcnow())
+def session_committed(user_id, session):
+    """Efeitos de uma sessão nova que só valem após o commit"""
+    if session_writer.enabled:
+        session_writer.enqueue(session)
+    stats_cache.invalidate(int(user_id))
+    SESSIONS_CREATED.inc()
+
+
+def _run_in_batches(build_statement, batch_size=None):
+    """Executa um DELETE/UPDATE em lotes, um lote por transação
+
+    Cada lote é confirmado separadamente, liberando o lock de escrita do
+    SQLite entre lotes (com uma pausa opcional) para que logins concorrentes
+    não fiquem bloqueados durante operações grandes.
+    """
+    batch_size = batch_size or current_app.config.get('SESSION_BATCH_SIZE', 1000)
+    pause = current_app.config.get('SESSION_BATCH_PAUSE', 0.005)
+    started = time.perf_counter()
+    rows = 0
+    batches = 0
+    
+    while True:
+        result = db.session.execute(
+            build_statement(batch_size),
+            execution_options={'synchronize_session': False}
+        )
+        db.session.commit()
+        batches += 1
+        rows += result.rowcount
         
-        if user_id:
-            query = query.filter(UserSession.user_id == user_id)
+        if result.rowcount < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    
+    # Sem synchronize_session e com expire_on_commit=False, objetos já
+    # carregados manteriam o estado anterior ao lote
+    db.session.expire_all()
+    
+    return BatchResult(
+        rows=rows,
+        batches=batches,
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 3)
+    )
+
+
+def cleanup_expired_sessions(user_id=None, batch_size=None):
+    """Remove sessões expiradas do banco em lotes (DELETE por conjunto)"""
+    try:
+        now = datetime.utcnow()
         
-        expired_sessions = query.all()
+        def statement_for(is_active):
+            def build_statement(limit):
+                expired_ids = select(UserSession.id).where(
+                    UserSession.expires_at < now,
+                    UserSession.is_active == is_active
+                )
+                if user_id:
+                    expired_ids = expired_ids.where(UserSession.user_id == user_id)
+                return delete(UserSession).where(
+                    UserSession.id.in_(expired_ids.limit(limit).scalar_subquery())
+                )
+            return build_statement
         
-        for session in expired_sessions:
-            db.session.delete(session)
+        active = _run_in_batches(statement_for(True), batch_size)
+        inactive = _run_in_batches(statement_for(False), batch_size)
+        SESSIONS_REVOKED.inc(active.rows, reason='expired')
         
-        db.session.commit()
-        return len(expired_sessions)
+        return BatchResult(
+            rows=active.rows + inactive.rows,
+            batches=active.batches + inactive.batches,
+            elapsed_ms=round(active.elapsed_ms + inactive.elapsed_ms, 3)
+        )
     except Exception as e:
         db.session.rollback()
         raise e
 
 
-def revoke_user_session(user_id, token):
-    """Revoga uma sessão específica do usuário"""
+def revoke_user_session(user_id, token, expires_at=None, session_hash=None):
+    """Revoga uma sessão específica do usuário e a sessão de login vinculada a ela
+
+    ``session_hash`` (claim ``sid``) é a sessão do login que emitiu o refresh
+    token; revogá-la recusa o refresh token e os acessos renovados por ele.
+    As sessões revogadas ficam na lista de revogação até o refresh token
+    expirar (``expires_at`` estendido), não só até o fim do token de acesso.
+
+    ``expires_at`` (expiração do token) permite, no modo write-behind,
+    revogar uma sessão que ainda está na fila de outro worker.
+    """
     try:
-        token_hash = hash_token(token)
-        session = UserSession.query.filter_by(
-            user_id=user_id,
-            token_hash=token_hash
-        ).first()
+        token_hashes = [hash_token(token)]
+        if session_hash and session_hash != token_hashes[0]:
+            token_hashes.append(session_hash)
+        for token_hash in token_hashes:
+            session_writer.sync(token_hash=token_hash)
         
-        if session:
-            session.is_active = False
-            db.session.commit()
-            return True
+        sessions = {
+            session.token_hash: session
+            for session in UserSession.query.filter(
+                UserSession.user_id == user_id,
+                UserSession.token_hash.in_(token_hashes)
+            )
+        }
+        revoke_until = datetime.utcnow() + revocation_index.refresh_ttl
+        revoked = []
+        logged_out = 0
+        
+        for token_hash in token_hashes:
+            session = sessions.get(token_hash)
+            if session is None:
+                if not session_writer.enabled or expires_at is None:
+                    continue
+                # A sessão pode estar na fila de outro processo: grava-a já
+                # revogada; o insert pendente colide no token_hash e é descartado
+                session = UserSession(
+                    user_id=int(user_id),
+                    token_hash=token_hash,
+                    expires_at=revoke_until,
+                    is_active=False
+                )
+                db.session.add(session)
+            else:
+                if session.is_active:
+                    logged_out += 1
+                session.is_active = False
+                session.expires_at = max(session.expires_at, revoke_until)
+            revoked.append(session)
         
-        return False
+        if not revoked:
+            return False
+        
+        db.session.commit()
+        if logged_out:
+            SESSIONS_REVOKED.inc(logged_out, reason='logout')
+        for session in revoked:
+            revocation_index.revoke_token(session.token_hash, session.expires_at)
+        stats_cache.invalidate(int(user_id))
+        return True
     except Exception as e:
         db.session.rollback()
         raise e
 
 
-def revoke_all_user_sessions(user_id):
-    """Revoga todas as sessões de um usuário"""
+def store_revocation_watermark(user_id, revoked_before):
+    """Grava o watermark de "revogar todas" do usuário na transação corrente (sem commit)"""
+    result = db.session.execute(
+        update(RevocationWatermark).where(RevocationWatermark.user_id == user_id).values(
+            revoked_before=revoked_before, updated_at=datetime.utcnow()
+        )
+    )
+    if result.rowcount:
+        return
+    
+    # Primeiro "revogar todas" do usuário; outro worker pode criar a linha ao mesmo tempo
     try:
-        sessions = UserSession.query.filter_by(user_id=user_id).all()
+        with db.session.begin_nested():
+            db.session.execute(insert(RevocationWatermark).values(
+                user_id=user_id, revoked_before=revoked_before, updated_at=datetime.utcnow()
+            ))
+    except IntegrityError:
+        db.session.execute(
+            update(RevocationWatermark).where(RevocationWatermark.user_id == user_id).values(
+                revoked_before=revoked_before, updated_at=datetime.utcnow()
+            )
+        )
+
+
+def revoke_all_user_sessions(user_id, batch_size=None):
+    """Revoga todas as sessões ativas de um usuário em lotes (UPDATE por conjunto)
+
+    O watermark é gravado e confirmado antes dos lotes, junto com alterações
+    pendentes do chamador: a partir desse commit todos os workers recusam os
+    tokens do usuário, mesmo que algum lote falhe depois.
+    """
+    try:
+        user_id = int(user_id)
+        session_writer.sync(user_id=user_id)
         
-        for session in sessions:
-            session.is_active = False
+        # Hashes das sessões ainda válidas, para o índice de revogação
+        revoked = db.session.execute(
+            select(UserSession.token_hash, UserSession.expires_at).where(
+                UserSession.user_id == user_id,
+                UserSession.is_active == True,  # noqa: E712
+                UserSession.expires_at > datetime.utcnow()
+            )
+        ).all()
         
+        revoked_before = int(time.time())
+        store_revocation_watermark(user_id, revoked_before)
         db.session.commit()
-        return len(sessions)
+        revocation_index.revoke_user(user_id, revoked, revoked_before)
+        
+        def build_statement(limit):
+            active_ids = select(UserSession.id).where(
+                UserSession.user_id == user_id,
+                UserSession.is_active == True  # noqa: E712
+            ).limit(limit)
+            return update(UserSession).where(
+                UserSession.id.in_(active_ids.scalar_subquery())
+            ).values(is_active=False)
+        
+        result = _run_in_batches(build_statement, batch_size)
+        SESSIONS_REVOKED.inc(result.rows, reason='revoke_all')
+        stats_cache.invalidate(user_id)
+        return result
     except Exception as e:
         db.session.rollback()
         raise e
 
 
+def _session_counters(user_id):
+    """Contadores de sessão do usuário em uma única consulta agregada
+
+    Sessões ainda na fila write-behind deste processo são somadas em
+    memória (sem gravar a fila em uma leitura). A consulta ignora os tokens
+    dessa cópia, para não contá-los duas vezes se a fila for gravada nesse
+    meio-tempo.
+    """
+    pending = session_writer.pending_for(user_id)
+    now = datetime.utcnow()
+    is_valid = and_(UserSession.is_active == True, UserSession.expires_at > now)  # noqa: E712
+    
+    query = select(
+        func.count(UserSession.id),
+        func.max(UserSession.created_at),
+        func.coalesce(func.sum(case((is_valid, 1), else_=0)), 0),
+        func.min(case((is_valid, UserSession.expires_at), else_=None))
+    ).where(UserSession.user_id == user_id)
+    if pending:
+        query = query.where(UserSession.token_hash.not_in([record['token_hash'] for record in pending]))
+    total_logins, last_login, active_sessions, next_expiry = db.session.execute(query).one()
+    
+    for record in pending:
+        total_logins += 1
+        last_login = max(last_login or record['created_at'], record['created_at'])
+        if record['is_active'] and record['expires_at'] > now:
+            active_sessions += 1
+            next_expiry = min(next_expiry or record['expires_at'], record['expires_at'])
+    
+    return {
+        'total_logins': total_logins,
+        'last_login': last_login,
+        'sessions_count': int(active_sessions)
+    }, next_expiry
+
+
 def get_user_stats(user):
-    """Calcula estatísticas do usuário"""
+    """Calcula estatísticas do usuário
+
+    Os contadores de sessão ficam em cache por usuário e são invalidados ao
+    criar ou revogar sessões; a validade da entrada nunca passa da próxima
+    expiração de sessão ativa, para que ``sessions_count`` não fique defasado.
+    """
     try:
-        # Conta total de sessões (logins)
-        total_logins = UserSession.query.filter_by(user_id=user.id).count()
-        
-        # Última sessão ativa
-        last_session = UserSession.query.filter_by(
-            user_id=user.id
-        ).order_by(UserSession.created_at.desc()).first()
-        
-        last_login = last_session.created_at if last_session else None
+        counters = stats_cache.get(user.id)
+        if counters is None:
+            counters, next_expiry = _session_counters(user.id)
+            ttl = (next_expiry - datetime.utcnow()).total_seconds() if next_expiry else None
+            stats_cache.set(user.id, counters, ttl=ttl)
         
         # Idade da conta em dias
         account_age = datetime.utcnow() - user.created_at
-        account_age_days = account_age.days
-        
-        # Sessões ativas
-        active_sessions = UserSession.query.filter_by(
-            user_id=user.id,
-            is_active=True
-        ).filter(UserSession.expires_at > datetime.utcnow()).count()
         
         return {
-            'total_logins': total_logins,
-            'last_login': last_login,
-            'account_age_days': account_age_days,
-            'sessions_count': active_sessions
+            'total_logins': counters['total_logins'],
+            'last_login': counters['last_login'],
+            'account_age_days': account_age.days,
+            'sessions_count': counters['sessions_count']
         }
     except Exception as e:
         return {
@@ -221,17 +458,45 @@ def validate_password_strength(password):
     return feedback
 
 
+def password_hasher_busy_response(error):
+    """Resposta 503 para quando o pool de hashing de senhas está saturado"""
+    response = jsonify({
+        'error': 'Service Unavailable',
+        'message': 'Servidor ocupado, tente novamente em instantes'
+    })
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 503
+
+
+def rate_limited_response(error):
+    """Resposta 429 para tentativas acima do limite (antes de qualquer bcrypt)"""
+    response = jsonify({
+        'error': 'Too Many Requests',
+        'message': 'Muitas tentativas, tente novamente mais tarde'
+    })
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 429
+
+
 def rate_limit_key(identifier, endpoint):
     """Gera chave para rate limiting"""
     return f"rate_limit:{endpoint}:{identifier}"
 
 
 def get_client_ip():
-    """Obtém IP do cliente considerando proxies"""
-    if request.headers.get('X-Forwarded-For'):
-        return request.headers.get('X-Forwarded-For').split(',')[0].strip()
-    elif request.headers.get('X-Real-IP'):
+    """Obtém IP do cliente considerando proxies
+
+    Só confia nos ``TRUSTED_PROXY_COUNT`` últimos saltos do X-Forwarded-For
+    (os adicionados pelos nossos proxies); o início do header é controlado
+    pelo cliente e não pode ser usado para rate limiting.
+    """
+    trusted = current_app.config.get('TRUSTED_PROXY_COUNT', 1)
+    forwarded_for = request.headers.get('X-Forwarded-For')
+    if trusted and forwarded_for:
+        hops = [hop.strip() for hop in forwarded_for.split(',') if hop.strip()]
+        if hops:
+            return hops[-min(trusted, len(hops))]
+    if trusted and request.headers.get('X-Real-IP'):
         return request.headers.get('X-Real-IP')
-    else:
-        return request.remote_addr
+    return request.remote_addr
 
@@ -0,0 +1,102 @@
+import time
+import threading
+from src.models.user import User, db
+
+
+class AvailabilityIndex:
+    """Conjuntos em memória de usernames e emails em uso
+
+    Carregados do banco na inicialização, atualizados pelo cadastro e pela
+    edição de perfil deste processo e recarregados a cada ``sync_interval``
+    segundos para enxergar as mudanças feitas por outros workers.
+
+    Um valor fora do conjunto é respondido como disponível sem consultar o
+    banco (o caso comum enquanto o usuário digita no cadastro). Um valor no
+    conjunto é confirmado no banco, porque pode ter sido liberado por uma
+    troca de username/email em outro worker; valores liberados saem do
+    conjunto. A resposta é apenas informativa: o cadastro continua
+    verificando no banco antes de gravar.
+    """
+
+    FIELDS = ('username', 'email')
+
+    def __init__(self):
+        self.sync_interval = 300
+
+        self._lock = threading.Lock()
+        self._taken = {field: set() for field in self.FIELDS}
+        self._synced_at = 0.0
+        self.memory_answers = 0
+        self.db_checks = 0
+
+    def init_app(self, app):
+        """Lê a configuração e carrega os valores em uso do banco"""
+        self.sync_interval = float(app.config.get('AVAILABILITY_SYNC_INTERVAL', self.sync_interval))
+        with app.app_context():
+            self.load()
+        app.extensions['availability_index'] = self
+
+    def load(self):
+        """Recarrega usernames e emails de todos os usuários (inclusive inativos)"""
+        taken = {field: set() for field in self.FIELDS}
+        for username, email in db.session.query(User.username, User.email).yield_per(1000):
+            taken['username'].add(username)
+            taken['email'].add(email)
+
+        with self._lock:
+            self._taken = taken
+            self._synced_at = time.monotonic()
+        return len(taken['username'])
+
+    def check(self, **values):
+        """Disponibilidade de cada campo informado (ex.: ``username='maria'``)"""
+        self._maintain()
+
+        with self._lock:
+            candidates = {field: value for field, value in values.items() if value in self._taken[field]}
+            self.memory_answers += len(values) - len(candidates)
+            if candidates:
+                self.db_checks += len(candidates)
+
+        taken = User.find_taken(**candidates) if candidates else set()
+        for field, value in candidates.items():
+            if field not in taken:
+                self.discard(**{field: value})
+
+        return {field: field not in taken for field in values}
+
+    def add(self, **values):
+        """Registra valores que passaram a estar em uso"""
+        with self._lock:
+            for field, value in values.items():
+                if value:
+                    self._taken[field].add(value)
+
+    def discard(self, **values):
+        """Remove valores liberados (ex.: username antigo após edição do perfil)"""
+        with self._lock:
+            for field, value in values.items():
+                self._taken[field].discard(value)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'usernames': len(self._taken['username']),
+                'emails': len(self._taken['email']),
+                'memory_answers': self.memory_answers,
+                'db_checks': self.db_checks,
+                'last_sync_seconds_ago': round(time.monotonic() - self._synced_at, 1) if self._synced_at else None
+            }
+
+    def _maintain(self):
+        now = time.monotonic()
+        if self.sync_interval > 0 and now - self._synced_at > self.sync_interval:
+            # Marca antes de consultar para que apenas uma thread recarregue
+            self._synced_at = now
+            try:
+                self.load()
+            except Exception:
+                db.session.rollback()
+
+
+availability_index = AvailabilityIndex()
@@ -0,0 +1,139 @@
+import time
+import threading
+from collections import OrderedDict, namedtuple
+from src.models.user import User, db
+
+
+class TTLCache:
+    """Cache LRU com expiração por TTL, seguro para uso entre threads"""
+
+    def __init__(self, max_size=1024, ttl=30):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, max_size=None, ttl=None):
+        """Ajusta limites do cache e descarta o conteúdo atual"""
+        with self._lock:
+            if max_size is not None:
+                self.max_size = max_size
+            if ttl is not None:
+                self.ttl = ttl
+            self._data.clear()
+
+    def get(self, key):
+        """Retorna o valor em cache ou None (conta hit/miss)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value, ttl=None):
+        """Armazena o valor, removendo o item menos usado se necessário
+
+        ``ttl`` permite uma validade menor que a padrão para este item.
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if self.max_size <= 0 or ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        """Remove uma chave do cache"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """Contadores de hit/miss e ocupação"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+class UserSnapshot(namedtuple('UserSnapshot', [
+    'id', 'username', 'email', 'created_at', 'updated_at', 'is_active'
+])):
+    """Cópia imutável e enxuta de um User, segura para compartilhar entre requisições"""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+            is_active=user.is_active
+        )
+
+    def to_public_dict(self):
+        """Mesmo formato de User.to_public_dict"""
+        return {
+            'id': self.id,
+            'username': self.username,
+            'email': self.email,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'is_active': self.is_active
+        }
+
+
+# Cache de usuários autenticados, indexado pelo id do usuário. A invalidação é
+# por processo: nos outros workers, uma alteração (perfil, senha, conta
+# desativada) só aparece quando a entrada expira, em até USER_CACHE_TTL segundos
+user_cache = TTLCache()
+
+# Cache dos contadores de sessão por usuário (get_user_stats)
+stats_cache = TTLCache()
+
+
+def get_cached_user(user_id):
+    """Retorna o snapshot do usuário, consultando o banco apenas em cache miss"""
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+    snapshot = user_cache.get(user_id)
+    if snapshot is None:
+        user = db.session.get(User, user_id)
+        if not user:
+            return None
+        snapshot = UserSnapshot.from_user(user)
+        user_cache.set(user_id, snapshot)
+    return snapshot
+
+
+def invalidate_cached_user(user_id):
+    """Descarta o snapshot do usuário após alterações no perfil ou sessões"""
+    try:
+        user_cache.invalidate(int(user_id))
+    except (TypeError, ValueError):
+        pass
@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta
+from sqlalchemy import select, update, insert, func
+from sqlalchemy.exc import IntegrityError
+from src.models.user import User, UserSession, db
+from src.models.stats import ApiCounter, SignupBucket
+
+# Contadores mantidos incrementalmente
+USERS_TOTAL = 'users_total'
+USERS_ACTIVE = 'users_active'
+# Sessões ativas e não expiradas, recontadas pelo SessionReaper a cada ciclo
+# (fora das transações de login/refresh/logout, que não disputam esta linha)
+SESSIONS_ACTIVE = 'sessions_active'
+
+COUNTERS = (USERS_TOTAL, USERS_ACTIVE, SESSIONS_ACTIVE)
+
+
+def increment_counter(name, delta=1):
+    """Soma ``delta`` ao contador na transação corrente (sem commit)"""
+    if delta:
+        db.session.execute(
+            update(ApiCounter).where(ApiCounter.name == name).values(value=ApiCounter.value + delta)
+        )
+
+
+def record_signup(created_at=None):
+    """Contabiliza um cadastro: totais e bucket do dia, na transação corrente"""
+    day = (created_at or datetime.utcnow()).date()
+    increment_counter(USERS_TOTAL)
+    increment_counter(USERS_ACTIVE)
+
+    result = db.session.execute(
+        update(SignupBucket).where(SignupBucket.day == day).values(count=SignupBucket.count + 1)
+    )
+    if result.rowcount:
+        return
+
+    # Primeiro cadastro do dia; outro worker pode criar o bucket ao mesmo tempo
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(SignupBucket).values(day=day, count=1))
+    except IntegrityError:
+        db.session.execute(
+            update(SignupBucket).where(SignupBucket.day == day).values(count=SignupBucket.count + 1)
+        )
+
+
+def count_active_sessions():
+    """Sessões ativas e ainda não expiradas, pela tabela base"""
+    return db.session.scalar(
+        select(func.count(UserSession.id)).where(
+            UserSession.is_active == True,  # noqa: E712
+            UserSession.expires_at > datetime.utcnow()
+        )
+    )
+
+
+def refresh_sessions_counter():
+    """Recalcula o contador de sessões ativas (sem commit)"""
+    value = count_active_sessions()
+    result = db.session.execute(
+        update(ApiCounter).where(ApiCounter.name == SESSIONS_ACTIVE).values(value=value)
+    )
+    if not result.rowcount:
+        db.session.add(ApiCounter(name=SESSIONS_ACTIVE, value=value))
+    return value
+
+
+def rebuild_counters(days=7):
+    """Recalcula os contadores a partir das tabelas base (sem commit)"""
+    values = {
+        USERS_TOTAL: db.session.scalar(select(func.count(User.id))),
+        USERS_ACTIVE: db.session.scalar(select(func.count(User.id)).where(User.is_active == True)),  # noqa: E712
+        SESSIONS_ACTIVE: count_active_sessions()
+    }
+
+    db.session.query(ApiCounter).delete()
+    db.session.add_all(ApiCounter(name=name, value=value) for name, value in values.items())
+
+    # Buckets recentes, agrupados em Python para não depender de date() do dialeto
+    since = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
+    buckets = {}
+    for created_at in db.session.scalars(select(User.created_at).where(User.created_at >= since)):
+        buckets[created_at.date()] = buckets.get(created_at.date(), 0) + 1
+
+    db.session.query(SignupBucket).filter(SignupBucket.day >= since.date()).delete()
+    db.session.add_all(SignupBucket(day=day, count=count) for day, count in buckets.items())
+    db.session.flush()
+    return values
+
+
+def seed_counters():
+    """Popula os contadores na primeira inicialização (tabela vazia)"""
+    existing = set(db.session.scalars(select(ApiCounter.name)))
+    if existing.issuperset(COUNTERS):
+        return False
+
+    rebuild_counters()
+    db.session.commit()
+    return True
+
+
+def get_counters(days=7):
+    """Lê os contadores materializados: custo constante, independente do tamanho das tabelas"""
+    values = dict(db.session.execute(select(ApiCounter.name, ApiCounter.value)).all())
+
+    today = datetime.utcnow().date()
+    buckets = dict(db.session.execute(
+        select(SignupBucket.day, SignupBucket.count).where(SignupBucket.day > today - timedelta(days=days))
+    ).all())
+
+    return {
+        USERS_TOTAL: values.get(USERS_TOTAL, 0),
+        USERS_ACTIVE: values.get(USERS_ACTIVE, 0),
+        SESSIONS_ACTIVE: values.get(SESSIONS_ACTIVE, 0),
+        'created_today': buckets.get(today, 0),
+        'created_this_week': sum(buckets.values())
+    }
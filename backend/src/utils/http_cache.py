@@ -0,0 +1,99 @@
+import hashlib
+import threading
+from functools import wraps
+from flask import request, make_response, current_app
+from src.models.user import db
+
+
+class ConditionalResponses:
+    """Respostas condicionais (ETag / If-None-Match) para GETs somente leitura
+
+    Cada rota decorada informa um *validador*: uma função barata que retorna
+    as partes que determinam o conteúdo da resposta (ex.: ``updated_at`` do
+    usuário e das preferências). O ETag forte é o hash dessas partes; se o
+    cliente já tiver a mesma versão, a resposta é ``304 Not Modified`` e o
+    corpo da rota não é executado.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def init_app(self, app):
+        self.enabled = bool(app.config.get('HTTP_CACHE_ENABLED', True))
+        app.extensions['conditional_responses'] = self
+
+    def conditional(self, validator, cache_control='private, no-cache', vary='Authorization'):
+        """Decorator que responde 304 quando o ETag do validador confere
+
+        ``validator`` roda depois da autenticação da rota e retorna uma tupla
+        (ou ``None`` quando não há versão conhecida, ex.: usuário inexistente;
+        nesse caso a rota executa normalmente e trata o erro).
+        ``cache_control`` pode ser uma função, avaliada a cada resposta.
+        """
+        def decorator(f):
+            @wraps(f)
+            def decorated(*args, **kwargs):
+                if not self.enabled:
+                    return f(*args, **kwargs)
+
+                try:
+                    parts = validator()
+                except Exception:
+                    db.session.rollback()
+                    parts = None
+                if parts is None:
+                    return f(*args, **kwargs)
+
+                etag = make_etag(request.endpoint, parts)
+                if request.if_none_match.contains_weak(etag):
+                    self._record(request.endpoint, not_modified=True)
+                    response = current_app.response_class(status=304)
+                else:
+                    self._record(request.endpoint, not_modified=False)
+                    response = make_response(f(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = cache_control() if callable(cache_control) else cache_control
+                if vary:
+                    response.vary.add(vary)
+                return response
+            return decorated
+        return decorator
+
+    def stats(self):
+        """Requisições condicionáveis e taxa de 304 por endpoint"""
+        with self._lock:
+            endpoints = {name: dict(counts) for name, counts in self._endpoints.items()}
+
+        total = sum(counts['requests'] for counts in endpoints.values())
+        not_modified = sum(counts['not_modified'] for counts in endpoints.values())
+        for counts in endpoints.values():
+            counts['hit_rate'] = round(counts['not_modified'] / counts['requests'], 4) if counts['requests'] else 0.0
+
+        return {
+            'enabled': self.enabled,
+            'requests': total,
+            'not_modified': not_modified,
+            'hit_rate': round(not_modified / total, 4) if total else 0.0,
+            'endpoints': endpoints
+        }
+
+    def _record(self, endpoint, not_modified):
+        with self._lock:
+            counts = self._endpoints.setdefault(endpoint, {'requests': 0, 'not_modified': 0})
+            counts['requests'] += 1
+            if not_modified:
+                counts['not_modified'] += 1
+
+
+def make_etag(endpoint, parts):
+    """ETag forte (sem aspas) derivado do endpoint e das partes do validador"""
+    digest = hashlib.sha256(repr((endpoint, parts)).encode()).hexdigest()
+    return digest[:32]
+
+
+conditional_responses = ConditionalResponses()
@@ -0,0 +1,189 @@
+import os
+import random
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import insert, or_, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from src.models.user import MaintenanceLease, db
+from src.utils.auth_utils import cleanup_expired_sessions
+from src.utils.counters import refresh_sessions_counter
+
+LEASE_NAME = 'session_reaper'
+
+
+class SessionReaper:
+    """Agendador em background que remove sessões expiradas em lote
+
+    Substitui a limpeza feita a cada login. Roda em uma thread daemon por
+    processo, iniciada sob demanda na primeira requisição (assim cada worker
+    do gunicorn, após o fork, cria a sua). Apenas o detentor do lease
+    ``session_reaper`` na tabela maintenance_leases (líder) executa a
+    limpeza, então há um único reaper por banco, mesmo com vários hosts.
+
+    O líder renova o lease a cada ciclo; os demais tentam assumi-lo a cada
+    ciclo e conseguem quando ele expira (líder morto ou travado).
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.interval = 300
+        self.jitter = 30
+        self.lease_ttl = None
+        self.holder_id = None
+
+        self._app = None
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self.is_leader = False
+        self.runs = 0
+        self.last_run = None
+        self.next_run_at = None
+
+    def init_app(self, app):
+        """Lê a configuração e registra a inicialização sob demanda"""
+        self._app = app
+        self.enabled = bool(app.config.get('SESSION_REAPER_ENABLED', True))
+        self.interval = float(app.config.get('SESSION_REAPER_INTERVAL', self.interval))
+        self.jitter = float(app.config.get('SESSION_REAPER_JITTER', self.jitter))
+        # Padrão: sobrevive a um ciclo perdido do líder antes de outro assumir
+        self.lease_ttl = float(app.config.get('SESSION_REAPER_LEASE_TTL') or 2 * (self.interval + self.jitter))
+
+        app.before_request(self.ensure_started)
+        app.extensions['session_reaper'] = self
+
+    def ensure_started(self):
+        """Inicia a thread do agendador neste processo, se ainda não iniciada"""
+        if not self.enabled or self._pid == os.getpid():
+            return
+
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # Após um fork o lease herdado pertence ao processo pai
+            self.holder_id = self._new_holder_id()
+            self.is_leader = False
+            self._stop.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._loop, name='session-reaper', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Interrompe o agendador deste processo e libera o lease, se for o líder"""
+        self._stop.set()
+        if self.is_leader:
+            self.release_leadership()
+
+    def tick(self):
+        """Um ciclo do agendador: renova (ou disputa) o lease e, se líder, limpa"""
+        if not self.acquire_leadership():
+            return None
+        return self.run_once()
+
+    def run_once(self, trigger='schedule'):
+        """Remove sessões expiradas, reconta as ativas e registra o relatório"""
+        with self._run_lock:
+            started_at = datetime.utcnow()
+            with self._app.app_context():
+                result = cleanup_expired_sessions()
+                active_sessions = refresh_sessions_counter()
+                db.session.commit()
+
+            self.runs += 1
+            self.last_run = {
+                'started_at': started_at.isoformat(),
+                'trigger': trigger,
+                'expired_sessions': result.rows,
+                'active_sessions': active_sessions,
+                'batches': result.batches,
+                'elapsed_ms': result.elapsed_ms
+            }
+            return self.last_run
+
+    def status(self):
+        return {
+            'enabled': self.enabled,
+            'running': self._pid == os.getpid() and self._thread is not None and self._thread.is_alive(),
+            'leader': self.is_leader,
+            'holder': self.holder_id,
+            'lease_ttl_seconds': self.lease_ttl,
+            'interval_seconds': self.interval,
+            'jitter_seconds': self.jitter,
+            'runs': self.runs,
+            'last_run': self.last_run,
+            'next_run_at': self.next_run_at.isoformat() if self.next_run_at else None
+        }
+
+    def _loop(self):
+        while True:
+            delay = self.interval + random.uniform(0, self.jitter)
+            self.next_run_at = datetime.utcnow() + timedelta(seconds=delay)
+            if self._stop.wait(delay):
+                return
+
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"⚠️  Falha na limpeza de sessões expiradas: {e}")
+
+    def acquire_leadership(self):
+        """Obtém ou renova o lease no banco; retorna se este processo é o líder
+
+        Um único UPDATE condicional (lease próprio ou expirado) decide a
+        disputa de forma atômica; se a linha ainda não existe, o INSERT que
+        falhar por chave duplicada perde.
+        """
+        if self.holder_id is None:
+            self.holder_id = self._new_holder_id()
+
+        now = datetime.utcnow()
+        values = {'holder': self.holder_id, 'expires_at': now + timedelta(seconds=self.lease_ttl)}
+        with self._app.app_context():
+            try:
+                result = db.session.execute(
+                    update(MaintenanceLease).where(
+                        MaintenanceLease.name == LEASE_NAME,
+                        or_(MaintenanceLease.holder == self.holder_id, MaintenanceLease.expires_at <= now)
+                    ).values(**values)
+                )
+                if result.rowcount == 0:
+                    db.session.execute(insert(MaintenanceLease).values(name=LEASE_NAME, **values))
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                self.is_leader = False
+                return False
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                self.is_leader = False
+                print(f"⚠️  Não foi possível obter o lease do reaper: {e}")
+                return False
+
+        self.is_leader = True
+        return True
+
+    def release_leadership(self):
+        """Expira o lease deste processo para que outro assuma no próximo ciclo"""
+        with self._app.app_context():
+            try:
+                db.session.execute(
+                    update(MaintenanceLease).where(
+                        MaintenanceLease.name == LEASE_NAME,
+                        MaintenanceLease.holder == self.holder_id
+                    ).values(expires_at=datetime.utcnow())
+                )
+                db.session.commit()
+            except SQLAlchemyError:
+                db.session.rollback()
+        self.is_leader = False
+
+    @staticmethod
+    def _new_holder_id():
+        return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+session_reaper = SessionReaper()
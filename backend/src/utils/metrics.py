@@ -0,0 +1,457 @@
+import os
+import json
+import time
+import threading
+from flask import request, g
+from src.models.user import db
+from src.utils.cache import user_cache, stats_cache
+from src.utils.http_cache import conditional_responses
+from src.utils.availability import availability_index
+from src.utils.password_hasher import password_hasher
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem lock entre processos
+    fcntl = None
+
+
+# Limites (segundos) dos buckets de latência HTTP
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+
+
+class _ThreadLocalValues:
+    """Valores de uma métrica separados por thread
+
+    Cada thread só escreve no próprio dicionário, então o incremento não
+    precisa de lock; a coleta soma os dicionários de todas as threads. O
+    lock é usado apenas quando uma thread registra seu dicionário.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all = []
+
+    def mine(self):
+        values = getattr(self._local, 'values', None)
+        if values is None:
+            values = self._local.values = {}
+            with self._lock:
+                self._all.append(values)
+        return values
+
+    def each(self):
+        with self._lock:
+            tables = list(self._all)
+        for values in tables:
+            # dict() copia em C sem liberar o GIL: cópia consistente
+            yield dict(values)
+
+
+def _label_key(labelnames, labels):
+    return tuple(str(labels.get(name, '')) for name in labelnames)
+
+
+class Counter:
+    """Contador monotônico com labels
+
+    ``callback`` (opcional) expõe contadores mantidos em outro lugar (ex.:
+    hits dos caches) e retorna pares ``(labels, valor)``.
+    """
+
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self._values = _ThreadLocalValues()
+
+    def inc(self, amount=1, **labels):
+        values = self._values.mine()
+        key = _label_key(self.labelnames, labels)
+        values[key] = values.get(key, 0) + amount
+
+    def collect(self):
+        totals = {}
+        for values in self._values.each():
+            for key, value in values.items():
+                totals[key] = totals.get(key, 0) + value
+        if self.callback is not None:
+            for labels, value in self.callback():
+                key = _label_key(self.labelnames, labels)
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+
+class Histogram:
+    """Histograma com buckets fixos e labels"""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DURATION_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = _ThreadLocalValues()
+
+    def observe(self, value, **labels):
+        values = self._values.mine()
+        key = _label_key(self.labelnames, labels)
+        entry = values.get(key)
+        if entry is None:
+            # [contagem por bucket..., soma, total]
+            entry = values[key] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry[i] += 1
+                break
+        entry[-2] += value
+        entry[-1] += 1
+
+    def collect(self):
+        totals = {}
+        for values in self._values.each():
+            for key, entry in values.items():
+                totals[key] = _add_entries(totals.get(key), list(entry))
+        return totals
+
+
+class Gauge:
+    """Valor instantâneo calculado na coleta (ex.: uso do pool de conexões)
+
+    ``callback`` retorna pares ``(labels, valor)``. Entre processos, gauges
+    são somados apenas para os workers vivos.
+    """
+
+    type = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def collect(self):
+        if self.callback is None:
+            return {}
+        try:
+            return {
+                _label_key(self.labelnames, labels): value
+                for labels, value in self.callback()
+            }
+        except Exception:
+            return {}
+
+
+def _add_entries(left, right):
+    if left is None:
+        return right
+    return [a + b for a, b in zip(left, right)]
+
+
+class MetricsRegistry:
+    """Registro de métricas do processo e agregação entre workers
+
+    Com ``METRICS_DIR`` definido (o ``src/serve.py`` cria um por master), cada
+    worker grava periodicamente um snapshot ``metrics-<pid>.json`` e a coleta
+    soma os arquivos de todos os workers. Snapshots de workers encerrados
+    (ex.: reciclados por ``max_requests``) são incorporados a
+    ``archive.json``, mantendo os contadores monotônicos.
+    """
+
+    def __init__(self):
+        self.directory = None
+        self.flush_interval = 5.0
+        self.token = None
+        self._metrics = {}
+        self._flushed_at = 0.0
+        self._flush_lock = threading.Lock()
+
+    def init_app(self, app):
+        self.directory = app.config.get('METRICS_DIR') or None
+        self.flush_interval = float(app.config.get('METRICS_FLUSH_INTERVAL', self.flush_interval))
+        self.token = app.config.get('METRICS_TOKEN') or None
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+        app.before_request(_start_timer)
+        app.after_request(self._after_request)
+        app.extensions['metrics'] = self
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=(), callback=None):
+        return self.register(Counter(name, documentation, labelnames, callback))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DURATION_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, labelnames=(), callback=None):
+        return self.register(Gauge(name, documentation, labelnames, callback))
+
+    def snapshot(self):
+        """Valores deste processo, em formato serializável"""
+        return {
+            'pid': os.getpid(),
+            'written_at': time.time(),
+            'metrics': {
+                name: [[list(key), value] for key, value in metric.collect().items()]
+                for name, metric in self._metrics.items()
+            }
+        }
+
+    def collect(self):
+        """Valores agregados de todos os workers: ``{nome: {labels: valor}}``"""
+        own = self.snapshot()
+        if not self.directory:
+            return self._merge([own], gauges_from=[own])
+
+        self.flush(own)
+        with self._directory_lock():
+            live, archive = self._read_snapshots()
+        return self._merge(live + archive, gauges_from=live)
+
+    def flush(self, snapshot=None):
+        """Grava o snapshot deste processo (escrita atômica via rename)"""
+        if not self.directory:
+            return
+        snapshot = snapshot or self.snapshot()
+        path = os.path.join(self.directory, f"metrics-{snapshot['pid']}.json")
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(temporary, path)
+        self._flushed_at = time.monotonic()
+
+    def render(self):
+        """Exposição no formato texto do Prometheus (versão 0.0.4)"""
+        values = self.collect()
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.type}')
+            for key, value in sorted(values.get(name, {}).items()):
+                labels = list(zip(metric.labelnames, key))
+                if metric.type == 'histogram':
+                    cumulative = 0
+                    for bound, count in zip(metric.buckets, value):
+                        cumulative += count
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f"{name}_bucket{_format_labels(labels + [('le', le)])} {cumulative}")
+                    lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(value[-2])}')
+                    lines.append(f'{name}_count{_format_labels(labels)} {value[-1]}')
+                else:
+                    lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def _after_request(self, response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            endpoint = request.endpoint or 'unmatched'
+            HTTP_REQUESTS.inc(method=request.method, endpoint=endpoint, status=response.status_code)
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, endpoint=endpoint)
+
+        if self.directory and time.monotonic() - self._flushed_at > self.flush_interval:
+            # Um flush por intervalo, sem bloquear outras threads
+            if self._flush_lock.acquire(blocking=False):
+                try:
+                    self.flush()
+                except OSError:
+                    pass
+                finally:
+                    self._flush_lock.release()
+        return response
+
+    def _read_snapshots(self):
+        live = []
+        archive_path = os.path.join(self.directory, 'archive.json')
+        archive = _read_json(archive_path)
+        archive_changed = False
+
+        for filename in os.listdir(self.directory):
+            if not (filename.startswith('metrics-') and filename.endswith('.json')):
+                continue
+            path = os.path.join(self.directory, filename)
+            snapshot = _read_json(path)
+            if snapshot is None:
+                continue
+            if _pid_alive(snapshot['pid']):
+                live.append(snapshot)
+                continue
+
+            # Worker encerrado: seus contadores passam para o arquivo morto
+            archive = self._merge_snapshot(archive, snapshot)
+            archive_changed = True
+            os.remove(path)
+
+        if archive_changed:
+            temporary = f'{archive_path}.tmp'
+            with open(temporary, 'w') as f:
+                json.dump(archive, f)
+            os.replace(temporary, archive_path)
+        return live, [archive] if archive else []
+
+    def _merge_snapshot(self, archive, snapshot):
+        archive = archive or {'pid': None, 'metrics': {}}
+        merged = self._merge([archive, snapshot], gauges_from=[])
+        archive['metrics'] = {
+            name: [[list(key), value] for key, value in values.items()]
+            for name, values in merged.items()
+        }
+        return archive
+
+    def _merge(self, snapshots, gauges_from):
+        gauge_pids = {id(snapshot) for snapshot in gauges_from}
+        merged = {}
+        for snapshot in snapshots:
+            for name, samples in snapshot['metrics'].items():
+                metric = self._metrics.get(name)
+                if metric is None or (metric.type == 'gauge' and id(snapshot) not in gauge_pids):
+                    continue
+                values = merged.setdefault(name, {})
+                for key, value in samples:
+                    key = tuple(key)
+                    if metric.type == 'histogram':
+                        values[key] = _add_entries(values.get(key), list(value))
+                    else:
+                        values[key] = values.get(key, 0) + value
+        return merged
+
+    def _directory_lock(self):
+        return _FileLock(os.path.join(self.directory, '.lock'))
+
+
+class _FileLock:
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            self._file = open(self.path, 'a')
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._file is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+
+def _start_timer():
+    g.metrics_started = time.perf_counter()
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _pid_alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+metrics = MetricsRegistry()
+
+HTTP_REQUESTS = metrics.counter(
+    'capivara_http_requests_total', 'Requisições HTTP atendidas', ('method', 'endpoint', 'status')
+)
+HTTP_REQUEST_DURATION = metrics.histogram(
+    'capivara_http_request_duration_seconds', 'Latência das requisições HTTP', ('endpoint',)
+)
+AUTH_ATTEMPTS = metrics.counter(
+    'capivara_auth_attempts_total', 'Tentativas de login e cadastro por resultado', ('action', 'outcome')
+)
+SESSIONS_CREATED = metrics.counter(
+    'capivara_sessions_created_total', 'Sessões criadas (logins)'
+)
+SESSIONS_REVOKED = metrics.counter(
+    'capivara_sessions_revoked_total', 'Sessões revogadas ou removidas', ('reason',)
+)
+
+
+# Coletores de estado já mantido por outros componentes (lidos na coleta)
+
+def _cache_lookups():
+    for cache_name, cache in (('user', user_cache), ('stats', stats_cache)):
+        stats = cache.stats()
+        yield {'cache': cache_name, 'result': 'hit'}, stats['hits']
+        yield {'cache': cache_name, 'result': 'miss'}, stats['misses']
+    stats = conditional_responses.stats()
+    yield {'cache': 'http_etag', 'result': 'hit'}, stats['not_modified']
+    yield {'cache': 'http_etag', 'result': 'miss'}, stats['requests'] - stats['not_modified']
+    stats = availability_index.stats()
+    yield {'cache': 'availability', 'result': 'hit'}, stats['memory_answers']
+    yield {'cache': 'availability', 'result': 'miss'}, stats['db_checks']
+
+
+def _db_pool_connections():
+    for bind, engine in db.engines.items():
+        pool = engine.pool
+        labels = {'engine': bind or 'primary'}
+        for state, method in (('size', 'size'), ('checked_out', 'checkedout'),
+                              ('checked_in', 'checkedin'), ('overflow', 'overflow')):
+            if hasattr(pool, method):
+                # QueuePool.overflow() é negativo enquanto o pool não enche
+                yield {'state': state, **labels}, max(0, getattr(pool, method)())
+
+
+def _password_hash_operations():
+    stats = password_hasher.stats()
+    yield {'result': 'completed'}, stats['operations']
+    yield {'result': 'rejected'}, stats['rejected']
+
+
+def _password_hash_pending():
+    yield {}, password_hasher.stats()['pending']
+
+
+CACHE_LOOKUPS = metrics.counter(
+    'capivara_cache_lookups_total', 'Consultas aos caches por resultado', ('cache', 'result'),
+    callback=_cache_lookups
+)
+PASSWORD_HASH_OPERATIONS = metrics.counter(
+    'capivara_password_hash_operations_total', 'Operações de hashing de senha', ('result',),
+    callback=_password_hash_operations
+)
+PASSWORD_HASH_PENDING = metrics.gauge(
+    'capivara_password_hash_pending', 'Operações de hashing em andamento ou na fila',
+    callback=_password_hash_pending
+)
+DB_POOL_CONNECTIONS = metrics.gauge(
+    'capivara_db_pool_connections', 'Conexões dos pools SQLAlchemy por estado e engine', ('state', 'engine'),
+    callback=_db_pool_connections
+)
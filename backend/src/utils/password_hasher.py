@@ -0,0 +1,276 @@
+import os
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+import bcrypt
+
+
+class PasswordHasherBusy(Exception):
+    """Fila de hashing cheia: o cliente deve tentar novamente mais tarde"""
+
+    def __init__(self, retry_after=1):
+        super().__init__('Fila de hashing de senhas saturada')
+        self.retry_after = retry_after
+
+
+# Custo do bcrypt (log2 das iterações): faixa aceita pela biblioteca, padrão
+# do bcrypt.gensalt() e limites da calibração automática (abaixo de 10 o hash
+# fica barato demais para ataques offline)
+BCRYPT_MIN_ROUNDS = 4
+BCRYPT_MAX_ROUNDS = 31
+DEFAULT_ROUNDS = 12
+MIN_ROUNDS = 10
+MAX_ROUNDS = 16
+
+
+def _hash_password(password, rounds=DEFAULT_ROUNDS):
+    """Executa o bcrypt.hashpw no worker e mede o tempo de hash"""
+    started = time.perf_counter()
+    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+    return hashed, time.perf_counter() - started
+
+
+def _check_password(password, password_hash):
+    """Executa o bcrypt.checkpw no worker e mede o tempo de verificação"""
+    started = time.perf_counter()
+    result = bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+    return result, time.perf_counter() - started
+
+
+def hash_rounds(password_hash):
+    """Custo gravado em um hash bcrypt ($2b$12$...), ou None se não reconhecido"""
+    try:
+        prefix, version, rounds = password_hash.split('$', 3)[:3]
+        return int(rounds) if prefix == '' and version.startswith('2') else None
+    except (AttributeError, ValueError):
+        return None
+
+
+def calibrate_rounds(target_ms, min_rounds=MIN_ROUNDS, max_rounds=MAX_ROUNDS, sample_rounds=8):
+    """Maior custo cujo hash leva no máximo ``target_ms`` nesta máquina
+
+    Mede o custo ``sample_rounds`` (rápido) e extrapola: cada custo a mais
+    dobra o tempo do bcrypt.
+    """
+    samples = []
+    for _ in range(3):
+        _, elapsed = _hash_password('calibration', sample_rounds)
+        samples.append(elapsed)
+    per_hash_ms = min(samples) * 1000
+
+    rounds = min_rounds
+    while rounds < max_rounds and per_hash_ms * 2 ** (rounds + 1 - sample_rounds) <= target_ms:
+        rounds += 1
+    return rounds
+
+
+class PasswordHasher:
+    """Pool dedicado para hashing bcrypt com limite de fila (admission control)
+
+    O bcrypt ocupa a CPU por ~250ms por chamada; rodá-lo na thread da
+    requisição trava o worker inteiro. As chamadas são enviadas para um pool
+    de processos com concorrência limitada e, quando há mais de
+    ``max_pending`` operações em andamento, novas chamadas são recusadas com
+    ``PasswordHasherBusy`` (que as rotas convertem em 503 + Retry-After).
+    """
+
+    EXECUTORS = ('process', 'thread', 'inline')
+
+    def __init__(self, app=None):
+        self.executor_type = 'process'
+        self.workers = os.cpu_count() or 1
+        self.max_pending = self.workers * 8
+        self.timeout = 30
+        self.retry_after = 1
+        self.rounds = DEFAULT_ROUNDS
+        self.calibrated = False
+
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+        self._pending = 0
+        self._observers = []
+        self._reset_metrics()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Lê a configuração do pool a partir do app Flask"""
+        executor_type = app.config.get('PASSWORD_HASH_EXECUTOR', self.executor_type)
+        if executor_type not in self.EXECUTORS:
+            raise ValueError(f'PASSWORD_HASH_EXECUTOR inválido: {executor_type}')
+
+        self.executor_type = executor_type
+        self.workers = max(1, int(app.config.get('PASSWORD_HASH_WORKERS', self.workers)))
+        self.max_pending = max(1, int(app.config.get('PASSWORD_HASH_MAX_PENDING', self.workers * 8)))
+        self.timeout = float(app.config.get('PASSWORD_HASH_TIMEOUT', self.timeout))
+        self.retry_after = int(app.config.get('PASSWORD_HASH_RETRY_AFTER', self.retry_after))
+
+        # Custo fixo (BCRYPT_ROUNDS) ou calibrado para BCRYPT_TARGET_MS nesta máquina
+        rounds = str(app.config.get('BCRYPT_ROUNDS', DEFAULT_ROUNDS)).strip().lower()
+        calibrated = rounds == 'auto'
+        if calibrated:
+            rounds = calibrate_rounds(float(app.config.get('BCRYPT_TARGET_MS', 250)))
+        elif not rounds.isdigit() or not BCRYPT_MIN_ROUNDS <= int(rounds) <= BCRYPT_MAX_ROUNDS:
+            raise ValueError(f'BCRYPT_ROUNDS deve ser auto ou estar entre {BCRYPT_MIN_ROUNDS} e {BCRYPT_MAX_ROUNDS}: {rounds}')
+        self.rounds = int(rounds)
+        self.calibrated = calibrated
+
+        self.shutdown()
+        app.extensions['password_hasher'] = self
+
+    def hash(self, password):
+        """Gera o hash bcrypt da senha no pool, com o custo configurado"""
+        hashed, _ = self._submit(_hash_password, password, self.rounds)
+        return hashed
+
+    def verify(self, password, password_hash):
+        """Verifica a senha contra o hash bcrypt no pool"""
+        result, _ = self._submit(_check_password, password, password_hash)
+        return result
+
+    def needs_rehash(self, password_hash):
+        """Indica se o hash deve ser regravado com o custo em uso
+
+        Com custo fixo (BCRYPT_ROUNDS=N) vale qualquer diferença, inclusive
+        para baixo. Com ``auto`` cada processo/host calibra o seu custo, que
+        pode variar entre eles; aí só hashes abaixo do custo local são
+        regravados, para que workers com calibrações diferentes não regravem
+        a mesma senha alternadamente a cada login.
+        """
+        rounds = hash_rounds(password_hash)
+        if self.calibrated and rounds is not None:
+            return rounds < self.rounds
+        return rounds != self.rounds
+
+    def add_observer(self, observer):
+        """Registra ``observer(queue_wait, hash_time)``, chamado na thread da requisição após cada operação"""
+        if observer not in self._observers:
+            self._observers.append(observer)
+
+    def stats(self):
+        """Métricas de fila vs. tempo de hash desde o início do processo"""
+        with self._lock:
+            operations = self._metrics['operations']
+            return {
+                'executor': self.executor_type,
+                'rounds': self.rounds,
+                'calibrated': self.calibrated,
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'pending': self._pending,
+                'operations': operations,
+                'rejected': self._metrics['rejected'],
+                'queue_wait_ms': {
+                    'avg': round(self._metrics['queue_wait_total'] * 1000 / operations, 3) if operations else 0.0,
+                    'max': round(self._metrics['queue_wait_max'] * 1000, 3)
+                },
+                'hash_time_ms': {
+                    'avg': round(self._metrics['hash_time_total'] * 1000 / operations, 3) if operations else 0.0,
+                    'max': round(self._metrics['hash_time_max'] * 1000, 3)
+                }
+            }
+
+    def shutdown(self, wait=False):
+        """Encerra o pool atual (um novo é criado sob demanda)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            owned = self._executor_pid == os.getpid()
+            self._executor_pid = None
+
+        if executor is not None and owned:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _submit(self, func, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._metrics['rejected'] += 1
+                raise PasswordHasherBusy(self.retry_after)
+            self._pending += 1
+
+        submitted = time.perf_counter()
+        if self.executor_type == 'inline':
+            try:
+                result, hash_time = func(*args)
+            finally:
+                self._release()
+        else:
+            try:
+                future = self._get_executor().submit(func, *args)
+            except Exception:
+                self._release()
+                raise
+            # A vaga só é liberada quando a operação termina (ou é cancelada),
+            # não quando a requisição desiste de esperar: assim ``max_pending``
+            # limita o trabalho realmente enfileirado no pool
+            future.add_done_callback(self._release)
+            try:
+                result, hash_time = future.result(timeout=self.timeout)
+            except FutureTimeoutError:
+                # A operação não saiu da fila a tempo: cancela se ainda não
+                # começou e trata como saturação
+                future.cancel()
+                with self._lock:
+                    self._metrics['rejected'] += 1
+                raise PasswordHasherBusy(self.retry_after)
+            except BrokenProcessPool:
+                # Um worker morreu; descarta o pool para recriá-lo na próxima chamada
+                self.shutdown()
+                raise
+        elapsed = time.perf_counter() - submitted
+
+        self._record(max(0.0, elapsed - hash_time), hash_time)
+        return result, hash_time
+
+    def _release(self, future=None):
+        with self._lock:
+            self._pending -= 1
+
+    def _get_executor(self):
+        # O pool é criado por processo: após um fork (ex.: gunicorn com
+        # preload) o filho não pode reutilizar o pool herdado do master.
+        pid = os.getpid()
+        with self._lock:
+            if self._executor is None or self._executor_pid != pid:
+                if self.executor_type == 'process':
+                    # 'spawn': o pool é criado sob demanda em processos com
+                    # várias threads (gthread, werkzeug), e um fork copiaria
+                    # locks presos por outras threads. Os processos do pool
+                    # só importam este módulo e o script de entrada como
+                    # __mp_main__ (importar src.main não cria o app)
+                    context = multiprocessing.get_context('spawn')
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers,
+                        thread_name_prefix='password-hasher'
+                    )
+                self._executor_pid = pid
+            return self._executor
+
+    def _record(self, queue_wait, hash_time):
+        with self._lock:
+            metrics = self._metrics
+            metrics['operations'] += 1
+            metrics['queue_wait_total'] += queue_wait
+            metrics['queue_wait_max'] = max(metrics['queue_wait_max'], queue_wait)
+            metrics['hash_time_total'] += hash_time
+            metrics['hash_time_max'] = max(metrics['hash_time_max'], hash_time)
+        for observer in self._observers:
+            observer(queue_wait, hash_time)
+
+    def _reset_metrics(self):
+        self._metrics = {
+            'operations': 0,
+            'rejected': 0,
+            'queue_wait_total': 0.0,
+            'queue_wait_max': 0.0,
+            'hash_time_total': 0.0,
+            'hash_time_max': 0.0
+        }
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,269 @@
+import io
+import time
+import random
+import pstats
+import cProfile
+import threading
+from collections import deque
+from datetime import datetime
+from flask import request
+from sqlalchemy import event
+from src.utils.password_hasher import password_hasher
+
+
+# Limites superiores (ms) dos buckets dos histogramas de latência
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+
+
+class LatencyHistogram:
+    """Histograma de latência com buckets fixos (percentis aproximados)"""
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS_MS)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, value_ms):
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if value_ms <= bound:
+                self.counts[i] += 1
+                break
+        self.total += 1
+        self.sum_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+
+    def percentile(self, fraction):
+        """Limite superior do bucket que contém o percentil (o máximo no último)"""
+        if not self.total:
+            return 0.0
+        target = fraction * self.total
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def to_dict(self):
+        return {
+            'count': self.total,
+            'avg_ms': round(self.sum_ms / self.total, 3) if self.total else 0.0,
+            'max_ms': round(self.max_ms, 3),
+            'p50_ms': round(self.percentile(0.50), 3),
+            'p95_ms': round(self.percentile(0.95), 3),
+            'p99_ms': round(self.percentile(0.99), 3),
+            'buckets': {
+                ('+Inf' if bound == float('inf') else str(bound)): count
+                for bound, count in zip(LATENCY_BUCKETS_MS, self.counts)
+            }
+        }
+
+
+class EndpointStats:
+    """Acumulado por endpoint: latência, consultas ao banco, tempo de bcrypt e de fila do hashing"""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.statuses = {}
+        self.queries = 0
+        self.max_queries = 0
+        self.db_time_ms = 0.0
+        self.hash_time_ms = 0.0
+        self.hash_queue_ms = 0.0
+
+    def record(self, elapsed_ms, status_code, current):
+        self.latency.observe(elapsed_ms)
+        self.statuses[status_code] = self.statuses.get(status_code, 0) + 1
+        self.queries += current.queries
+        self.max_queries = max(self.max_queries, current.queries)
+        self.db_time_ms += current.db_time_ms
+        self.hash_time_ms += current.hash_time_ms
+        self.hash_queue_ms += current.hash_queue_ms
+
+    def to_dict(self):
+        count = self.latency.total
+        return {
+            'latency': self.latency.to_dict(),
+            'status_codes': {str(code): total for code, total in sorted(self.statuses.items())},
+            'db': {
+                'queries': self.queries,
+                'queries_per_request': round(self.queries / count, 2) if count else 0.0,
+                'max_queries': self.max_queries,
+                'time_ms_per_request': round(self.db_time_ms / count, 3) if count else 0.0
+            },
+            'password_hash_ms_per_request': round(self.hash_time_ms / count, 3) if count else 0.0,
+            'password_hash_queue_ms_per_request': round(self.hash_queue_ms / count, 3) if count else 0.0
+        }
+
+
+class _RequestTrace:
+    """Contadores da requisição em andamento nesta thread"""
+
+    __slots__ = ('started', 'queries', 'db_time_ms', 'hash_time_ms', 'hash_queue_ms', 'profile')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time_ms = 0.0
+        self.hash_time_ms = 0.0
+        self.hash_queue_ms = 0.0
+        self.profile = None
+
+
+class RequestProfiler:
+    """Instrumentação opcional das requisições (PROFILING_ENABLED)
+
+    Registra, por endpoint, histogramas de latência, número e tempo de
+    consultas SQL (eventos do engine SQLAlchemy) e, separados, tempo de
+    bcrypt e de espera na fila do pool (via ``password_hasher``). Uma fração das requisições roda sob cProfile; o
+    perfil só é guardado se a requisição passar de ``slow_ms``. Requisições
+    lentas sem perfil também são registradas, com seus contadores.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.slow_ms = 500.0
+        self.sample_rate = 0.0
+        self.max_samples = 20
+        self.top_functions = 25
+
+        self._lock = threading.Lock()
+        # cProfile só pode ter um perfil ativo por vez no processo
+        self._profile_lock = threading.Lock()
+        self._local = threading.local()
+        self._endpoints = {}
+        self._slow_requests = deque(maxlen=self.max_samples)
+        self._started_at = None
+        # O observer do password_hasher (singleton) vale para todos os apps
+        self._observing_hashes = False
+
+    def init_app(self, app, db):
+        """Registra os hooks de requisição e de banco (se habilitado)"""
+        self.enabled = bool(app.config.get('PROFILING_ENABLED', False))
+        self.slow_ms = float(app.config.get('PROFILING_SLOW_MS', self.slow_ms))
+        self.sample_rate = float(app.config.get('PROFILING_SAMPLE_RATE', self.sample_rate))
+        self.max_samples = int(app.config.get('PROFILING_MAX_SAMPLES', self.max_samples))
+        self._slow_requests = deque(maxlen=self.max_samples)
+        app.extensions['request_profiler'] = self
+
+        if not self.enabled:
+            return
+
+        self._started_at = datetime.utcnow()
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        if not self._observing_hashes:
+            password_hasher.add_observer(self._observe_password_hash)
+            self._observing_hashes = True
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+                event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def snapshot(self):
+        """Relatório acumulado desde o início do processo"""
+        with self._lock:
+            endpoints = {name: stats.to_dict() for name, stats in sorted(self._endpoints.items())}
+            slow_requests = list(self._slow_requests)
+
+        return {
+            'enabled': self.enabled,
+            'since': self._started_at.isoformat() if self._started_at else None,
+            'slow_ms': self.slow_ms,
+            'sample_rate': self.sample_rate,
+            'endpoints': endpoints,
+            'slow_requests': slow_requests
+        }
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+            self._slow_requests.clear()
+            self._started_at = datetime.utcnow()
+
+    # Hooks de requisição
+
+    def _before_request(self):
+        trace = _RequestTrace()
+        self._local.trace = trace
+
+        if self.sample_rate > 0 and random.random() < self.sample_rate and self._profile_lock.acquire(blocking=False):
+            trace.profile = cProfile.Profile()
+            trace.profile.enable()
+
+    def _after_request(self, response):
+        trace = getattr(self._local, 'trace', None)
+        if trace is None:
+            return response
+
+        profile_text = self._stop_profile(trace, keep=True)
+        elapsed_ms = (time.perf_counter() - trace.started) * 1000
+        endpoint = request.endpoint or 'unmatched'
+
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = EndpointStats()
+            stats.record(elapsed_ms, response.status_code, trace)
+
+            if elapsed_ms >= self.slow_ms:
+                self._slow_requests.append({
+                    'at': datetime.utcnow().isoformat(),
+                    'method': request.method,
+                    'path': request.path,
+                    'endpoint': endpoint,
+                    'status': response.status_code,
+                    'elapsed_ms': round(elapsed_ms, 3),
+                    'queries': trace.queries,
+                    'db_time_ms': round(trace.db_time_ms, 3),
+                    'password_hash_ms': round(trace.hash_time_ms, 3),
+                    'password_hash_queue_ms': round(trace.hash_queue_ms, 3),
+                    'profile': profile_text
+                })
+
+        self._local.trace = None
+        return response
+
+    def _teardown_request(self, error=None):
+        # Garante que o perfil seja desligado mesmo se a resposta falhar
+        trace = getattr(self._local, 'trace', None)
+        if trace is not None:
+            self._stop_profile(trace, keep=False)
+            self._local.trace = None
+
+    def _stop_profile(self, trace, keep):
+        profile, trace.profile = trace.profile, None
+        if profile is None:
+            return None
+
+        profile.disable()
+        self._profile_lock.release()
+        if not keep or (time.perf_counter() - trace.started) * 1000 < self.slow_ms:
+            return None
+
+        output = io.StringIO()
+        pstats.Stats(profile, stream=output).sort_stats('cumulative').print_stats(self.top_functions)
+        return output.getvalue()
+
+    # Hooks de banco e de hashing
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['query_started'].pop()
+        trace = getattr(self._local, 'trace', None)
+        if trace is not None:
+            trace.queries += 1
+            trace.db_time_ms += (time.perf_counter() - started) * 1000
+
+    def _observe_password_hash(self, queue_wait, hash_time):
+        trace = getattr(self._local, 'trace', None)
+        if trace is not None:
+            trace.hash_time_ms += hash_time * 1000
+            trace.hash_queue_ms += queue_wait * 1000
+
+
+request_profiler = RequestProfiler()
@@ -0,0 +1,229 @@
+import math
+import time
+import threading
+from collections import OrderedDict, namedtuple
+
+try:
+    import redis
+except ImportError:  # dependência opcional: só para o backend compartilhado redis://
+    redis = None
+
+
+class RateLimitExceeded(Exception):
+    """Limite de tentativas atingido: o cliente deve aguardar ``retry_after`` segundos"""
+
+    def __init__(self, scope, retry_after=1):
+        super().__init__(f'Limite de tentativas excedido ({scope})')
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+# Até ``limit`` tentativas por ``period`` segundos (a rajada máxima também é ``limit``)
+Limit = namedtuple('Limit', ['limit', 'period'])
+
+
+def parse_limit(value):
+    """Converte '10/60' (tentativas/segundos) em Limit; vazio ou '0' desativa"""
+    if isinstance(value, Limit):
+        return value
+    value = str(value or '').strip()
+    if not value or value == '0':
+        return None
+    limit, _, period = value.partition('/')
+    return Limit(int(limit), float(period or 60))
+
+
+class TokenBuckets:
+    """Token buckets locais, um por chave, com memória limitada
+
+    Cada chave ocupa uma tupla ``(tokens, atualizado_em)`` em um OrderedDict
+    usado como LRU: acima de ``max_keys`` as chaves menos recentes são
+    descartadas (um bucket descartado volta cheio, o que só favorece o
+    cliente, nunca bloqueia indevidamente).
+    """
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def consume(self, key, limit):
+        """Retira um token; retorna 0 se permitido ou os segundos até o próximo token"""
+        rate = limit.limit / limit.period
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (limit.limit, now))
+            tokens = min(limit.limit, tokens + (now - updated_at) * rate)
+
+            if tokens >= 1:
+                tokens -= 1
+                retry_after = 0
+            else:
+                retry_after = (1 - tokens) / rate
+
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+        return retry_after
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class MemoryStore:
+    """Armazenamento de contadores com expiração em memória
+
+    Substituto local do backend compartilhado (mesma interface do
+    ``RedisStore``), usado em testes e em desenvolvimento.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def incr(self, key, ttl):
+        now = time.monotonic()
+        with self._lock:
+            value, expires_at = self._values.get(key, (0, 0))
+            if expires_at <= now:
+                value, expires_at = 0, now + ttl
+            value += 1
+            self._values[key] = (value, expires_at)
+            if len(self._values) > 10000:
+                self._values = {k: v for k, v in self._values.items() if v[1] > now}
+            return value
+
+    def get(self, key):
+        with self._lock:
+            value, expires_at = self._values.get(key, (0, 0))
+            return value if expires_at > time.monotonic() else 0
+
+
+class RedisStore:
+    """Contadores compartilhados entre processos/instâncias via Redis"""
+
+    def __init__(self, url):
+        if redis is None:
+            raise RuntimeError('Pacote redis não instalado (pip install redis)')
+        self._client = redis.Redis.from_url(url, socket_timeout=0.2, socket_connect_timeout=0.2)
+
+    def incr(self, key, ttl):
+        pipeline = self._client.pipeline()
+        pipeline.incr(key)
+        pipeline.expire(key, int(math.ceil(ttl)), nx=True)
+        return int(pipeline.execute()[0])
+
+    def get(self, key):
+        return int(self._client.get(key) or 0)
+
+
+def sliding_window_hit(store, key, limit):
+    """Janela deslizante aproximada (duas janelas fixas ponderadas) sobre um store
+
+    Retorna 0 se a tentativa é permitida ou os segundos até a janela atual
+    terminar. A tentativa é contada antes da decisão (INCR atômico), então
+    rajadas concorrentes não passam do limite.
+    """
+    now = time.time()
+    window = int(now // limit.period)
+    elapsed = (now % limit.period) / limit.period
+
+    current = store.incr(f'{key}:{window}', ttl=limit.period * 2)
+    previous = store.get(f'{key}:{window - 1}')
+    estimated = previous * (1 - elapsed) + current
+
+    if estimated <= limit.limit:
+        return 0
+    return limit.period * (1 - elapsed)
+
+
+class RateLimiter:
+    """Limitador de tentativas por escopo (ex.: IP e identificador do login)
+
+    Por padrão usa token buckets locais a cada processo. Com
+    ``RATE_LIMIT_STORAGE_URL`` (``redis://...`` ou ``memory://``) o estado é
+    compartilhado em janelas deslizantes; se o backend falhar, a decisão
+    volta para os buckets locais em vez de liberar tudo ou bloquear tudo.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.enabled = True
+        self.limits = {}
+        self.store = None
+        self.buckets = TokenBuckets()
+        self.rejected = {}
+        self.store_errors = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app, limits):
+        """Configura o limitador; ``limits`` mapeia escopo -> '10/60'"""
+        self.enabled = bool(app.config.get('RATE_LIMIT_ENABLED', True))
+        self.limits = {scope: limit for scope, limit in (
+            (scope, parse_limit(value)) for scope, value in limits.items()
+        ) if limit is not None}
+        self.buckets = TokenBuckets(int(app.config.get('RATE_LIMIT_MAX_KEYS', 100000)))
+        self.store = create_store(app.config.get('RATE_LIMIT_STORAGE_URL'))
+        self.rejected = {}
+        self.store_errors = 0
+        app.extensions.setdefault('rate_limiters', {})[self.name] = self
+
+    def check(self, **keys):
+        """Conta uma tentativa em cada escopo; levanta RateLimitExceeded se algum estourar"""
+        if not self.enabled:
+            return
+
+        for scope, key in keys.items():
+            limit = self.limits.get(scope)
+            if limit is None or key is None:
+                continue
+
+            retry_after = self._hit(key, limit)
+            if retry_after:
+                with self._lock:
+                    self.rejected[scope] = self.rejected.get(scope, 0) + 1
+                raise RateLimitExceeded(scope, max(1, int(math.ceil(retry_after))))
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'backend': type(self.store).__name__ if self.store else 'TokenBuckets',
+            'limits': {scope: f'{limit.limit}/{limit.period:g}s' for scope, limit in self.limits.items()},
+            'tracked_keys': len(self.buckets),
+            'evictions': self.buckets.evictions,
+            'rejected': dict(self.rejected),
+            'store_errors': self.store_errors
+        }
+
+    def _hit(self, key, limit):
+        if self.store is not None:
+            try:
+                return sliding_window_hit(self.store, key, limit)
+            except Exception:
+                with self._lock:
+                    self.store_errors += 1
+        return self.buckets.consume(key, limit)
+
+
+def create_store(url):
+    """Backend compartilhado a partir da URL (None = apenas buckets locais)"""
+    if not url:
+        return None
+    if url.startswith('memory://'):
+        return MemoryStore()
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisStore(url)
+    raise ValueError(f'RATE_LIMIT_STORAGE_URL não suportada: {url}')
+
+
+# Tentativas de login: por IP do cliente e por usuário/email informado
+login_rate_limiter = RateLimiter('login')
+
+# Consultas de disponibilidade de username/email no cadastro, por IP
+availability_rate_limiter = RateLimiter('availability')
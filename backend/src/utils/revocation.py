@@ -0,0 +1,196 @@
+import time
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from src.models.user import RevocationWatermark, UserSession, db
+
+
+def _lifetime(value):
+    """Validade configurada de um token (timedelta, segundos ou False)"""
+    if isinstance(value, timedelta):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return timedelta(seconds=value)
+    return None
+
+
+class RevocationIndex:
+    """Índice em memória de tokens revogados, espelhando o banco
+
+    Mantém dois índices consultados em O(1) a cada requisição autenticada:
+
+    - ``token hashes``: sessões revogadas (``is_active=False``) ainda não
+      expiradas, carregadas de user_sessions;
+    - ``watermarks``: para cada usuário, o instante (epoch, em segundos
+      inteiros) antes do qual todo token emitido é considerado revogado,
+      registrado em "revogar todas as sessões" (tabela revocation_watermarks).
+
+    Os dois são carregados do banco na inicialização e recarregados a cada
+    ``sync_interval`` segundos, para enxergar revogações de outros workers.
+    """
+
+    def __init__(self):
+        self.sync_interval = 60
+        self.prune_interval = 60
+        self.watermark_ttl = timedelta(days=7)
+        self.refresh_ttl = timedelta(days=30)
+
+        self._lock = threading.Lock()
+        self._tokens = {}
+        self._watermarks = {}
+        self._synced_at = 0.0
+        self._pruned_at = 0.0
+
+    def init_app(self, app):
+        """Lê a configuração e carrega as revogações do banco"""
+        self.sync_interval = float(app.config.get('REVOCATION_SYNC_INTERVAL', self.sync_interval))
+        self.prune_interval = float(app.config.get('REVOCATION_PRUNE_INTERVAL', self.prune_interval))
+
+        # Uma sessão revogada continua na lista enquanto o refresh token
+        # vinculado a ela (claim ``sid``) puder ser válido
+        self.refresh_ttl = _lifetime(app.config.get('JWT_REFRESH_TOKEN_EXPIRES')) or timedelta(days=30)
+
+        # Um watermark só precisa viver enquanto algum token anterior a ele
+        # ainda puder ser válido
+        lifetimes = [timedelta(days=7), self.refresh_ttl]
+        access_ttl = _lifetime(app.config.get('JWT_ACCESS_TOKEN_EXPIRES'))
+        if access_ttl:
+            lifetimes.append(access_ttl)
+        self.watermark_ttl = max(lifetimes)
+
+        with self._lock:
+            self._tokens = {}
+            self._watermarks = {}
+        with app.app_context():
+            self.load()
+
+        app.extensions['revocation_index'] = self
+
+    def load(self):
+        """Recarrega os hashes de sessões revogadas e os watermarks vigentes"""
+        rows = db.session.query(UserSession.token_hash, UserSession.expires_at).filter(
+            UserSession.is_active == False,  # noqa: E712
+            UserSession.expires_at > datetime.utcnow()
+        ).all()
+        watermark_floor = int(time.time() - self.watermark_ttl.total_seconds())
+        watermarks = db.session.query(RevocationWatermark.user_id, RevocationWatermark.revoked_before).filter(
+            RevocationWatermark.revoked_before > watermark_floor
+        ).all()
+
+        tokens = {token_hash: expires_at for token_hash, expires_at in rows}
+        with self._lock:
+            self._tokens = tokens
+            # Watermarks só avançam: mantém os registrados durante a consulta
+            merged = dict(watermarks)
+            for user_id, revoked_before in self._watermarks.items():
+                merged[user_id] = max(revoked_before, merged.get(user_id, 0))
+            self._watermarks = merged
+            self._synced_at = time.monotonic()
+        return len(tokens)
+
+    def revoke_token(self, token_hash, expires_at):
+        """Marca um token (pelo hash) como revogado até sua expiração"""
+        with self._lock:
+            self._tokens[token_hash] = expires_at
+
+    def revoke_user(self, user_id, token_hashes=(), revoked_before=None):
+        """Revoga todos os tokens emitidos para o usuário até ``revoked_before`` (padrão: agora)
+
+        Tokens emitidos no mesmo segundo não são cobertos pelo watermark (o
+        claim ``iat`` tem resolução de segundos), por isso os hashes das
+        sessões revogadas também são registrados individualmente.
+        """
+        revoked_before = int(time.time()) if revoked_before is None else int(revoked_before)
+        with self._lock:
+            self._watermarks[int(user_id)] = max(revoked_before, self._watermarks.get(int(user_id), 0))
+            for token_hash, expires_at in token_hashes:
+                self._tokens[token_hash] = expires_at
+        return revoked_before
+
+    def is_revoked(self, token_hashes, user_id, issued_at):
+        """Verifica se o token foi revogado (sem consultar o banco)
+
+        ``token_hashes``: sessões às quais o token pertence (a do próprio
+        token de acesso e/ou a sessão de login do claim ``sid``).
+        """
+        self._maintain()
+
+        if any(token_hash in self._tokens for token_hash in token_hashes if token_hash):
+            return True
+
+        try:
+            revoked_before = self._watermarks.get(int(user_id))
+        except (TypeError, ValueError):
+            return False
+        return revoked_before is not None and issued_at is not None and issued_at < revoked_before
+
+    def is_revoked_in_database(self, token_hash, user_id, issued_at):
+        """Mesma verificação de ``is_revoked``, direto no banco (uma consulta)
+
+        Para o refresh, que emite tokens novos e não deve depender do
+        intervalo de sincronização do índice. Revogações encontradas são
+        registradas em memória.
+        """
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            return False
+
+        session = select(UserSession.is_active, UserSession.expires_at).where(
+            UserSession.token_hash == (token_hash or '')
+        ).limit(1).subquery()
+        is_active, expires_at, revoked_before = db.session.execute(select(
+            select(session.c.is_active).scalar_subquery(),
+            select(session.c.expires_at).scalar_subquery(),
+            select(RevocationWatermark.revoked_before).where(
+                RevocationWatermark.user_id == user_id
+            ).scalar_subquery()
+        )).one()
+
+        if is_active is False:
+            self.revoke_token(token_hash, expires_at)
+            return True
+        if revoked_before is not None:
+            self.revoke_user(user_id, revoked_before=revoked_before)
+            return issued_at is not None and issued_at < revoked_before
+        return False
+
+    def prune(self):
+        """Remove tokens já expirados e watermarks que não cobrem mais nenhum token"""
+        now = datetime.utcnow()
+        watermark_floor = time.time() - self.watermark_ttl.total_seconds()
+        with self._lock:
+            self._tokens = {
+                token_hash: expires_at
+                for token_hash, expires_at in self._tokens.items()
+                if expires_at > now
+            }
+            self._watermarks = {
+                user_id: revoked_before
+                for user_id, revoked_before in self._watermarks.items()
+                if revoked_before > watermark_floor
+            }
+            self._pruned_at = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'revoked_tokens': len(self._tokens),
+                'revoked_users': len(self._watermarks),
+                'last_sync_seconds_ago': round(time.monotonic() - self._synced_at, 1) if self._synced_at else None
+            }
+
+    def _maintain(self):
+        now = time.monotonic()
+        if self.sync_interval > 0 and now - self._synced_at > self.sync_interval:
+            # Marca antes de consultar para que apenas uma thread recarregue
+            self._synced_at = now
+            try:
+                self.load()
+            except Exception:
+                db.session.rollback()
+        elif now - self._pruned_at > self.prune_interval:
+            self.prune()
+
+
+revocation_index = RevocationIndex()
@@ -0,0 +1,231 @@
+import os
+import time
+import atexit
+import threading
+from datetime import datetime
+from flask import has_app_context
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from src.models.user import UserSession, db
+from src.utils.cache import stats_cache
+
+
+SESSION_COLUMNS = ('user_id', 'token_hash', 'expires_at', 'created_at', 'is_active')
+
+
+class SessionWriter:
+    """Fila write-behind para os inserts de UserSession (SESSION_WRITE_BEHIND)
+
+    Login e refresh colocam a sessão nova em uma fila em memória em vez de
+    confirmar um INSERT por requisição. Uma thread por processo grava a fila
+    a cada ``flush_interval`` segundos (ou assim que ``batch_size`` sessões
+    se acumulam) com INSERTs de várias linhas, um commit por lote. No
+    SQLite isso troca um fsync e um lock de escrita por login por um por lote.
+
+    Quem revoga sessões de um usuário chama ``sync`` antes, e as sessões
+    pendentes dele são gravadas na hora, para que logout e "revogar todas"
+    alcancem sessões que ainda estavam na fila. Leituras (listagem e
+    estatísticas) não gravam nada: somam ao resultado do banco as sessões
+    pendentes do próprio processo (``pending_for``); as da fila de outro
+    worker aparecem depois do flush dele (até ``flush_interval``). A
+    fila é esvaziada no encerramento do processo (atexit e ``worker_exit``
+    do gunicorn). Se o processo morrer sem esse encerramento, as sessões
+    pendentes se perdem. Os tokens continuam válidos e revogáveis pelo
+    watermark de "revogar todas", mas não aparecem na listagem.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.flush_interval = 0.05
+        self.batch_size = 100
+        self.max_pending = 10000
+
+        self._app = None
+        self._lock = threading.Lock()
+        # Um lote por vez: sessões saem da fila só depois do commit
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._pending = {}
+        self._pid = None
+        self._thread = None
+        self._atexit_registered = False
+        self.flushes = 0
+        self.written = 0
+        self.conflicts = 0
+        self.errors = 0
+        self.last_flush = None
+
+    def init_app(self, app):
+        """Lê a configuração; a thread de gravação inicia na primeira sessão enfileirada"""
+        self._app = app
+        self.enabled = bool(app.config.get('SESSION_WRITE_BEHIND', False))
+        self.flush_interval = float(app.config.get('SESSION_FLUSH_INTERVAL_MS', 50)) / 1000
+        self.batch_size = max(1, int(app.config.get('SESSION_FLUSH_BATCH_SIZE', self.batch_size)))
+        self.max_pending = max(self.batch_size, int(app.config.get('SESSION_QUEUE_MAX', self.max_pending)))
+
+        if self.enabled and not self._atexit_registered:
+            atexit.register(self.drain)
+            self._atexit_registered = True
+        app.extensions['session_writer'] = self
+
+    def enqueue(self, session):
+        """Coloca uma sessão nova (UserSession transiente) na fila de gravação"""
+        record = {column: getattr(session, column) for column in SESSION_COLUMNS}
+        if record['created_at'] is None:
+            record['created_at'] = datetime.utcnow()
+        if record['is_active'] is None:
+            record['is_active'] = True
+
+        self._ensure_started()
+        with self._lock:
+            self._pending[record['token_hash']] = record
+            pending = len(self._pending)
+
+        if pending >= self.max_pending:
+            # Fila cheia (ex.: banco lento): a própria requisição grava (backpressure)
+            self.flush()
+        elif pending >= self.batch_size:
+            self._wakeup.set()
+
+    def has_pending(self, user_id=None, token_hash=None):
+        """Há sessão na fila para o token (ou usuário) informado?"""
+        with self._lock:
+            if token_hash is not None:
+                return token_hash in self._pending
+            if user_id is not None:
+                user_id = int(user_id)
+                return any(record['user_id'] == user_id for record in self._pending.values())
+            return bool(self._pending)
+
+    def pending_for(self, user_id):
+        """Cópias das sessões do usuário ainda na fila deste processo (para leituras, sem gravar)"""
+        if not self.enabled:
+            return []
+        user_id = int(user_id)
+        with self._lock:
+            return [dict(record) for record in self._pending.values() if record['user_id'] == user_id]
+
+    def sync(self, user_id=None, token_hash=None):
+        """Grava a fila agora se ela tiver sessões do usuário/token (lê as próprias escritas)
+
+        Usa a sessão do banco do contexto atual e confirma a transação dela:
+        chame antes de qualquer escrita da requisição, e só em rotas que
+        escrevem (leituras usam ``pending_for``).
+        """
+        if self.enabled and self.has_pending(user_id, token_hash):
+            self.flush()
+
+    def flush(self):
+        """Grava todas as sessões pendentes em lotes; retorna quantas foram inseridas"""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = list(self._pending.values())[:self.batch_size]
+                if not batch:
+                    return written
+
+                written += self._write(batch)
+                with self._lock:
+                    for record in batch:
+                        self._pending.pop(record['token_hash'], None)
+
+    def drain(self):
+        """Interrompe a thread deste processo e grava o que restou na fila"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._pid == os.getpid() and self.has_pending():
+            self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'pending': len(self._pending),
+                'flush_interval_ms': round(self.flush_interval * 1000, 3),
+                'batch_size': self.batch_size,
+                'flushes': self.flushes,
+                'written': self.written,
+                'conflicts': self.conflicts,
+                'errors': self.errors,
+                'last_flush': self.last_flush
+            }
+
+    def _ensure_started(self):
+        pid = os.getpid()
+        if self._pid == pid and self._thread is not None and self._thread.is_alive():
+            return
+
+        with self._lock:
+            if self._pid == pid and self._thread is not None and self._thread.is_alive():
+                return
+            if self._pid != pid:
+                # Após um fork a fila herdada pertence ao processo pai
+                self._pending = {}
+            self._pid = pid
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='session-writer', daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if not self.has_pending():
+                continue
+            try:
+                self.flush()
+            except Exception as e:
+                # As sessões continuam na fila e são regravadas no próximo ciclo
+                print(f"⚠️  Falha ao gravar sessões pendentes: {e}")
+                self._stop.wait(1)
+
+    def _write(self, batch):
+        if has_app_context():
+            return self._insert(batch)
+        with self._app.app_context():
+            return self._insert(batch)
+
+    def _insert(self, batch):
+        started = time.perf_counter()
+        try:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(UserSession).values(batch))
+                inserted = batch
+            except IntegrityError:
+                # Token já gravado (ex.: logout tratado por outro worker antes
+                # do flush): insere um a um e descarta os repetidos
+                inserted = []
+                for record in batch:
+                    try:
+                        with db.session.begin_nested():
+                            db.session.execute(insert(UserSession).values(**record))
+                        inserted.append(record)
+                    except IntegrityError:
+                        pass
+
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            with self._lock:
+                self.errors += 1
+            raise
+
+        for user_id in {record['user_id'] for record in inserted}:
+            stats_cache.invalidate(user_id)
+
+        with self._lock:
+            self.flushes += 1
+            self.written += len(inserted)
+            self.conflicts += len(batch) - len(inserted)
+            self.last_flush = {
+                'at': datetime.utcnow().isoformat(),
+                'rows': len(inserted),
+                'elapsed_ms': round((time.perf_counter() - started) * 1000, 3)
+            }
+        return len(inserted)
+
+
+session_writer = SessionWriter()
@@ -0,0 +1,212 @@
+import os
+import io
+import re
+import gzip
+import time
+import hashlib
+import mimetypes
+import threading
+from collections import namedtuple
+from flask import request, send_file
+
+try:
+    import brotli
+except ImportError:  # dependência opcional: sem ela só há variantes gzip
+    brotli = None
+
+
+# Tipos que valem a pena comprimir (imagens/fontes já são comprimidas)
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/javascript', 'application/json', 'application/xml',
+    'application/manifest+json', 'image/svg+xml', 'image/x-icon', 'image/vnd.microsoft.icon'
+)
+
+# Nomes com hash de conteúdo (ex.: main.3f9a1c2b.js, chunk-5d1e8f0a9b.css) e
+# a pasta de build do Next.js podem ser cacheados para sempre
+HASHED_NAME = re.compile(r'[.-][0-9a-fA-F]{8,}\.[^/]+$')
+IMMUTABLE_PREFIXES = ('_next/static/',)
+
+# Ordem de preferência quando o cliente aceita mais de uma codificação
+ENCODINGS = ('br', 'gzip')
+SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+Variant = namedtuple('Variant', ['path', 'data', 'size', 'etag'])
+
+
+class StaticAsset(namedtuple('StaticAsset', [
+    'name', 'path', 'mimetype', 'size', 'mtime', 'etag', 'immutable', 'data', 'variants'
+])):
+    """Arquivo do manifest: metadados, conteúdo em memória (se pequeno) e variantes comprimidas"""
+
+    __slots__ = ()
+
+
+class StaticAssets:
+    """Manifest da pasta static montado na inicialização
+
+    Cada arquivo é lido uma única vez para calcular tamanho e hash (ETag
+    forte). Arquivos pequenos ficam em memória junto com as variantes gzip e
+    brotli, escolhidas por ``Accept-Encoding``; variantes ``.gz``/``.br``
+    geradas no build do frontend são usadas quando existem. Assim uma
+    requisição não faz ``stat`` no disco, e ``ETag``/``Range`` ficam a cargo
+    do ``send_file`` do Werkzeug.
+    """
+
+    def __init__(self):
+        self.root = None
+        self.memory_max_size = 256 * 1024
+        self.compress_min_size = 512
+        self.immutable_max_age = 31536000
+        self.auto_reload = False
+
+        self._lock = threading.Lock()
+        self._assets = {}
+        self._built_at = None
+        self._reloaded_at = 0.0
+        self.served = {'identity': 0, 'gzip': 0, 'br': 0}
+
+    def init_app(self, app):
+        """Lê a configuração e monta o manifest da pasta static do app"""
+        self.root = app.static_folder
+        self.memory_max_size = int(app.config.get('STATIC_MEMORY_MAX_SIZE', self.memory_max_size))
+        self.compress_min_size = int(app.config.get('STATIC_COMPRESS_MIN_SIZE', self.compress_min_size))
+        self.immutable_max_age = int(app.config.get('STATIC_IMMUTABLE_MAX_AGE', self.immutable_max_age))
+        self.auto_reload = bool(app.config.get('STATIC_AUTO_RELOAD', False))
+        self.build()
+        app.extensions['static_assets'] = self
+
+    def build(self):
+        """(Re)monta o manifest percorrendo a pasta static"""
+        assets = {}
+        if self.root and os.path.isdir(self.root):
+            for directory, _, filenames in os.walk(self.root):
+                for filename in filenames:
+                    path = os.path.join(directory, filename)
+                    name = os.path.relpath(path, self.root).replace(os.sep, '/')
+                    if name.endswith(('.gz', '.br')) and os.path.exists(path[:-3]):
+                        continue  # variante de outro arquivo
+                    assets[name] = self._load(name, path)
+
+        with self._lock:
+            self._assets = assets
+            self._built_at = time.time()
+        return len(assets)
+
+    def get(self, name):
+        """Entrada do manifest para o caminho pedido (ou None)"""
+        asset = self._assets.get(name)
+        if asset is None and self.auto_reload and name and time.monotonic() - self._reloaded_at > 1:
+            # Desenvolvimento: arquivos novos aparecem sem reiniciar o servidor
+            self._reloaded_at = time.monotonic()
+            self.build()
+            asset = self._assets.get(name)
+        return asset
+
+    def send(self, asset):
+        """Resposta para o arquivo, negociando a codificação com o cliente"""
+        encoding = self._negotiate(asset)
+        source = asset.variants[encoding] if encoding else asset
+        etag = source.etag
+
+        if source.data is not None:
+            body = io.BytesIO(source.data)
+        else:
+            body = source.path
+
+        response = send_file(
+            body,
+            mimetype=asset.mimetype,
+            etag=etag,
+            last_modified=asset.mtime,
+            conditional=True,
+            max_age=None
+        )
+
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        if asset.variants:
+            response.vary.add('Accept-Encoding')
+        if asset.immutable:
+            response.headers['Cache-Control'] = f'public, max-age={self.immutable_max_age}, immutable'
+        else:
+            response.headers['Cache-Control'] = 'no-cache'
+
+        self.served[encoding or 'identity'] += 1
+        return response
+
+    def stats(self):
+        with self._lock:
+            assets = list(self._assets.values())
+        return {
+            'files': len(assets),
+            'bytes': sum(asset.size for asset in assets),
+            'in_memory': sum(1 for asset in assets if asset.data is not None),
+            'compressed_variants': sum(len(asset.variants) for asset in assets),
+            'brotli': brotli is not None,
+            'served': dict(self.served)
+        }
+
+    def _negotiate(self, asset):
+        if not asset.variants:
+            return None
+        accepted = request.accept_encodings
+        for encoding in ENCODINGS:
+            if encoding in asset.variants and accepted[encoding] > 0:
+                return encoding
+        return None
+
+    def _load(self, name, path):
+        stat = os.stat(path)
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        digest = hashlib.sha256(data).hexdigest()[:32]
+        in_memory = stat.st_size <= self.memory_max_size
+
+        variants = {}
+        if stat.st_size >= self.compress_min_size and mimetype.startswith(COMPRESSIBLE_TYPES):
+            for encoding in ENCODINGS:
+                variant = self._load_variant(path, data, encoding, digest, in_memory)
+                if variant is not None and variant.size < stat.st_size:
+                    variants[encoding] = variant
+
+        return StaticAsset(
+            name=name,
+            path=path,
+            mimetype=mimetype,
+            size=stat.st_size,
+            mtime=stat.st_mtime,
+            etag=digest,
+            immutable=bool(HASHED_NAME.search(name)) or name.startswith(IMMUTABLE_PREFIXES),
+            data=data if in_memory else None,
+            variants=variants
+        )
+
+    @staticmethod
+    def _load_variant(path, data, encoding, digest, in_memory):
+        # ETag por representação: o corpo comprimido difere do original
+        etag = f'{digest}-{encoding}'
+        variant_path = path + SUFFIXES[encoding]
+
+        if os.path.exists(variant_path) and os.path.getmtime(variant_path) >= os.path.getmtime(path):
+            size = os.path.getsize(variant_path)
+            if in_memory:
+                with open(variant_path, 'rb') as f:
+                    return Variant(path=variant_path, data=f.read(), size=size, etag=etag)
+            return Variant(path=variant_path, data=None, size=size, etag=etag)
+
+        if not in_memory:
+            # Arquivos grandes só são servidos comprimidos se o build gerou a variante
+            return None
+        if encoding == 'gzip':
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        elif brotli is not None:
+            compressed = brotli.compress(data, quality=11)
+        else:
+            return None
+        return Variant(path=None, data=compressed, size=len(compressed), etag=etag)
+
+
+static_assets = StaticAssets()
@@ -0,0 +1,131 @@
+import os
+import sys
+import tempfile
+
+import pytest
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Configuração de teste aplicada antes de importar src.main (``src.main.app``
+# usa o ambiente): banco temporário, hashing inline e sem agendador em background
+_default_db_dir = tempfile.mkdtemp(prefix='capivara-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_default_db_dir, 'import.db')}"
+os.environ.setdefault('PASSWORD_HASH_EXECUTOR', 'inline')
+os.environ.setdefault('SESSION_REAPER_ENABLED', 'false')
+
+from src.main import create_app
+from src.models.user import db
+from src.utils.cache import user_cache
+
+
+# Matriz de bancos: SQLite sempre; PostgreSQL quando TEST_POSTGRES_URL aponta
+# para um servidor local (ex.: docker run -e POSTGRES_PASSWORD=test -p 5432:5432 postgres)
+BACKENDS = ['sqlite', 'postgresql']
+
+# No CI a perna PostgreSQL é obrigatória: sem servidor os testes falham em vez de pular
+REQUIRE_POSTGRES = os.getenv('TEST_REQUIRE_POSTGRES', 'false').lower() == 'true'
+
+
+@pytest.fixture(params=BACKENDS)
+def database_url(request, tmp_path):
+    if request.param == 'sqlite':
+        return f"sqlite:///{tmp_path / 'test.db'}"
+
+    url = os.getenv('TEST_POSTGRES_URL')
+    if not url:
+        if REQUIRE_POSTGRES:
+            pytest.fail('TEST_REQUIRE_POSTGRES=true, mas TEST_POSTGRES_URL não foi definido')
+        pytest.skip('TEST_POSTGRES_URL não definido')
+    return url
+
+
+@pytest.fixture
+def app(database_url, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', database_url)
+    if not database_url.startswith('sqlite'):
+        # Começa de um esquema limpo no servidor compartilhado
+        _reset_schema(database_url)
+
+    user_cache.clear()
+    app = create_app()
+    app.config['TESTING'] = True
+
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(client):
+    response = client.post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+    assert response.status_code == 200
+    return {'Authorization': f"Bearer {response.json['access_token']}"}
+
+
+def _reset_schema(database_url):
+    from sqlalchemy import create_engine
+
+    engine = create_engine(database_url)
+    db.metadata.drop_all(engine)
+    engine.dispose()
+
+
+class QueryCounter:
+    """Registra os comandos SQL executados pelos engines (primário e leitura) enquanto ativo"""
+
+    def __init__(self, engines):
+        self.engines = engines
+        self.statements = []
+
+    def __enter__(self):
+        self.statements = []
+        for engine in self.engines:
+            event.listen(engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc):
+        for engine in self.engines:
+            event.remove(engine, 'before_cursor_execute', self._record)
+
+    def __len__(self):
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(' '.join(statement.split()))
+
+    def report(self):
+        return '\n'.join(f'  {i}. {statement[:160]}' for i, statement in enumerate(self.statements, 1))
+
+
+@pytest.fixture
+def count_queries(app):
+    """``with count_queries() as queries: ...`` conta o SQL emitido no bloco"""
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    def factory():
+        return QueryCounter(engines)
+    return factory
+
+
+@pytest.fixture
+def assert_query_budget(client, count_queries):
+    """Executa a requisição e falha se ela emitir mais SQL que o orçamento"""
+
+    def check(method, url, budget, **kwargs):
+        with count_queries() as queries:
+            response = client.open(url, method=method, **kwargs)
+        assert len(queries) <= budget, (
+            f'{method} {url} executou {len(queries)} consultas (orçamento: {budget}):\n{queries.report()}'
+        )
+        return response
+    return check
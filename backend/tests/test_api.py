@@ -0,0 +1,88 @@
+"""Fluxo básico da API com o test client do Flask (substitui o antigo script test_api.py)"""
+
+
+def _register(client, username='testuser', email='test@example.com', password='test123456'):
+    return client.post('/api/auth/register', json={
+        'username': username,
+        'email': email,
+        'password': password,
+        'confirm_password': password
+    })
+
+
+def test_health(client):
+    response = client.get('/api/utils/health')
+    assert response.status_code == 200
+    assert response.json['status'] == 'healthy'
+    assert response.json['database']['status'] == 'healthy'
+
+
+def test_info(client):
+    response = client.get('/api/utils/info')
+    assert response.status_code == 200
+    assert 'GET /api/user/profile' in response.json['endpoints']['user']
+
+
+def test_info_lists_every_api_route(app, client):
+    listed = {endpoint for endpoints in client.get('/api/utils/info').json['endpoints'].values()
+              for endpoint in endpoints}
+    registered = {
+        f'{method} {rule.rule}'
+        for rule in app.url_map.iter_rules() if rule.rule.startswith('/api/')
+        for method in rule.methods - {'HEAD', 'OPTIONS'}
+    }
+    assert listed == registered
+
+
+def test_register(client):
+    response = _register(client)
+    assert response.status_code == 201
+    assert response.json['user']['username'] == 'testuser'
+    assert 'password_hash' not in response.json['user']
+
+    assert _register(client).status_code == 409
+    assert _register(client, username='other', email='not-an-email').status_code == 400
+
+
+def test_login(client):
+    response = client.post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+    assert response.status_code == 200
+    assert response.json['access_token']
+    assert response.json['refresh_token']
+
+    response = client.post('/api/auth/login', json={'username': 'admin', 'password': 'wrong'})
+    assert response.status_code == 401
+
+
+def test_profile(client, auth_headers):
+    response = client.get('/api/user/profile', headers=auth_headers)
+    assert response.status_code == 200
+    user = response.json['user']
+    assert user['username'] == 'admin'
+    assert user['preferences']['theme'] == 'light'
+    assert user['stats']['sessions_count'] == 1
+
+    assert client.get('/api/user/profile').status_code == 401
+
+
+def test_preferences(client, auth_headers):
+    response = client.get('/api/user/preferences', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json['preferences']['theme'] == 'light'
+
+    response = client.put('/api/user/preferences', headers=auth_headers, json={
+        'theme': 'dark',
+        'notifications_enabled': False
+    })
+    assert response.status_code == 200
+    assert response.json['preferences']['theme'] == 'dark'
+    assert response.json['preferences']['notifications_enabled'] is False
+
+    response = client.put('/api/user/preferences', headers=auth_headers, json={'theme': 'neon'})
+    assert response.status_code == 400
+
+
+def test_stats(client):
+    response = client.get('/api/utils/stats')
+    assert response.status_code == 200
+    assert response.json['stats']['users']['total'] == 1
@@ -0,0 +1,72 @@
+from src.utils.availability import availability_index
+from src.utils.rate_limit import Limit, availability_rate_limiter
+
+
+def _available(client, **params):
+    response = client.get('/api/auth/availability', query_string=params)
+    assert response.status_code == 200, response.json
+    return response.json['available']
+
+
+def test_reports_taken_and_free_values(client):
+    assert _available(client, username='admin', email='admin@capivara.ai') == {'username': False, 'email': False}
+    assert _available(client, username='maria', email='maria@example.com') == {'username': True, 'email': True}
+
+
+def test_free_values_skip_database(client, count_queries):
+    with count_queries() as queries:
+        assert _available(client, username='nobody_here') == {'username': True}
+    assert len(queries) == 0
+    assert availability_index.stats()['memory_answers'] >= 1
+
+
+def test_register_and_profile_update_keep_index_current(client, auth_headers):
+    response = client.post('/api/auth/register', json={
+        'username': 'maria', 'email': 'maria@example.com',
+        'password': 'secret123', 'confirm_password': 'secret123'
+    })
+    assert response.status_code == 201
+    assert _available(client, username='maria') == {'username': False}
+
+    response = client.put('/api/user/profile', headers=auth_headers, json={'username': 'root'})
+    assert response.status_code == 200
+    assert _available(client, username='admin', email='admin@capivara.ai') == {'username': True, 'email': False}
+    assert _available(client, username='root') == {'username': False}
+
+
+def test_stale_taken_value_is_confirmed_and_dropped(client):
+    # Valor liberado por outro worker: o banco desmente o índice
+    availability_index.add(username='ghost')
+    assert _available(client, username='ghost') == {'username': True}
+    assert 'ghost' not in availability_index._taken['username']
+
+
+def test_register_conflicts_use_single_query(client, count_queries):
+    payload = {'username': 'admin', 'email': 'other@example.com',
+               'password': 'secret123', 'confirm_password': 'secret123'}
+    with count_queries() as queries:
+        response = client.post('/api/auth/register', json=payload)
+    assert response.status_code == 409
+    assert response.json['details'] == {'username': ['Este nome de usuário já está em uso']}
+    assert len(queries) == 1
+
+    payload.update(username='maria', email='admin@capivara.ai')
+    response = client.post('/api/auth/register', json=payload)
+    assert response.status_code == 409
+    assert 'email' in response.json['details']
+
+
+def test_invalid_and_missing_parameters(client):
+    assert client.get('/api/auth/availability').status_code == 400
+    response = client.get('/api/auth/availability', query_string={'username': 'a b'})
+    assert response.status_code == 400
+    assert 'username' in response.json['details']
+
+
+def test_rate_limited_per_ip(client, monkeypatch):
+    monkeypatch.setitem(availability_rate_limiter.limits, 'ip', Limit(2, 60))
+    for _ in range(2):
+        _available(client, username='maria')
+    response = client.get('/api/auth/availability', query_string={'username': 'maria'})
+    assert response.status_code == 429
+    assert 'Retry-After' in response.headers
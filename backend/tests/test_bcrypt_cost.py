@@ -0,0 +1,76 @@
+import bcrypt
+import pytest
+
+from src.models.user import User
+from src.utils.password_hasher import calibrate_rounds, hash_rounds, password_hasher
+
+
+def _admin_hash(app):
+    with app.app_context():
+        return User.query.filter_by(username='admin').one().password_hash
+
+
+def test_hash_rounds_reads_stored_cost():
+    assert hash_rounds(bcrypt.hashpw(b'secret', bcrypt.gensalt(5)).decode()) == 5
+    assert hash_rounds('$2b$12$' + 'x' * 53) == 12
+    assert hash_rounds('plaintext') is None
+    assert hash_rounds(None) is None
+
+
+def test_login_rehashes_password_with_configured_cost(app, client, monkeypatch):
+    assert hash_rounds(_admin_hash(app)) == password_hasher.rounds
+
+    monkeypatch.setattr(password_hasher, 'rounds', 5)
+    response = client.post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+    assert response.status_code == 200
+
+    rehashed = _admin_hash(app)
+    assert hash_rounds(rehashed) == 5
+    assert bcrypt.checkpw(b'admin123', rehashed.encode())
+
+    # Com o custo já atualizado, o login seguinte não regrava o hash
+    client.post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+    assert _admin_hash(app) == rehashed
+
+
+def test_failed_login_keeps_old_hash(app, client, monkeypatch):
+    original = _admin_hash(app)
+    monkeypatch.setattr(password_hasher, 'rounds', 5)
+    assert client.post('/api/auth/login', json={'username': 'admin', 'password': 'wrong'}).status_code == 401
+    assert _admin_hash(app) == original
+
+
+def _login(client):
+    assert client.post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'}).status_code == 200
+
+
+def test_calibrated_cost_only_rehashes_upwards(app, client, monkeypatch):
+    monkeypatch.setattr(password_hasher, 'rounds', 5)
+    _login(client)
+    assert hash_rounds(_admin_hash(app)) == 5
+
+    # Workers com calibrações diferentes (6 e 5) atendendo o mesmo usuário
+    monkeypatch.setattr(password_hasher, 'calibrated', True)
+    monkeypatch.setattr(password_hasher, 'rounds', 6)
+    _login(client)
+    upgraded = _admin_hash(app)
+    assert hash_rounds(upgraded) == 6
+
+    monkeypatch.setattr(password_hasher, 'rounds', 5)
+    _login(client)
+    monkeypatch.setattr(password_hasher, 'rounds', 6)
+    _login(client)
+    assert _admin_hash(app) == upgraded
+
+
+def test_calibration_stays_within_bounds():
+    assert calibrate_rounds(0) == 10
+    assert calibrate_rounds(10 ** 9) == 16
+
+
+@pytest.mark.parametrize('value', ['3', '32', 'fast'])
+def test_invalid_rounds_rejected(app, value):
+    app.config['BCRYPT_ROUNDS'] = value
+    with pytest.raises(ValueError):
+        password_hasher.init_app(app)
+    assert password_hasher.rounds == 12
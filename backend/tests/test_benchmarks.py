@@ -0,0 +1,22 @@
+"""Smoke check dos scripts de benchmark: importam e mostram a ajuda"""
+import glob
+import os
+import subprocess
+import sys
+
+import pytest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS = sorted(glob.glob(os.path.join(BACKEND, 'benchmarks', 'bench_*.py')))
+
+
+@pytest.mark.parametrize('script', SCRIPTS, ids=os.path.basename)
+def test_benchmark_runs_help(script):
+    # Sem a configuração dos testes: cada script precisa escolher a sua
+    env = {name: value for name, value in os.environ.items() if name not in (
+        'DATABASE_URL', 'PASSWORD_HASH_EXECUTOR', 'BCRYPT_ROUNDS', 'SESSION_REAPER_ENABLED'
+    )}
+    result = subprocess.run([sys.executable, script, '--help'], cwd=BACKEND, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert 'usage' in result.stdout.lower()
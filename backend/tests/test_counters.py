@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+
+from src.models.user import User, UserSession, db
+from src.utils.counters import get_counters, rebuild_counters
+
+
+def _assert_counters_match_tables(app):
+    with app.app_context():
+        counters = get_counters()
+        expected = rebuild_counters()
+        db.session.rollback()
+        assert counters['users_total'] == expected['users_total']
+        assert counters['users_active'] == expected['users_active']
+        assert counters['sessions_active'] == expected['sessions_active']
+
+
+def _active_sessions(client):
+    return client.get('/api/utils/stats').json['stats']['sessions']['active']
+
+
+def _recount(client):
+    # Um ciclo do agendador de limpeza (reconta sessions_active)
+    return client.post('/api/utils/cleanup').json['cleaned']
+
+
+def test_counters_follow_register_login_logout_and_delete(app, client):
+    response = client.post('/api/auth/register', json={
+        'username': 'maria', 'email': 'maria@example.com',
+        'password': 'secret123', 'confirm_password': 'secret123'
+    })
+    assert response.status_code == 201
+
+    login = client.post('/api/auth/login', json={'username': 'maria', 'password': 'secret123'})
+    headers = {'Authorization': f"Bearer {login.json['access_token']}"}
+    client.post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+
+    stats = client.get('/api/utils/stats').json['stats']
+    assert stats['users'] == {
+        'total': 2, 'active': 2, 'inactive': 0, 'created_today': 2, 'created_this_week': 2
+    }
+    _recount(client)
+    assert _active_sessions(client) == 2
+    _assert_counters_match_tables(app)
+
+    client.post('/api/auth/logout', headers=headers)
+    _recount(client)
+    assert _active_sessions(client) == 1
+
+    relogin = client.post('/api/auth/login', json={'username': 'maria', 'password': 'secret123'})
+    headers = {'Authorization': f"Bearer {relogin.json['access_token']}"}
+    response = client.delete('/api/user/account', headers=headers, json={'password': 'secret123', 'confirmation': 'DELETE'})
+    assert response.status_code == 200
+
+    stats = client.get('/api/utils/stats').json['stats']
+    assert stats['users']['active'] == 1
+    assert stats['users']['inactive'] == 1
+    _recount(client)
+    assert _active_sessions(client) == 1
+    _assert_counters_match_tables(app)
+
+
+def test_auth_writes_do_not_touch_counters(client, count_queries):
+    with count_queries() as queries:
+        login = client.post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+        headers = {'Authorization': f"Bearer {login.json['refresh_token']}"}
+        client.post('/api/auth/refresh', headers=headers)
+        client.post('/api/auth/logout', headers={'Authorization': f"Bearer {login.json['access_token']}"})
+    assert not [statement for statement in queries.statements if 'api_counters' in statement]
+
+
+def test_recount_ignores_expired_sessions(app, client):
+    with app.app_context():
+        admin = User.find_by_username('admin')
+        now = datetime.utcnow()
+        for i, expires_at in enumerate((now + timedelta(hours=1), now - timedelta(seconds=1))):
+            db.session.add(UserSession(user_id=admin.id, token_hash=f'session-{i}',
+                                       created_at=now, expires_at=expires_at))
+        db.session.commit()
+
+    cleaned = _recount(client)
+    assert cleaned['expired_sessions'] == 1
+    assert cleaned['active_sessions'] == 1
+    assert _active_sessions(client) == 1
+
+
+def test_cleanup_recounts_active_sessions(app, client):
+    with app.app_context():
+        admin = User.find_by_username('admin')
+        past = datetime.utcnow() - timedelta(hours=2)
+        for i, is_active in enumerate((True, True, False)):
+            db.session.add(UserSession(
+                user_id=admin.id, token_hash=f'expired-{i}', created_at=past,
+                expires_at=past + timedelta(hours=1), is_active=is_active
+            ))
+        db.session.commit()
+
+    assert _recount(client)['expired_sessions'] == 3
+    assert _active_sessions(client) == 0
+    _assert_counters_match_tables(app)
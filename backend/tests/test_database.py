@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from src.main import create_app
+from src.models.user import User, UserSession, db
+from src.models.database import engine_options, normalize_database_url
+from src.utils.counters import rebuild_counters
+
+
+def test_normalize_database_url():
+    assert normalize_database_url('postgres://u:p@host:5432/db') == 'postgresql://u:p@host:5432/db'
+    assert normalize_database_url('postgresql://u:p@host/db') == 'postgresql://u:p@host/db'
+    assert normalize_database_url('sqlite:///app.db') == 'sqlite:///app.db'
+
+
+def test_engine_options_per_dialect():
+    postgres = engine_options({'SQLALCHEMY_DATABASE_URI': 'postgresql://u:p@host/db', 'DB_POOL_SIZE': 10})
+    assert postgres['pool_size'] == 10
+    assert postgres['pool_pre_ping'] is True
+    assert postgres['pool_recycle'] == 1800
+    assert 'connect_args' not in postgres
+
+    sqlite = engine_options({'SQLALCHEMY_DATABASE_URI': 'sqlite:////tmp/app.db', 'SQLITE_BUSY_TIMEOUT': 2000})
+    assert sqlite['connect_args']['timeout'] == 2
+    assert 'pool_pre_ping' not in sqlite
+
+
+def _pragma(engine, name):
+    # Esvazia o pool: a conexão seguinte é nova e passa pelo evento connect
+    engine.dispose()
+    connection = engine.raw_connection()
+    try:
+        return connection.execute(f'PRAGMA {name}').fetchone()[0]
+    finally:
+        connection.close()
+
+
+@pytest.fixture
+def sqlite_app(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'pragmas.db'}")
+    app = create_app()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def test_sqlite_pragmas_applied_on_new_connections(sqlite_app):
+    with sqlite_app.app_context():
+        for engine in db.engines.values():
+            assert _pragma(engine, 'synchronous') == 1  # NORMAL
+            assert _pragma(engine, 'busy_timeout') == 5000
+            assert _pragma(engine, 'foreign_keys') == 1
+        with db.engine.connect() as connection:
+            assert connection.exec_driver_sql('PRAGMA journal_mode').scalar() == 'wal'
+            assert connection.exec_driver_sql('PRAGMA foreign_keys').scalar() == 1
+
+
+def test_sqlite_pragmas_follow_configuration(tmp_path, monkeypatch):
+    monkeypatch.setenv('SQLITE_SYNCHRONOUS', 'FULL')
+    monkeypatch.setenv('SQLITE_BUSY_TIMEOUT', '1500')
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'configured.db'}")
+    app = create_app()
+    with app.app_context():
+        assert _pragma(db.engine, 'synchronous') == 2  # FULL
+        assert _pragma(db.engine, 'busy_timeout') == 1500
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def test_sqlite_enforces_foreign_keys(sqlite_app):
+    with sqlite_app.app_context():
+        db.session.add(UserSession(user_id=999999, token_hash='orphan', created_at=datetime.utcnow(),
+                                   expires_at=datetime.utcnow() + timedelta(hours=1)))
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+
+
+def test_health_reports_dialect(app, client):
+    response = client.get('/api/utils/health')
+    assert response.status_code == 200
+    with app.app_context():
+        assert response.json['database']['type'] == db.engine.dialect.name
+
+
+def test_stats_counts_users_by_creation_window(app, client):
+    now = datetime.utcnow()
+    with app.app_context():
+        for name, created_at in (
+            ('today_user', now),
+            ('three_days_user', now - timedelta(days=3)),
+            ('old_user', now - timedelta(days=30)),
+        ):
+            user = User(username=name, email=f'{name}@example.com', password_hash='x', created_at=created_at)
+            db.session.add(user)
+        # Usuários inseridos direto no banco: recalcula os contadores materializados
+        rebuild_counters()
+        db.session.commit()
+
+    response = client.get('/api/utils/stats')
+    assert response.status_code == 200
+
+    users = response.json['stats']['users']
+    # admin + today_user foram criados hoje
+    assert users['total'] == 4
+    assert users['created_today'] == 2
+    assert users['created_this_week'] == 3
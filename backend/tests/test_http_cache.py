@@ -0,0 +1,62 @@
+
+def _revalidate(client, url, response, headers=None):
+    headers = dict(headers or {})
+    headers['If-None-Match'] = response.headers['ETag']
+    return client.get(url, headers=headers)
+
+
+def test_profile_preferences_and_me_answer_304_until_changed(client, auth_headers):
+    for url in ('/api/user/profile', '/api/user/preferences', '/api/auth/me'):
+        first = client.get(url, headers=auth_headers)
+        assert first.status_code == 200
+        assert first.headers['Cache-Control'] == 'private, no-cache'
+        assert 'Authorization' in first.headers['Vary']
+
+        second = _revalidate(client, url, first, auth_headers)
+        assert second.status_code == 304
+        assert second.data == b''
+        assert second.headers['ETag'] == first.headers['ETag']
+
+    preferences = client.get('/api/user/preferences', headers=auth_headers)
+    client.put('/api/user/preferences', headers=auth_headers, json={'theme': 'dark'})
+    changed = _revalidate(client, '/api/user/preferences', preferences, auth_headers)
+    assert changed.status_code == 200
+    assert changed.json['preferences']['theme'] == 'dark'
+    assert changed.headers['ETag'] != preferences.headers['ETag']
+
+    me = client.get('/api/auth/me', headers=auth_headers)
+    client.put('/api/user/profile', headers=auth_headers, json={'email': 'root@capivara.ai'})
+    changed = _revalidate(client, '/api/auth/me', me, auth_headers)
+    assert changed.status_code == 200
+    assert changed.json['user']['email'] == 'root@capivara.ai'
+
+    stats = client.get('/api/utils/health').json['conditional_responses']
+    assert stats['not_modified'] == 3
+    assert stats['endpoints']['auth.get_current_user']['not_modified'] == 1
+
+
+def test_profile_etag_changes_with_new_sessions(client, auth_headers):
+    first = client.get('/api/user/profile', headers=auth_headers)
+    client.post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+    assert _revalidate(client, '/api/user/profile', first, auth_headers).status_code == 200
+
+
+def test_etag_is_not_shared_between_users(app, client, auth_headers):
+    client.post('/api/auth/register', json={
+        'username': 'maria', 'email': 'maria@example.com',
+        'password': 'secret123', 'confirm_password': 'secret123'
+    })
+    login = client.post('/api/auth/login', json={'username': 'maria', 'password': 'secret123'})
+    other_headers = {'Authorization': f"Bearer {login.json['access_token']}"}
+
+    admin = client.get('/api/auth/me', headers=auth_headers)
+    response = _revalidate(client, '/api/auth/me', admin, other_headers)
+    assert response.status_code == 200
+    assert response.json['user']['username'] == 'maria'
+
+
+def test_info_is_publicly_cacheable(client):
+    first = client.get('/api/utils/info')
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'public, max-age=300'
+    assert _revalidate(client, '/api/utils/info', first).status_code == 304
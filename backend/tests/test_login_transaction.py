@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy import event
+
+from src.models.user import UserPreferences, UserSession, db
+
+
+@pytest.fixture
+def commits(app):
+    with app.app_context():
+        engine = db.engine
+    recorded = []
+
+    def record(conn):
+        recorded.append(conn)
+    event.listen(engine, 'commit', record)
+    yield recorded
+    event.remove(engine, 'commit', record)
+
+
+def _login(client, remember_me=False):
+    response = client.post('/api/auth/login', json={
+        'username': 'admin', 'password': 'admin123', 'remember_me': remember_me
+    })
+    assert response.status_code == 200
+    return response
+
+
+def test_login_commits_once(client, commits):
+    _login(client, remember_me=True)
+    assert len(commits) == 1
+
+
+def test_unchanged_preferences_are_not_written(client, count_queries):
+    _login(client)
+    with count_queries() as queries:
+        _login(client)
+    assert not [statement for statement in queries.statements if statement.startswith('UPDATE user_preferences')]
+
+    with count_queries() as queries:
+        _login(client, remember_me=True)
+    assert [statement for statement in queries.statements if statement.startswith('UPDATE user_preferences')]
+
+
+def test_failed_commit_leaves_no_partial_login(app, client, monkeypatch):
+    with app.app_context():
+        sessions_before = UserSession.query.count()
+
+    def failing_commit():
+        raise RuntimeError('disk I/O error')
+    monkeypatch.setattr(db.session, 'commit', failing_commit)
+    response = client.post('/api/auth/login', json={
+        'username': 'admin', 'password': 'admin123', 'remember_me': True
+    })
+    monkeypatch.undo()
+
+    assert response.status_code == 500
+    with app.app_context():
+        assert UserSession.query.count() == sessions_before
+        assert UserPreferences.query.filter_by(remember_me=True).count() == 0
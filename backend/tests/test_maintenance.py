@@ -0,0 +1,60 @@
+"""Liderança do reaper de sessões pelo lease no banco (maintenance_leases)"""
+from datetime import datetime, timedelta
+
+from src.models.user import MaintenanceLease, User, UserSession, db
+from src.utils.maintenance import LEASE_NAME, SessionReaper
+
+
+def _reaper(app):
+    reaper = SessionReaper()
+    reaper.init_app(app)
+    return reaper
+
+
+def _expire_lease():
+    db.session.get(MaintenanceLease, LEASE_NAME).expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+
+
+def test_only_lease_holder_runs_cleanup(app):
+    with app.app_context():
+        admin_id = User.find_by_username('admin').id
+        db.session.add(UserSession(user_id=admin_id, token_hash='expired', created_at=datetime.utcnow(),
+                                   expires_at=datetime.utcnow() - timedelta(minutes=1)))
+        db.session.commit()
+
+    leader, follower = _reaper(app), _reaper(app)
+    report = leader.tick()
+    assert report['expired_sessions'] == 1
+    assert leader.is_leader
+
+    # Outro processo (ou host) com o mesmo banco não executa a limpeza
+    assert follower.tick() is None
+    assert not follower.is_leader and follower.runs == 0
+
+    # O líder renova o próprio lease a cada ciclo
+    assert leader.tick() is not None
+    assert leader.runs == 2
+
+
+def test_follower_takes_over_expired_lease(app):
+    leader, follower = _reaper(app), _reaper(app)
+    assert leader.acquire_leadership()
+    assert not follower.acquire_leadership()
+
+    with app.app_context():
+        _expire_lease()
+    assert follower.acquire_leadership()
+    assert not leader.acquire_leadership()
+
+    with app.app_context():
+        assert db.session.get(MaintenanceLease, LEASE_NAME).holder == follower.holder_id
+
+
+def test_stop_releases_lease(app):
+    leader, follower = _reaper(app), _reaper(app)
+    assert leader.acquire_leadership()
+
+    leader.stop()
+    assert not leader.is_leader
+    assert follower.acquire_leadership()
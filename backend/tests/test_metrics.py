@@ -0,0 +1,82 @@
+import json
+import os
+import subprocess
+
+from src.utils.metrics import metrics
+
+
+def _samples(text, name):
+    return [line for line in text.splitlines() if line.startswith(name)]
+
+
+def _value(name, *labels):
+    return metrics.collect().get(name, {}).get(tuple(labels), 0)
+
+
+def test_metrics_exposition(client):
+    # Métricas são do processo: compara com os valores anteriores ao teste
+    before = {
+        'failed': _value('capivara_auth_attempts_total', 'login', 'invalid_credentials'),
+        'success': _value('capivara_auth_attempts_total', 'login', 'success'),
+        'logout': _value('capivara_sessions_revoked_total', 'logout'),
+        'created': _value('capivara_sessions_created_total')
+    }
+
+    client.post('/api/auth/login', json={'username': 'admin', 'password': 'wrong'})
+    login = client.post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+    headers = {'Authorization': f"Bearer {login.json['access_token']}"}
+    client.get('/api/auth/me', headers=headers)
+    client.post('/api/auth/logout', headers=headers)
+
+    assert _value('capivara_auth_attempts_total', 'login', 'invalid_credentials') == before['failed'] + 1
+    assert _value('capivara_auth_attempts_total', 'login', 'success') == before['success'] + 1
+    assert _value('capivara_sessions_revoked_total', 'logout') == before['logout'] + 1
+    assert _value('capivara_sessions_created_total') == before['created'] + 1
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+
+    assert '# TYPE capivara_http_requests_total counter' in text
+    assert '# TYPE capivara_http_request_duration_seconds histogram' in text
+    assert _samples(text, 'capivara_http_request_duration_seconds_bucket{endpoint="auth.login",le="+Inf"}')
+    assert _samples(text, 'capivara_http_request_duration_seconds_count{endpoint="auth.get_current_user"}')
+    assert _samples(text, 'capivara_cache_lookups_total{cache="user",result="hit"}')
+    assert _samples(text, 'capivara_db_pool_connections{state="checked_out",engine="primary"}')
+
+
+def test_metrics_token(app, client, monkeypatch):
+    monkeypatch.setattr(metrics, 'token', 'scrape-secret')
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'}).status_code == 200
+
+
+def test_metrics_are_aggregated_across_workers(app, client, tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, 'directory', str(tmp_path))
+    before = metrics.collect()['capivara_sessions_created_total'].get((), 0)
+
+    dead = subprocess.Popen(['true'])
+    dead.wait()
+    worker_snapshots = {
+        dead.pid: 3,          # worker reciclado: vai para o arquivo morto
+        os.getppid(): 4       # outro worker ainda vivo
+    }
+    for pid, sessions in worker_snapshots.items():
+        (tmp_path / f'metrics-{pid}.json').write_text(json.dumps({
+            'pid': pid,
+            'metrics': {
+                'capivara_sessions_created_total': [[[], sessions]],
+                'capivara_password_hash_pending': [[[], 5]]
+            }
+        }))
+
+    values = metrics.collect()
+    assert values['capivara_sessions_created_total'][()] == before + 7
+    # Gauges só contam workers vivos
+    assert values['capivara_password_hash_pending'][()] == 5
+    assert not (tmp_path / f'metrics-{dead.pid}.json').exists()
+    assert (tmp_path / 'archive.json').exists()
+
+    # O arquivo morto mantém o contador monotônico
+    assert metrics.collect()['capivara_sessions_created_total'][()] == before + 7
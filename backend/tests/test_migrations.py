@@ -0,0 +1,124 @@
+"""Migrações na inicialização sobre um banco com o esquema antigo (sem índices nem preferências)"""
+import sqlite3
+from datetime import datetime, timedelta
+
+import bcrypt
+import pytest
+from sqlalchemy import func, inspect, select
+
+from src.main import create_app
+from src.models.migrations import run_migrations
+from src.models.stats import ApiCounter
+from src.models.user import UserPreferences, db
+from src.utils.counters import get_counters
+
+# Esquema da versão inicial: só as tabelas, sem os índices declarados hoje
+BASELINE_SCHEMA = """
+CREATE TABLE users (
+    id INTEGER NOT NULL PRIMARY KEY,
+    username VARCHAR(50) NOT NULL UNIQUE,
+    email VARCHAR(100) NOT NULL UNIQUE,
+    password_hash VARCHAR(255) NOT NULL,
+    created_at DATETIME,
+    updated_at DATETIME,
+    is_active BOOLEAN
+);
+CREATE TABLE user_sessions (
+    id INTEGER NOT NULL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    token_hash VARCHAR(255) NOT NULL,
+    expires_at DATETIME NOT NULL,
+    created_at DATETIME,
+    is_active BOOLEAN
+);
+CREATE TABLE user_preferences (
+    id INTEGER NOT NULL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    theme VARCHAR(20),
+    notifications_enabled BOOLEAN,
+    remember_me BOOLEAN,
+    updated_at DATETIME
+);
+"""
+
+
+@pytest.fixture
+def legacy_database(tmp_path, monkeypatch):
+    path = tmp_path / 'legacy.db'
+    now = datetime.utcnow()
+    password_hash = bcrypt.hashpw(b'admin123', bcrypt.gensalt(4)).decode()
+
+    connection = sqlite3.connect(path)
+    connection.executescript(BASELINE_SCHEMA)
+    connection.executemany(
+        'INSERT INTO users (id, username, email, password_hash, created_at, updated_at, is_active) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+        [
+            (1, 'admin', 'admin@capivara.ai', password_hash, now, now, 1),
+            (2, 'maria', 'maria@example.com', password_hash, now - timedelta(days=30), now, 1),
+            (3, 'joao', 'joao@example.com', password_hash, now, now, 0),
+        ]
+    )
+    connection.execute(
+        'INSERT INTO user_sessions (user_id, token_hash, expires_at, created_at, is_active) VALUES (?, ?, ?, ?, ?)',
+        (2, 'legacy-session', now + timedelta(hours=1), now, 1)
+    )
+    connection.commit()
+    connection.close()
+
+    monkeypatch.setenv('DATABASE_URL', f'sqlite:///{path}')
+    return path
+
+
+def _dispose(app):
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def _snapshot():
+    inspector = inspect(db.engine)
+    return {
+        'indexes': {
+            table: sorted(index['name'] for index in inspector.get_indexes(table))
+            for table in inspector.get_table_names()
+        },
+        'preferences': db.session.execute(select(UserPreferences.user_id, UserPreferences.theme)).all(),
+        'counters': sorted(db.session.execute(select(ApiCounter.name, ApiCounter.value)).all()),
+        'users': db.session.scalar(select(func.count()).select_from(db.metadata.tables['users']))
+    }
+
+
+def test_startup_migrates_legacy_database(legacy_database):
+    app = create_app()
+    try:
+        with app.app_context():
+            inspector = inspect(db.engine)
+            for table in db.metadata.sorted_tables:
+                existing = {index['name'] for index in inspector.get_indexes(table.name)}
+                assert {index.name for index in table.indexes} <= existing, table.name
+
+            preferences = dict(db.session.execute(select(UserPreferences.user_id, UserPreferences.theme)).all())
+            assert preferences == {1: 'light', 2: 'light', 3: 'light'}
+
+            counters = get_counters()
+            assert counters['users_total'] == 3
+            assert counters['users_active'] == 2
+            assert counters['sessions_active'] == 1
+            assert counters['created_today'] == 2
+
+            first_run = _snapshot()
+            # O admin já existia: nenhum usuário novo
+            assert first_run['users'] == 3
+    finally:
+        _dispose(app)
+
+    # Segunda inicialização (e nova execução das migrações) não muda nada
+    app = create_app()
+    try:
+        with app.app_context():
+            assert run_migrations() == []
+            assert _snapshot() == first_run
+    finally:
+        _dispose(app)
@@ -0,0 +1,147 @@
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+
+import pytest
+
+from src.utils.password_hasher import PasswordHasher, PasswordHasherBusy, password_hasher
+
+
+def _blocking(started, release, ran):
+    started.set()
+    release.wait(5)
+    ran.append(time.perf_counter())
+    return 'ok', 0.0
+
+
+def _hasher(**options):
+    hasher = PasswordHasher()
+    hasher.executor_type = 'thread'
+    hasher.workers = 1
+    for name, value in options.items():
+        setattr(hasher, name, value)
+    return hasher
+
+
+def _occupy(hasher):
+    """Ocupa o único worker do pool até ``release`` ser sinalizado"""
+    started, release, ran = threading.Event(), threading.Event(), []
+
+    def run():
+        try:
+            hasher._submit(_blocking, started, release, ran)
+        except PasswordHasherBusy:
+            pass  # com timeout curto, quem ocupa o worker também desiste de esperar
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    assert started.wait(5)
+    return release, thread
+
+
+def test_rejects_when_queue_is_full():
+    hasher = _hasher(max_pending=1)
+    release, thread = _occupy(hasher)
+    try:
+        with pytest.raises(PasswordHasherBusy):
+            hasher.hash('secret')
+        assert hasher.stats()['rejected'] == 1
+    finally:
+        release.set()
+        thread.join()
+        hasher.shutdown(wait=True)
+    assert hasher.stats()['pending'] == 0
+
+
+def test_timeout_cancels_queued_operation():
+    hasher = _hasher(max_pending=2, timeout=0.05)
+    release, thread = _occupy(hasher)
+    queued = []
+    try:
+        with pytest.raises(PasswordHasherBusy):
+            hasher._submit(_blocking, threading.Event(), threading.Event(), queued)
+        # Cancelada na fila: a vaga volta na hora e a operação nunca roda
+        assert hasher.stats()['pending'] == 1
+    finally:
+        release.set()
+        thread.join()
+        hasher.shutdown(wait=True)
+    assert queued == []
+    assert hasher.stats()['pending'] == 0
+
+
+def test_timeout_keeps_slot_until_running_operation_finishes():
+    hasher = _hasher(max_pending=1, timeout=0.05)
+    started, release, ran = threading.Event(), threading.Event(), []
+    with pytest.raises(PasswordHasherBusy):
+        hasher._submit(_blocking, started, release, ran)
+
+    # Já estava rodando (não pode ser cancelada): a vaga continua ocupada
+    assert hasher.stats()['pending'] == 1
+    with pytest.raises(PasswordHasherBusy):
+        hasher.hash('secret')
+
+    release.set()
+    hasher.shutdown(wait=True)
+    assert ran and hasher.stats()['pending'] == 0
+
+
+def test_process_pool_does_not_fork():
+    hasher = _hasher(executor_type='process')
+    try:
+        hashed = hasher.hash('secret')
+        assert hasher.verify('secret', hashed)
+        assert hasher._executor._mp_context.get_start_method() == 'spawn'
+    finally:
+        hasher.shutdown(wait=True)
+
+
+def test_script_importing_app_works_with_process_pool(tmp_path):
+    # Os processos do pool (spawn) reimportam o script como __mp_main__;
+    # importar src.main ali não pode criar o app nem fazer hashing
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    script = tmp_path / 'script.py'
+    script.write_text(textwrap.dedent(f'''
+        import os
+        import sys
+        sys.path.insert(0, {backend!r})
+        os.environ['DATABASE_URL'] = {f"sqlite:///{tmp_path / 'script.db'}"!r}
+        os.environ['PASSWORD_HASH_EXECUTOR'] = 'process'
+        os.environ['PASSWORD_HASH_WORKERS'] = '1'
+        os.environ['BCRYPT_ROUNDS'] = '4'
+        os.environ['SESSION_REAPER_ENABLED'] = 'false'
+
+        import src.main
+        from src.utils.password_hasher import password_hasher
+
+        if __name__ == '__main__':
+            app = src.main.app
+            from src.models.user import User
+            with app.app_context():
+                assert User.find_by_username('admin').check_password('admin123')
+            assert password_hasher.stats()['operations'] == 2
+            password_hasher.shutdown(wait=True)
+            print('ok')
+    '''))
+
+    result = subprocess.run([sys.executable, str(script)], capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().endswith('ok')
+
+
+@pytest.mark.parametrize('url, payload', [
+    ('/api/auth/login', {'username': 'admin', 'password': 'admin123'}),
+    ('/api/auth/register', {'username': 'maria', 'email': 'maria@example.com',
+                            'password': 'secret123', 'confirm_password': 'secret123'}),
+])
+def test_busy_pool_returns_503_with_retry_after(client, monkeypatch, url, payload):
+    monkeypatch.setattr(password_hasher, 'max_pending', 0)
+    monkeypatch.setattr(password_hasher, 'retry_after', 7)
+
+    response = client.post(url, json=payload)
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '7'
+    assert response.json['error'] == 'Service Unavailable'
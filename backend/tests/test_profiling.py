@@ -0,0 +1,81 @@
+import pytest
+
+from src.main import create_app
+from src.utils.password_hasher import password_hasher
+from src.utils.profiling import _RequestTrace, request_profiler
+
+
+@pytest.fixture
+def profiled_client(database_url, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', database_url)
+    monkeypatch.setenv('PROFILING_ENABLED', 'true')
+    monkeypatch.setenv('PROFILING_SAMPLE_RATE', '1')
+    monkeypatch.setenv('PROFILING_SLOW_MS', '0')
+    app = create_app()
+    request_profiler.reset()
+    yield app.test_client()
+
+    from src.models.user import db
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+def _login(client, username, password):
+    response = client.post('/api/auth/login', json={'username': username, 'password': password})
+    return {'Authorization': f"Bearer {response.json['access_token']}"}
+
+
+def test_metrics_report_latency_queries_and_hash_time(profiled_client):
+    headers = _login(profiled_client, 'admin', 'admin123')
+    profiled_client.get('/api/user/profile', headers=headers)
+
+    metrics = profiled_client.get('/api/utils/metrics', headers=headers).json['metrics']
+    login = metrics['endpoints']['auth.login']
+    assert login['latency']['count'] == 1
+    assert login['status_codes'] == {'200': 1}
+    assert login['db']['queries'] > 0
+    assert login['password_hash_ms_per_request'] > 0
+    assert 'password_hash_queue_ms_per_request' in login
+
+    profile = metrics['endpoints']['user.get_profile']
+    assert profile['db']['queries'] > 0
+    assert profile['password_hash_ms_per_request'] == 0
+
+    slow = metrics['slow_requests'][0]
+    assert slow['endpoint'] == 'auth.login'
+    assert 'cumulative' in slow['profile']
+
+
+def test_metrics_require_an_admin(profiled_client):
+    assert profiled_client.get('/api/utils/metrics').status_code == 403
+
+    profiled_client.post('/api/auth/register', json={
+        'username': 'maria', 'email': 'maria@example.com',
+        'password': 'secret123', 'confirm_password': 'secret123'
+    })
+    headers = _login(profiled_client, 'maria', 'secret123')
+    assert profiled_client.get('/api/utils/metrics', headers=headers).status_code == 403
+
+
+def test_hash_observer_registered_once(profiled_client, database_url, monkeypatch):
+    # Um segundo app com profiling não duplica o observer do singleton
+    app = create_app()
+    observer = request_profiler._observe_password_hash
+    assert sum(1 for registered in password_hasher._observers if registered == observer) == 1
+
+    from src.models.user import db
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_hash_queue_wait_is_reported_separately():
+    trace = request_profiler._local.trace = _RequestTrace()
+    try:
+        request_profiler._observe_password_hash(queue_wait=0.2, hash_time=0.05)
+    finally:
+        request_profiler._local.trace = None
+
+    assert trace.hash_time_ms == pytest.approx(50)
+    assert trace.hash_queue_ms == pytest.approx(200)
@@ -0,0 +1,51 @@
+"""Orçamento de consultas SQL por endpoint
+
+Cada linha declara quantos comandos SQL a requisição pode emitir no fluxo
+abaixo (caches aquecidos conforme a ordem). Um aumento, por exemplo um
+relacionamento carregado de forma preguiçosa (N+1), faz o teste falhar com a
+lista de consultas executadas; reduções só exigem baixar o número.
+"""
+
+REGISTER = {
+    'username': 'maria', 'email': 'maria@example.com',
+    'password': 'secret123', 'confirm_password': 'secret123'
+}
+
+
+def test_endpoints_stay_within_query_budget(client, assert_query_budget):
+    # Username e email livres: respondido pelo índice em memória
+    assert_query_budget('GET', '/api/auth/availability?username=maria&email=maria@example.com', 0)
+    assert_query_budget('POST', '/api/auth/register', 6, json=REGISTER)
+    login = assert_query_budget('POST', '/api/auth/login', 2, json={'username': 'maria', 'password': 'secret123'})
+    headers = {'Authorization': f"Bearer {login.json['access_token']}"}
+    refresh_headers = {'Authorization': f"Bearer {login.json['refresh_token']}"}
+
+    # Usuário + preferências em uma consulta; estatísticas agregadas em outra
+    assert_query_budget('GET', '/api/user/profile', 2, headers=headers)
+    assert_query_budget('GET', '/api/user/profile', 1, headers=headers)
+    assert_query_budget('GET', '/api/user/preferences', 1, headers=headers)
+    assert_query_budget('GET', '/api/auth/me', 1, headers=headers)
+    assert_query_budget('GET', '/api/auth/verify', 0, headers=headers)
+    assert_query_budget('GET', '/api/user/stats', 0, headers=headers)
+    assert_query_budget('GET', '/api/user/sessions', 1, headers=headers)
+    assert_query_budget('GET', '/api/utils/stats', 2)
+    assert_query_budget('GET', '/api/utils/health', 1)
+    assert_query_budget('GET', '/api/utils/info', 0)
+    assert_query_budget('GET', '/metrics', 0)
+
+    assert_query_budget('PUT', '/api/user/preferences', 2, headers=headers, json={'theme': 'dark'})
+    assert_query_budget('PUT', '/api/user/profile', 3, headers=headers, json={'username': 'maria2'})
+    # Refresh confere a revogação no banco (sessão do login + watermark) em uma consulta
+    assert_query_budget('POST', '/api/auth/refresh', 3, headers=refresh_headers)
+    assert_query_budget('POST', '/api/auth/logout', 2, headers=headers)
+
+
+def test_profile_loads_preferences_eagerly(client, auth_headers, count_queries):
+    with count_queries() as queries:
+        client.get('/api/user/profile', headers=auth_headers)
+    # Preferências vêm na mesma consulta do usuário (joinedload)
+    user_queries = [statement for statement in queries.statements if 'FROM users' in statement]
+    assert len(user_queries) == 1
+    assert 'LEFT OUTER JOIN user_preferences' in user_queries[0]
+    assert not any(statement.startswith('SELECT user_preferences') for statement in queries.statements)
+    assert queries.report().startswith('  1. SELECT')
@@ -0,0 +1,87 @@
+import pytest
+
+from src.utils.password_hasher import password_hasher
+from src.utils.rate_limit import (
+    Limit, MemoryStore, RateLimiter, RateLimitExceeded, TokenBuckets, login_rate_limiter
+)
+
+
+def _login(client, username='admin', password='wrong', ip='203.0.113.7'):
+    return client.post('/api/auth/login', json={'username': username, 'password': password},
+                       headers={'X-Forwarded-For': ip})
+
+
+@pytest.fixture
+def verify_calls(monkeypatch):
+    calls = []
+    original = password_hasher.verify
+
+    def counting_verify(password, password_hash):
+        calls.append(password)
+        return original(password, password_hash)
+
+    monkeypatch.setattr(password_hasher, 'verify', counting_verify)
+    return calls
+
+
+def test_identifier_limit_rejects_before_bcrypt(client, verify_calls):
+    for _ in range(5):
+        assert _login(client).status_code == 401
+
+    response = _login(client, password='admin123')
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    assert len(verify_calls) == 5
+
+    # Outros usuários seguem liberados
+    assert _login(client, username='someone').status_code == 401
+    assert login_rate_limiter.stats()['rejected'] == {'identifier': 1}
+
+
+def test_ip_limit_ignores_spoofed_forwarded_for(client, monkeypatch):
+    monkeypatch.setitem(login_rate_limiter.limits, 'ip', Limit(3, 60))
+    for i in range(3):
+        # O cliente controla o início do header; só o último salto (nosso proxy) conta
+        assert _login(client, username=f'user{i}', ip=f'10.0.0.{i}, 198.51.100.1').status_code == 401
+    assert _login(client, username='user9', ip='10.9.9.9, 198.51.100.1').status_code == 429
+    assert _login(client, username='user9', ip='198.51.100.2').status_code == 401
+
+
+def test_shared_store_uses_sliding_window(app, client, monkeypatch):
+    monkeypatch.setattr(login_rate_limiter, 'store', MemoryStore())
+    for _ in range(5):
+        assert _login(client).status_code == 401
+    assert _login(client).status_code == 429
+    assert login_rate_limiter.stats()['backend'] == 'MemoryStore'
+
+
+def test_store_failure_falls_back_to_local_buckets():
+    class BrokenStore:
+        def incr(self, key, ttl):
+            raise ConnectionError('store fora do ar')
+
+        def get(self, key):
+            raise ConnectionError('store fora do ar')
+
+    limiter = RateLimiter('test')
+    limiter.limits = {'ip': Limit(2, 60)}
+    limiter.store = BrokenStore()
+
+    limiter.check(ip='1.2.3.4')
+    limiter.check(ip='1.2.3.4')
+    with pytest.raises(RateLimitExceeded) as error:
+        limiter.check(ip='1.2.3.4')
+    assert error.value.scope == 'ip'
+    assert error.value.retry_after == 30
+    assert limiter.store_errors == 3
+
+
+def test_token_buckets_are_memory_bounded():
+    buckets = TokenBuckets(max_keys=2)
+    limit = Limit(1, 60)
+    assert buckets.consume('a', limit) == 0
+    assert buckets.consume('b', limit) == 0
+    assert buckets.consume('c', limit) == 0
+    assert len(buckets) == 2
+    assert buckets.evictions == 1
+    assert buckets.consume('c', limit) > 0
@@ -0,0 +1,99 @@
+"""Rotas GET não escrevem no banco: rodam inteiras sobre conexões somente leitura"""
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from src.models.user import User, UserPreferences, db
+
+GET_ENDPOINTS = (
+    '/api/user/profile',
+    '/api/user/preferences',
+    '/api/user/stats',
+    '/api/user/sessions',
+    '/api/auth/me',
+    '/api/auth/verify',
+    '/api/auth/availability?username=maria',
+    '/api/utils/stats',
+    '/api/utils/health',
+    '/api/utils/info',
+)
+
+
+@pytest.fixture
+def read_only(app):
+    """``with read_only(): ...`` faz toda conexão nova dos engines recusar escritas"""
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    def set_read_only(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if engines[0].dialect.name == 'sqlite':
+            cursor.execute('PRAGMA query_only = ON')
+        else:
+            cursor.execute('SET SESSION CHARACTERISTICS AS TRANSACTION READ ONLY')
+            dbapi_connection.commit()
+        cursor.close()
+
+    @contextmanager
+    def activate():
+        for engine in engines:
+            engine.dispose()
+            event.listen(engine, 'connect', set_read_only)
+        try:
+            yield
+        finally:
+            for engine in engines:
+                event.remove(engine, 'connect', set_read_only)
+                engine.dispose()
+    return activate
+
+
+def test_get_endpoints_run_on_read_only_connection(client, auth_headers, read_only):
+    with read_only():
+        for url in GET_ENDPOINTS:
+            response = client.get(url, headers=auth_headers)
+            assert response.status_code == 200, (url, response.json)
+
+        # Sanidade: uma escrita falha nesse modo
+        response = client.put('/api/user/preferences', headers=auth_headers, json={'theme': 'dark'})
+        assert response.status_code == 500
+
+
+def test_missing_preferences_are_served_as_defaults_without_writing(app, client, auth_headers, read_only):
+    with app.app_context():
+        UserPreferences.query.delete()
+        db.session.commit()
+
+    with read_only():
+        response = client.get('/api/user/preferences', headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json['preferences']['theme'] == 'light'
+        assert response.json['preferences']['id'] is None
+
+        response = client.get('/api/user/profile', headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json['user']['preferences']['remember_me'] is False
+
+    with app.app_context():
+        assert UserPreferences.query.count() == 0
+
+
+def test_register_creates_preferences_and_backfill_covers_old_users(app, client):
+    response = client.post('/api/auth/register', json={
+        'username': 'maria', 'email': 'maria@example.com',
+        'password': 'secret123', 'confirm_password': 'secret123'
+    })
+    assert response.status_code == 201
+
+    from src.models.migrations import backfill_user_preferences
+
+    with app.app_context():
+        user = User.find_by_username('maria')
+        assert user.preferences is not None
+
+        UserPreferences.query.delete()
+        db.session.commit()
+        assert backfill_user_preferences() == User.query.count()
+        assert backfill_user_preferences() == 0
+        assert UserPreferences.query.filter_by(theme='light', remember_me=False).count() == User.query.count()
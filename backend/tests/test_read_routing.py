@@ -0,0 +1,90 @@
+import pytest
+from sqlalchemy import event, insert, select, text
+
+from src.models.database import READ_BIND, read_bind, use_primary
+from src.models.user import User, UserPreferences, db
+
+
+@pytest.fixture
+def engines(app):
+    with app.app_context():
+        if READ_BIND not in db.engines:
+            pytest.skip('roteamento de leitura desligado neste banco')
+        return db.engines[None], db.engines[READ_BIND]
+
+
+@pytest.fixture
+def statements(engines):
+    """Comandos SQL por engine: ``{'primary': [...], 'read': [...]}``"""
+    recorded = {'primary': [], 'read': []}
+    listeners = []
+    for name, engine in zip(recorded, engines):
+        def record(conn, cursor, statement, parameters, context, executemany, name=name):
+            recorded[name].append(statement)
+        event.listen(engine, 'before_cursor_execute', record)
+        listeners.append((engine, record))
+    yield recorded
+    for engine, record in listeners:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def test_read_bind_config():
+    config = {'SQLALCHEMY_DATABASE_URI': 'sqlite:////tmp/app.db', 'SQLITE_JOURNAL_MODE': 'WAL'}
+    assert read_bind(config)['url'] == 'sqlite:///file:/tmp/app.db?mode=ro&uri=true'
+    assert read_bind({**config, 'DB_READ_ROUTING': 'false'}) is None
+    assert read_bind({**config, 'SQLITE_JOURNAL_MODE': 'DELETE'}) is None
+    assert read_bind({**config, 'SQLITE_JOURNAL_MODE': 'DELETE', 'DB_READ_ROUTING': 'true'}) is not None
+    assert read_bind({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'}) is None
+    assert read_bind({'SQLALCHEMY_DATABASE_URI': 'postgresql://db/app'}) is None
+
+    replica = read_bind({'SQLALCHEMY_DATABASE_URI': 'postgresql://db/app',
+                         'DATABASE_REPLICA_URL': 'postgres://replica/app'})
+    assert replica['url'] == 'postgresql://replica/app'
+    assert replica['pool_pre_ping'] is True
+
+
+def test_gets_read_from_read_engine(client, auth_headers, statements):
+    for url in ('/api/user/profile', '/api/user/sessions', '/api/utils/stats'):
+        assert client.get(url, headers=auth_headers).status_code == 200
+    assert statements['read']
+    assert not statements['primary']
+
+
+def test_writes_go_to_primary(client, auth_headers, statements):
+    response = client.put('/api/user/preferences', headers=auth_headers, json={'theme': 'dark'})
+    assert response.status_code == 200
+    assert statements['primary']
+    assert not statements['read']
+
+    # A leitura seguinte (outra requisição) já enxerga o commit pelo engine de leitura
+    assert client.get('/api/user/preferences', headers=auth_headers).json['preferences']['theme'] == 'dark'
+
+
+def test_read_engine_rejects_writes(app, engines):
+    with engines[1].connect() as conn:
+        with pytest.raises(Exception, match='readonly'):
+            conn.execute(text("UPDATE users SET is_active = is_active"))
+
+
+def test_write_in_get_pins_request_to_primary(app, engines):
+    primary, read = engines
+    with app.test_request_context('/api/user/sessions', method='GET'):
+        assert db.session.get_bind(mapper=User) is read
+        admin_id = select(User.id).where(User.username == 'admin').scalar_subquery()
+        db.session.execute(insert(UserPreferences).values(user_id=admin_id))
+        assert db.session.get_bind(mapper=User) is primary
+        db.session.rollback()
+
+
+def test_use_primary_override(app, engines):
+    primary, read = engines
+    with app.test_request_context('/api/user/profile', method='GET'):
+        use_primary()
+        assert db.session.get_bind(mapper=User) is primary
+
+    with app.test_request_context('/api/user/profile', method='PUT'):
+        assert db.session.get_bind(mapper=User) is primary
+
+    with app.app_context():
+        # Fora de requisições (inicialização, threads de manutenção) tudo vai ao primário
+        assert db.session.get_bind(mapper=User) is primary
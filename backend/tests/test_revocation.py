@@ -0,0 +1,109 @@
+"""Revogação de tokens pelo índice em memória (modo padrão, sem write-behind)"""
+import time
+
+from src.main import create_app
+from src.models.user import RevocationWatermark, User, db
+from src.utils.revocation import revocation_index
+
+
+def _login(client):
+    response = client.post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+    assert response.status_code == 200
+    return response.json
+
+
+def _bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+def _forget_revocations():
+    """Simula um worker que ainda não sincronizou o índice com o banco"""
+    with revocation_index._lock:
+        revocation_index._tokens = {}
+        revocation_index._watermarks = {}
+
+
+def test_logout_revokes_access_token(client):
+    tokens = _login(client)
+    assert client.get('/api/auth/me', headers=_bearer(tokens['access_token'])).status_code == 200
+
+    assert client.post('/api/auth/logout', headers=_bearer(tokens['access_token'])).status_code == 200
+    response = client.get('/api/auth/me', headers=_bearer(tokens['access_token']))
+    assert response.status_code == 401
+    assert response.json['error'] == 'Token Revoked'
+
+
+def test_logout_revokes_bound_refresh_token(client):
+    tokens = _login(client)
+    client.post('/api/auth/logout', headers=_bearer(tokens['access_token']))
+
+    response = client.post('/api/auth/refresh', headers=_bearer(tokens['refresh_token']))
+    assert response.status_code == 401
+
+
+def test_logout_with_refreshed_token_ends_login(client):
+    tokens = _login(client)
+    refreshed = client.post('/api/auth/refresh', headers=_bearer(tokens['refresh_token']))
+    assert refreshed.status_code == 200
+
+    assert client.post('/api/auth/logout', headers=_bearer(refreshed.json['access_token'])).status_code == 200
+    assert client.post('/api/auth/refresh', headers=_bearer(tokens['refresh_token'])).status_code == 401
+    assert client.get('/api/auth/me', headers=_bearer(tokens['access_token'])).status_code == 401
+
+
+def test_other_logins_survive_logout(client):
+    first, second = _login(client), _login(client)
+    client.post('/api/auth/logout', headers=_bearer(first['access_token']))
+
+    assert client.get('/api/auth/me', headers=_bearer(second['access_token'])).status_code == 200
+    assert client.post('/api/auth/refresh', headers=_bearer(second['refresh_token'])).status_code == 200
+
+
+def test_revoke_all_revokes_every_token(client):
+    first = _login(client)
+    time.sleep(1)  # iat com resolução de segundos: o watermark cobre tokens de segundos anteriores
+    second = _login(client)
+
+    response = client.post('/api/user/sessions/revoke-all', headers=_bearer(second['access_token']))
+    assert response.status_code == 200
+    for tokens in (first, second):
+        assert client.get('/api/auth/me', headers=_bearer(tokens['access_token'])).status_code == 401
+        assert client.post('/api/auth/refresh', headers=_bearer(tokens['refresh_token'])).status_code == 401
+
+
+def test_revoke_all_survives_restart(app, client):
+    tokens = _login(client)
+    time.sleep(1)
+    assert client.post('/api/user/sessions/revoke-all', headers=_bearer(tokens['access_token'])).status_code == 200
+
+    with app.app_context():
+        admin_id = User.find_by_username('admin').id
+        assert db.session.get(RevocationWatermark, admin_id) is not None
+
+    # Outro worker (ou o app reiniciado) carrega o watermark do banco
+    _forget_revocations()
+    fresh = create_app().test_client()
+    assert revocation_index.stats()['revoked_users'] == 1
+    assert fresh.post('/api/auth/refresh', headers=_bearer(tokens['refresh_token'])).status_code == 401
+    assert fresh.get('/api/auth/me', headers=_bearer(tokens['access_token'])).status_code == 401
+
+
+def test_refresh_checks_database_before_index_sync(client):
+    tokens = _login(client)
+    client.post('/api/auth/logout', headers=_bearer(tokens['access_token']))
+
+    # Índice defasado (revogação feita por outro worker): o refresh consulta o banco
+    _forget_revocations()
+    assert client.post('/api/auth/refresh', headers=_bearer(tokens['refresh_token'])).status_code == 401
+    assert revocation_index.stats()['revoked_tokens'] == 1
+
+
+def test_index_reload_picks_up_revocations(app, client):
+    tokens = _login(client)
+    client.post('/api/auth/logout', headers=_bearer(tokens['access_token']))
+
+    _forget_revocations()
+    assert client.get('/api/auth/me', headers=_bearer(tokens['access_token'])).status_code == 200
+    with app.app_context():
+        revocation_index.load()
+    assert client.get('/api/auth/me', headers=_bearer(tokens['access_token'])).status_code == 401
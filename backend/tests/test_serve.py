@@ -0,0 +1,90 @@
+"""Configuração do gunicorn gerada a partir do ambiente (src/serve.py)"""
+from types import SimpleNamespace
+
+import pytest
+
+from src import serve
+from src.models.user import db
+from src.utils.session_writer import session_writer
+
+ENV = ('PORT', 'WEB_CONCURRENCY', 'GUNICORN_THREADS', 'GUNICORN_TIMEOUT', 'GUNICORN_MAX_REQUESTS',
+       'PASSWORD_HASH_WORKERS', 'PASSWORD_HASH_MAX_PENDING')
+
+
+@pytest.fixture
+def environ(monkeypatch):
+    for name in ENV:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(serve.os, 'cpu_count', lambda: 8)
+    return monkeypatch
+
+
+def test_default_settings(environ):
+    settings = serve.default_settings()
+
+    assert settings['bind'] == '0.0.0.0:5000'
+    assert settings['workers'] == 8
+    assert settings['threads'] == 8
+    assert settings['worker_class'] == 'gthread'
+    assert settings['preload_app'] is True
+    assert settings['max_requests'] == 2000
+    assert settings['max_requests_jitter'] == 200
+    assert settings['password_hash_workers'] == 1
+    # Todas as threads menos uma podem aguardar o pool antes do 503
+    assert settings['password_hash_max_pending'] == 7
+
+
+def test_settings_from_environment(environ):
+    environ.setenv('PORT', '8080')
+    environ.setenv('WEB_CONCURRENCY', '2')
+    environ.setenv('GUNICORN_THREADS', '6')
+    environ.setenv('GUNICORN_TIMEOUT', '60')
+    environ.setenv('GUNICORN_MAX_REQUESTS', '0')
+
+    settings = serve.default_settings()
+
+    assert settings['bind'] == '0.0.0.0:8080'
+    assert (settings['workers'], settings['threads'], settings['timeout']) == (2, 6, 60)
+    assert (settings['max_requests'], settings['max_requests_jitter']) == (0, 0)
+    assert settings['password_hash_workers'] == 4
+    assert settings['password_hash_max_pending'] == 5
+
+
+def test_password_hash_limits_can_be_overridden(environ):
+    environ.setenv('GUNICORN_THREADS', '1')
+    assert serve.default_settings()['password_hash_max_pending'] == 1
+
+    environ.setenv('PASSWORD_HASH_WORKERS', '3')
+    environ.setenv('PASSWORD_HASH_MAX_PENDING', '16')
+    settings = serve.default_settings()
+    assert (settings['password_hash_workers'], settings['password_hash_max_pending']) == (3, 16)
+
+
+def test_server_applies_settings_and_hooks(environ):
+    server = serve.ProductionServer(serve.default_settings())
+
+    assert server.cfg.workers == 8
+    assert server.cfg.threads == 8
+    assert server.cfg.worker_class_str == 'gthread'
+    assert server.cfg.preload_app is True
+    assert server.cfg.post_fork is serve.post_fork
+    assert server.cfg.worker_exit is serve.worker_exit
+
+
+def test_post_fork_replaces_inherited_connection_pools(app):
+    with app.app_context():
+        pools = {name: engine.pool for name, engine in db.engines.items()}
+
+    serve.post_fork(SimpleNamespace(app=SimpleNamespace(application=app)), worker=None)
+
+    with app.app_context():
+        for name, engine in db.engines.items():
+            assert engine.pool is not pools[name]
+
+
+def test_worker_exit_drains_session_writer(monkeypatch):
+    drained = []
+    monkeypatch.setattr(session_writer, 'drain', lambda: drained.append(True))
+
+    serve.worker_exit(server=None, worker=None)
+    assert drained == [True]
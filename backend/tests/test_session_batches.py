@@ -0,0 +1,88 @@
+"""Limpeza e revogação de sessões em lotes (_run_in_batches)"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models.user import RevocationWatermark, User, UserSession, db
+from src.utils import auth_utils
+from src.utils.auth_utils import cleanup_expired_sessions, revoke_all_user_sessions
+
+
+@pytest.fixture
+def admin_id(app):
+    app.config['SESSION_BATCH_PAUSE'] = 0
+    with app.app_context():
+        return User.find_by_username('admin').id
+
+
+def _add_sessions(user_id, count, expires_in, is_active=True, prefix='s'):
+    now = datetime.utcnow()
+    db.session.add_all(
+        UserSession(
+            user_id=user_id,
+            token_hash=f'{prefix}-{expires_in}-{is_active}-{i}',
+            created_at=now,
+            expires_at=now + timedelta(seconds=expires_in),
+            is_active=is_active
+        )
+        for i in range(count)
+    )
+    db.session.commit()
+
+
+def _count(**filters):
+    return UserSession.query.filter_by(**filters).count()
+
+
+def test_cleanup_deletes_expired_sessions_in_batches(app, admin_id):
+    with app.app_context():
+        _add_sessions(admin_id, 5, -60)
+        _add_sessions(admin_id, 3, -60, is_active=False)
+        _add_sessions(admin_id, 2, 3600)
+
+        result = cleanup_expired_sessions(batch_size=2)
+
+        assert result.rows == 8
+        # Ativas: 2 + 2 + 1; inativas: 2 + 1
+        assert result.batches == 5
+        assert _count() == 2
+        assert _count(is_active=True) == 2
+
+
+def test_revoke_all_deactivates_sessions_in_batches(app, admin_id):
+    with app.app_context():
+        _add_sessions(admin_id, 5, 3600)
+        _add_sessions(admin_id, 1, 3600, is_active=False)
+
+        result = revoke_all_user_sessions(admin_id, batch_size=2)
+
+        assert result.rows == 5
+        assert result.batches == 3
+        assert _count(is_active=True) == 0
+        assert db.session.get(RevocationWatermark, admin_id) is not None
+
+
+def test_revoke_all_with_exact_batch_multiple(app, admin_id):
+    with app.app_context():
+        _add_sessions(admin_id, 4, 3600)
+
+        result = revoke_all_user_sessions(admin_id, batch_size=2)
+
+        assert result.rows == 4
+        assert _count(is_active=True) == 0
+
+
+def test_delete_account_deactivates_before_revoking_batches(app, client, auth_headers, admin_id, monkeypatch):
+    def failing_batches(*args, **kwargs):
+        raise RuntimeError('falha no meio da revogação')
+    monkeypatch.setattr(auth_utils, '_run_in_batches', failing_batches)
+
+    response = client.delete('/api/user/account', headers=auth_headers,
+                             json={'password': 'admin123', 'confirmation': 'DELETE'})
+    assert response.status_code == 500
+
+    # A desativação e o watermark foram confirmados juntos, antes dos lotes
+    with app.app_context():
+        assert db.session.get(User, admin_id).is_active is False
+        assert db.session.get(RevocationWatermark, admin_id) is not None
+    assert client.get('/api/auth/me', headers=auth_headers).status_code == 401
@@ -0,0 +1,95 @@
+"""Escritas não recarregam objetos depois do commit (expire_on_commit=False)"""
+import pytest
+from sqlalchemy import event
+
+from src.models.user import User, UserSession, db
+from src.utils.auth_utils import cleanup_expired_sessions
+
+REGISTER = {
+    'username': 'maria', 'email': 'maria@example.com',
+    'password': 'secret123', 'confirm_password': 'secret123'
+}
+
+
+@pytest.fixture
+def after_commit(app):
+    """``with after_commit() as statements: ...`` registra o SQL emitido após o último commit"""
+    with app.app_context():
+        engines = list(db.engines.values())
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(' '.join(statement.split()))
+
+    def reset(conn):
+        statements.clear()
+
+    class Recorder:
+        def __enter__(self):
+            statements.clear()
+            for engine in engines:
+                event.listen(engine, 'before_cursor_execute', record)
+                event.listen(engine, 'commit', reset)
+            return statements
+
+        def __exit__(self, *exc):
+            for engine in engines:
+                event.remove(engine, 'before_cursor_execute', record)
+                event.remove(engine, 'commit', reset)
+    return Recorder
+
+
+def test_write_endpoints_serialize_without_reloading(client, after_commit):
+    requests = [
+        ('POST', '/api/auth/register', {'json': REGISTER}),
+        ('POST', '/api/auth/login', {'json': {'username': 'maria', 'password': 'secret123', 'remember_me': True}}),
+    ]
+    responses = []
+    for method, url, kwargs in requests:
+        with after_commit() as statements:
+            responses.append(client.open(url, method=method, **kwargs))
+        assert responses[-1].status_code in (200, 201)
+        assert statements == [], f'{method} {url} recarregou após o commit: {statements}'
+
+    login = responses[-1].json
+    assert login['user']['username'] == 'maria' and login['user']['created_at']
+    headers = {'Authorization': f"Bearer {login['access_token']}"}
+
+    writes = [
+        ('PUT', '/api/user/preferences', {'json': {'theme': 'dark'}}),
+        ('PUT', '/api/user/profile', {'json': {'username': 'maria2'}}),
+        ('POST', '/api/auth/logout', {}),
+    ]
+    for method, url, kwargs in writes:
+        with after_commit() as statements:
+            response = client.open(url, method=method, headers=headers, **kwargs)
+        assert response.status_code == 200, (url, response.json)
+        assert statements == [], f'{method} {url} recarregou após o commit: {statements}'
+
+    # Sem o reload, a resposta ainda traz os valores gravados
+    with client.application.app_context():
+        user = User.find_by_username('maria2')
+        assert user.preferences.theme == 'dark'
+
+
+def test_lookups_do_not_autoflush(app, after_commit):
+    with app.app_context():
+        admin = User.find_by_username('admin')
+        admin.email = 'changed@capivara.ai'
+        with after_commit() as statements:
+            assert User.find_by_email('admin@capivara.ai') is admin
+            assert User.find_taken(email='changed@capivara.ai') == set()
+        assert not any(statement.startswith('UPDATE') for statement in statements)
+        db.session.rollback()
+
+
+def test_bulk_cleanup_expires_loaded_objects(app, client, auth_headers):
+    with app.app_context():
+        session = UserSession.query.filter_by(is_active=True).first()
+        session.expires_at = session.created_at.replace(year=2000)
+        db.session.commit()
+        session_id = session.id
+
+        cleanup_expired_sessions()
+        # O DELETE em lote não sincroniza a sessão: o objeto é recarregado, não reaproveitado
+        assert db.session.get(UserSession, session_id) is None
@@ -0,0 +1,103 @@
+import pytest
+
+from src.models.user import UserSession
+from src.utils.session_writer import session_writer
+
+
+@pytest.fixture
+def write_behind(app, monkeypatch):
+    """Fila ligada, com flush só quando o teste (ou a fila cheia) pedir"""
+    monkeypatch.setattr(session_writer, 'enabled', True)
+    monkeypatch.setattr(session_writer, 'flush_interval', 3600)
+    monkeypatch.setattr(session_writer, 'batch_size', 1000)
+    yield session_writer
+    session_writer.drain()
+
+
+def _login(client, username='admin', password='admin123'):
+    response = client.post('/api/auth/login', json={'username': username, 'password': password})
+    assert response.status_code == 200
+    return response.json
+
+
+def _session_rows(app):
+    with app.app_context():
+        return UserSession.query.count()
+
+
+def test_logins_are_queued_and_written_in_one_batch(app, client, write_behind, count_queries):
+    rows_before = _session_rows(app)
+    for _ in range(3):
+        _login(client)
+    assert write_behind.stats()['pending'] == 3
+    assert _session_rows(app) == rows_before
+
+    with app.app_context(), count_queries() as queries:
+        assert write_behind.flush() == 3
+    inserts = [statement for statement in queries.statements if statement.startswith('INSERT INTO user_sessions')]
+    assert len(inserts) == 1
+    assert _session_rows(app) == rows_before + 3
+
+
+def test_logout_revokes_pending_session(app, client, write_behind):
+    tokens = _login(client)
+    headers = {'Authorization': f"Bearer {tokens['access_token']}"}
+
+    assert client.post('/api/auth/logout', headers=headers).status_code == 200
+    assert write_behind.stats()['pending'] == 0
+    assert client.get('/api/auth/verify', headers=headers).status_code == 401
+
+
+def test_logout_from_another_process_wins_over_pending_insert(app, client, write_behind, monkeypatch):
+    tokens = _login(client)
+    headers = {'Authorization': f"Bearer {tokens['access_token']}"}
+
+    # Simula o logout atendido por outro worker, que não enxerga esta fila
+    with monkeypatch.context() as patch:
+        patch.setattr(write_behind, 'has_pending', lambda user_id=None, token_hash=None: False)
+        assert client.post('/api/auth/logout', headers=headers).status_code == 200
+
+    with app.app_context():
+        assert write_behind.flush() == 0
+        assert UserSession.query.filter_by(is_active=True).count() == 0
+    assert write_behind.stats()['conflicts'] == 1
+
+
+def test_reads_include_pending_sessions_without_flushing(app, client, write_behind, count_queries):
+    headers = {'Authorization': f"Bearer {_login(client)['access_token']}"}
+    _login(client)
+
+    with count_queries() as queries:
+        sessions = client.get('/api/user/sessions', headers=headers)
+        stats = client.get('/api/user/stats', headers=headers)
+    assert sessions.json['count'] == 2
+    assert stats.json['stats']['sessions_count'] == 2
+    assert stats.json['stats']['total_logins'] == 2
+    # GET não grava a fila nem abre transação de escrita
+    assert write_behind.stats()['pending'] == 2
+    assert not [statement for statement in queries.statements if not statement.startswith('SELECT')]
+
+    # Depois do flush, as mesmas sessões vêm do banco, sem contagem dupla
+    with app.app_context():
+        write_behind.flush()
+    assert client.get('/api/user/sessions', headers=headers).json['count'] == 2
+    assert client.get('/api/user/stats', headers=headers).json['stats']['sessions_count'] == 2
+
+
+def test_revoke_all_sees_pending_sessions(app, client, write_behind):
+    headers = {'Authorization': f"Bearer {_login(client)['access_token']}"}
+    _login(client)
+
+    _login(client)
+    response = client.post('/api/user/sessions/revoke-all', headers=headers)
+    assert response.status_code == 200
+    with app.app_context():
+        assert UserSession.query.filter_by(is_active=True).count() == 0
+
+
+def test_drain_writes_everything(app, client, write_behind):
+    rows_before = _session_rows(app)
+    _login(client)
+    write_behind.drain()
+    assert write_behind.stats()['pending'] == 0
+    assert _session_rows(app) == rows_before + 1
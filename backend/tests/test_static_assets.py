@@ -0,0 +1,63 @@
+import gzip
+
+import pytest
+
+from src.utils import static_assets as static_module
+from src.utils.static_assets import static_assets
+
+
+@pytest.fixture
+def static_client(app, tmp_path):
+    (tmp_path / 'index.html').write_text('<html>' + 'capivara ' * 200 + '</html>')
+    (tmp_path / '_next' / 'static').mkdir(parents=True)
+    (tmp_path / '_next' / 'static' / 'app.js').write_text('console.log(1);' * 100)
+    (tmp_path / 'main.3f9a1c2b.css').write_text('body { margin: 0 }' * 100)
+    (tmp_path / 'logo.png').write_bytes(b'\x89PNG' + bytes(2048))
+
+    app.static_folder = str(tmp_path)
+    static_assets.init_app(app)
+    return app.test_client()
+
+
+def test_spa_fallback_and_revalidation(static_client):
+    response = static_client.get('/dashboard/settings')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/html'
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+    etag = response.headers['ETag']
+    assert static_client.get('/', headers={'If-None-Match': etag}).status_code == 304
+
+
+def test_negotiates_precompressed_variants(static_client):
+    response = static_client.get('/index.html', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert gzip.decompress(response.data).startswith(b'<html>capivara')
+
+    plain = static_client.get('/index.html')
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.headers['ETag'] != response.headers['ETag']
+
+    if static_module.brotli is not None:
+        response = static_client.get('/index.html', headers={'Accept-Encoding': 'gzip, br'})
+        assert response.headers['Content-Encoding'] == 'br'
+
+    # Imagens não são recomprimidas
+    assert 'Content-Encoding' not in static_client.get('/logo.png', headers={'Accept-Encoding': 'gzip'}).headers
+
+
+def test_hashed_assets_are_immutable_and_support_ranges(static_client):
+    for path in ('/main.3f9a1c2b.css', '/_next/static/app.js'):
+        response = static_client.get(path)
+        assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+
+    response = static_client.get('/logo.png', headers={'Range': 'bytes=0-3'})
+    assert response.status_code == 206
+    assert response.data == b'\x89PNG'
+    assert response.headers['Content-Range'] == 'bytes 0-3/2052'
+
+
+def test_manifest_never_serves_files_outside_static(static_client):
+    response = static_client.get('/../../main.py')
+    assert b'import os' not in response.data
@@ -0,0 +1,46 @@
+"""Invalidação do snapshot de usuário em cache (user_cache)"""
+from src.models.user import User
+from src.utils.cache import get_cached_user, user_cache
+from src.utils.password_hasher import password_hasher
+
+
+def _admin_id(app):
+    with app.app_context():
+        return User.find_by_username('admin').id
+
+
+def test_profile_update_invalidates_cached_user(client, auth_headers):
+    assert client.get('/api/auth/me', headers=auth_headers).json['user']['username'] == 'admin'
+
+    response = client.put('/api/user/profile', headers=auth_headers, json={'username': 'admin2'})
+    assert response.status_code == 200
+    assert client.get('/api/auth/me', headers=auth_headers).json['user']['username'] == 'admin2'
+
+
+def test_password_rehash_invalidates_cached_user(app, client, auth_headers, monkeypatch):
+    admin_id = _admin_id(app)
+    client.get('/api/auth/me', headers=auth_headers)
+    cached = user_cache.get(admin_id)
+    assert cached is not None
+
+    # Único caminho que regrava a senha: o login com custo do bcrypt alterado
+    monkeypatch.setattr(password_hasher, 'rounds', 5)
+    assert client.post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'}).status_code == 200
+    assert user_cache.get(admin_id) is None
+
+    with app.app_context():
+        assert get_cached_user(admin_id).updated_at > cached.updated_at
+
+
+def test_deactivate_invalidates_cached_user(app, client, auth_headers):
+    admin_id = _admin_id(app)
+    client.get('/api/auth/me', headers=auth_headers)
+    assert user_cache.get(admin_id).is_active
+
+    response = client.delete('/api/user/account', headers=auth_headers,
+                             json={'password': 'admin123', 'confirmation': 'DELETE'})
+    assert response.status_code == 200
+    assert user_cache.get(admin_id) is None
+
+    with app.app_context():
+        assert get_cached_user(admin_id).is_active is False
@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+
+from src.models.user import User, UserSession, db
+from src.utils.auth_utils import get_user_stats
+
+
+def _add_session(user_id, token_hash, expires_in, is_active=True):
+    now = datetime.utcnow()
+    db.session.add(UserSession(
+        user_id=user_id,
+        token_hash=token_hash,
+        created_at=now,
+        expires_at=now + timedelta(seconds=expires_in),
+        is_active=is_active
+    ))
+
+
+def test_user_stats_aggregates_sessions(app):
+    with app.app_context():
+        admin = User.find_by_username('admin')
+        _add_session(admin.id, 'active', 3600)
+        _add_session(admin.id, 'revoked', 3600, is_active=False)
+        _add_session(admin.id, 'expired', -60)
+        db.session.commit()
+
+        stats = get_user_stats(admin)
+        assert stats['total_logins'] == 3
+        assert stats['sessions_count'] == 1
+        assert stats['last_login'] is not None
+        assert stats['account_age_days'] == 0
+
+
+def test_user_stats_cache_invalidated_on_login_and_logout(client, auth_headers):
+    response = client.get('/api/user/stats', headers=auth_headers)
+    assert response.json['stats']['sessions_count'] == 1
+
+    second = client.post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+    second_headers = {'Authorization': f"Bearer {second.json['access_token']}"}
+    response = client.get('/api/user/stats', headers=auth_headers)
+    assert response.json['stats']['sessions_count'] == 2
+    assert response.json['stats']['total_logins'] == 2
+
+    client.post('/api/auth/logout', headers=second_headers)
+    response = client.get('/api/user/stats', headers=auth_headers)
+    assert response.json['stats']['sessions_count'] == 1
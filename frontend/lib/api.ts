@@ -51,6 +51,9 @@ export const api = {
         body: JSON.stringify(userData)
       }),
     
+    checkAvailability: (params: { username?: string; email?: string }) => 
+      api.request(`/api/auth/availability?${new URLSearchParams(params as Record<string, string>)}`),
+    
     login: (credentials: any) => 
       api.request('/api/auth/login', {
         method: 'POST',